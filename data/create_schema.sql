@@ -1,5 +1,8 @@
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 DROP TABLE IF EXISTS "likes";
 DROP TABLE IF EXISTS "follows";
+DROP TABLE IF EXISTS "concept_closure";
 DROP TABLE IF EXISTS "concept_links";
 DROP TABLE IF EXISTS "commets";
 DROP TABLE IF EXISTS "concepts";
@@ -26,11 +29,17 @@ CREATE TABLE concepts (
 	created_at TIMESTAMP WITHOUT TIME ZONE,
 	updated_at TIMESTAMP WITHOUT TIME ZONE,
 	identifier VARCHAR GENERATED ALWAYS AS (author || '/' || title) STORED,
+	search_vector TSVECTOR GENERATED ALWAYS AS (setweight(to_tsvector('english', title), 'A') || setweight(to_tsvector('english', coalesce(description, '')), 'B')) STORED,
 	PRIMARY KEY (title, author),
 	FOREIGN KEY(author) REFERENCES accounts (display_name) ON DELETE SET DEFAULT ON UPDATE CASCADE,
 	UNIQUE (identifier)
 );
 
+CREATE INDEX concepts_recently_updated ON concepts (updated_at, identifier);
+CREATE INDEX concepts_title_trgm ON concepts USING gin (title gin_trgm_ops);
+CREATE INDEX concepts_author_trgm ON concepts USING gin (author gin_trgm_ops);
+CREATE INDEX concepts_search_vector ON concepts USING gin (search_vector);
+
 
 
 CREATE TABLE follows (
@@ -46,11 +55,54 @@ CREATE TABLE follows (
 CREATE TABLE concept_links (
 	ancestor VARCHAR NOT NULL,
 	descendant VARCHAR NOT NULL,
+	link_id BIGINT GENERATED BY DEFAULT AS IDENTITY,
+	PRIMARY KEY (ancestor, descendant),
+	FOREIGN KEY(ancestor) REFERENCES concepts (identifier) ON DELETE CASCADE ON UPDATE CASCADE,
+	FOREIGN KEY(descendant) REFERENCES concepts (identifier) ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+CREATE INDEX concept_links_descendant ON concept_links (descendant);
+CREATE UNIQUE INDEX concept_links_link_id ON concept_links (link_id);
+
+
+
+CREATE TABLE concept_closure (
+	ancestor VARCHAR NOT NULL,
+	descendant VARCHAR NOT NULL,
+	depth INTEGER NOT NULL,
 	PRIMARY KEY (ancestor, descendant),
 	FOREIGN KEY(ancestor) REFERENCES concepts (identifier) ON DELETE CASCADE ON UPDATE CASCADE,
 	FOREIGN KEY(descendant) REFERENCES concepts (identifier) ON DELETE CASCADE ON UPDATE CASCADE
 );
 
+CREATE INDEX concept_closure_ancestor_depth ON concept_closure (ancestor, depth);
+CREATE INDEX concept_closure_descendant_depth ON concept_closure (descendant, depth);
+
+CREATE OR REPLACE FUNCTION rebuild_concept_closure() RETURNS BIGINT AS $$
+DECLARE
+	generation INTEGER := 1;
+	added BIGINT;
+BEGIN
+	LOCK TABLE concept_links IN SHARE MODE;
+	PERFORM pg_advisory_xact_lock(1818848875);
+	DELETE FROM concept_closure;
+	INSERT INTO concept_closure (ancestor, descendant, depth)
+	SELECT ancestor, descendant, 1 FROM concept_links WHERE ancestor <> descendant;
+	LOOP
+		INSERT INTO concept_closure (ancestor, descendant, depth)
+		SELECT DISTINCT closure.ancestor, link.descendant, generation + 1
+		FROM concept_closure AS closure
+		JOIN concept_links AS link ON link.ancestor = closure.descendant
+		WHERE closure.depth = generation AND link.descendant <> closure.ancestor
+		ON CONFLICT (ancestor, descendant) DO NOTHING;
+		GET DIAGNOSTICS added = ROW_COUNT;
+		EXIT WHEN added = 0;
+		generation := generation + 1;
+	END LOOP;
+	RETURN (SELECT count(*) FROM concept_closure);
+END;
+$$ LANGUAGE plpgsql;
+
 
 
 CREATE TABLE likes (
@@ -70,12 +122,47 @@ CREATE TABLE comments (
 	free_text VARCHAR,
 	parent UUID,
 	created_at TIMESTAMP WITHOUT TIME ZONE,
+	path VARCHAR,
 	PRIMARY KEY (comment_id),
 	FOREIGN KEY(comment_on) REFERENCES concepts (identifier) ON DELETE CASCADE ON UPDATE CASCADE,
 	FOREIGN KEY(comment_by) REFERENCES accounts (display_name) ON DELETE SET DEFAULT ON UPDATE CASCADE,
 	FOREIGN KEY(parent) REFERENCES comments (comment_id)
 );
 
+CREATE INDEX comments_on_concept ON comments (comment_on, created_at);
+CREATE INDEX comments_responses ON comments (parent, created_at, comment_id);
+CREATE INDEX comments_thread_order ON comments (comment_on, path);
+
+CREATE OR REPLACE FUNCTION comment_path_segment(created_at TIMESTAMP, comment_id UUID) RETURNS VARCHAR AS $$
+	SELECT lpad(to_hex(
+		extract(epoch FROM date_trunc('second', coalesce(created_at, 'epoch')))::BIGINT * 1000000
+		+ extract(microseconds FROM coalesce(created_at, 'epoch'))::BIGINT % 1000000
+	), 14, '0') || replace(comment_id::TEXT, '-', '')
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION rebuild_comment_paths() RETURNS BIGINT AS $$
+DECLARE
+	generation INTEGER := 1;
+	updated BIGINT;
+	total BIGINT;
+BEGIN
+	LOCK TABLE comments IN SHARE ROW EXCLUSIVE MODE;
+	UPDATE comments SET path = comment_path_segment(created_at, comment_id) WHERE parent IS NULL;
+	GET DIAGNOSTICS total = ROW_COUNT;
+	LOOP
+		UPDATE comments AS reply
+		SET path = thread.path || comment_path_segment(reply.created_at, reply.comment_id)
+		FROM comments AS thread
+		WHERE reply.parent = thread.comment_id AND length(thread.path) = generation * 46;
+		GET DIAGNOSTICS updated = ROW_COUNT;
+		EXIT WHEN updated = 0;
+		total := total + updated;
+		generation := generation + 1;
+	END LOOP;
+	RETURN total;
+END;
+$$ LANGUAGE plpgsql;
+
 COPY Accounts(display_name, preferred_name, biography, password_hash, salt_value, created_at, updated_at)
 FROM '/docker-entrypoint-initdb.d/test_accounts.csv'
 DELIMITER '|';
@@ -88,6 +175,8 @@ COPY Concept_Links(ancestor, descendant)
 FROM '/docker-entrypoint-initdb.d/test_links.csv'
 DELIMITER '|';
 
+SELECT rebuild_concept_closure();
+
 COPY Likes(display_name, concept_id)
 FROM '/docker-entrypoint-initdb.d/test_likes.csv'
 DELIMITER '|';
@@ -100,3 +189,5 @@ COPY Comments(comment_id, comment_on, comment_by, free_text, parent, created_at)
 FROM '/docker-entrypoint-initdb.d/test_comments.csv'
 WITH NULL AS 'NULL'
 DELIMITER '|';
+
+SELECT rebuild_comment_paths();
@@ -0,0 +1,18 @@
+-- Backs fuzzy concept searches with trigram indexes so the LIKE '%term%'
+-- matching used by GET /concepts?fuzzy=... is answered by an index scan
+-- instead of a sequential scan of concepts, for terms of three or more
+-- characters. similarity() then ranks the matches.
+--
+-- Databases created from create_schema.sql after this migration already
+-- have these indexes. CONCURRENTLY keeps concepts writable while the
+-- indexes build, so run this file outside of a transaction block:
+--
+--     psql -d <database> -f 001_trigram_search.sql
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS concepts_title_trgm
+    ON concepts USING gin (title gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS concepts_author_trgm
+    ON concepts USING gin (author gin_trgm_ops);
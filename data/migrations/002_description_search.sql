@@ -0,0 +1,19 @@
+-- Adds the stored full text search document of each concept, weighting its
+-- title above its description, so GET /concepts?text=... is answered by an
+-- index scan instead of parsing every description.
+--
+-- Adding a stored generated column rewrites concepts under an exclusive
+-- lock, so schedule it accordingly. The index is built concurrently, so run
+-- this file outside of a transaction block:
+--
+--     psql -d <database> -f 002_description_search.sql
+
+ALTER TABLE concepts
+    ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', title), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS concepts_search_vector
+    ON concepts USING gin (search_vector);
@@ -0,0 +1,49 @@
+-- Adds the transitive closure of concept_links, recording the shortest
+-- depth between every concept and each concept derived from it, so lineage
+-- lookups are answered by index range scans instead of recursive walks.
+--
+-- rebuild_concept_closure() recomputes the closure from concept_links one
+-- generation at a time and can be rerun whenever the two drift apart. It
+-- blocks new links while it runs, so run it outside of peak hours:
+--
+--     psql -d <database> -f 003_concept_closure.sql
+
+CREATE TABLE IF NOT EXISTS concept_closure (
+	ancestor VARCHAR NOT NULL,
+	descendant VARCHAR NOT NULL,
+	depth INTEGER NOT NULL,
+	PRIMARY KEY (ancestor, descendant),
+	FOREIGN KEY(ancestor) REFERENCES concepts (identifier) ON DELETE CASCADE ON UPDATE CASCADE,
+	FOREIGN KEY(descendant) REFERENCES concepts (identifier) ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS concept_closure_ancestor_depth ON concept_closure (ancestor, depth);
+CREATE INDEX IF NOT EXISTS concept_closure_descendant_depth ON concept_closure (descendant, depth);
+CREATE INDEX IF NOT EXISTS concept_links_descendant ON concept_links (descendant);
+
+CREATE OR REPLACE FUNCTION rebuild_concept_closure() RETURNS BIGINT AS $$
+DECLARE
+	generation INTEGER := 1;
+	added BIGINT;
+BEGIN
+	LOCK TABLE concept_links IN SHARE MODE;
+	PERFORM pg_advisory_xact_lock(1818848875);
+	DELETE FROM concept_closure;
+	INSERT INTO concept_closure (ancestor, descendant, depth)
+	SELECT ancestor, descendant, 1 FROM concept_links WHERE ancestor <> descendant;
+	LOOP
+		INSERT INTO concept_closure (ancestor, descendant, depth)
+		SELECT DISTINCT closure.ancestor, link.descendant, generation + 1
+		FROM concept_closure AS closure
+		JOIN concept_links AS link ON link.ancestor = closure.descendant
+		WHERE closure.depth = generation AND link.descendant <> closure.ancestor
+		ON CONFLICT (ancestor, descendant) DO NOTHING;
+		GET DIAGNOSTICS added = ROW_COUNT;
+		EXIT WHEN added = 0;
+		generation := generation + 1;
+	END LOOP;
+	RETURN (SELECT count(*) FROM concept_closure);
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT rebuild_concept_closure();
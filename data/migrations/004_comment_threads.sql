@@ -0,0 +1,12 @@
+-- Indexes comments by the concept they were left on, oldest first, so the
+-- comments section of a concept is read by one index range scan instead of
+-- a query per thread and per response.
+--
+-- Databases created from create_schema.sql after this migration already
+-- have this index. CONCURRENTLY keeps comments writable while the index
+-- builds, so run this file outside of a transaction block:
+--
+--     psql -d <database> -f 004_comment_threads.sql
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS comments_on_concept
+    ON comments (comment_on, created_at);
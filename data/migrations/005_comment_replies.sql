@@ -0,0 +1,12 @@
+-- Indexes comments by the comment they respond to, oldest first, so the
+-- responses previewed under each comment of a page of threads, and the
+-- pages of responses expanded from a comment, are read by index range scans.
+--
+-- Databases created from create_schema.sql after this migration already
+-- have this index. CONCURRENTLY keeps comments writable while the index
+-- builds, so run this file outside of a transaction block:
+--
+--     psql -d <database> -f 005_comment_replies.sql
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS comments_responses
+    ON comments (parent, created_at, comment_id);
@@ -0,0 +1,49 @@
+-- Adds the materialized path of each comment: the path segments of its
+-- ancestors followed by its own, each the fixed width hex of its creation
+-- time in microseconds and of its id. Ordering the paths of a concept's
+-- comments as text lists its threads the way they are displayed, so a
+-- whole thread or subtree is read by one range scan of comments_thread_order.
+--
+-- rebuild_comment_paths() recomputes every path one generation at a time
+-- and blocks new comments while it runs. Rerun it once the service writing
+-- paths is deployed, to fill in comments created in between. The index is
+-- built concurrently, so run this file outside of a transaction block:
+--
+--     psql -d <database> -f 006_comment_paths.sql
+
+ALTER TABLE comments ADD COLUMN IF NOT EXISTS path VARCHAR;
+
+CREATE OR REPLACE FUNCTION comment_path_segment(created_at TIMESTAMP, comment_id UUID) RETURNS VARCHAR AS $$
+	SELECT lpad(to_hex(
+		extract(epoch FROM date_trunc('second', coalesce(created_at, 'epoch')))::BIGINT * 1000000
+		+ extract(microseconds FROM coalesce(created_at, 'epoch'))::BIGINT % 1000000
+	), 14, '0') || replace(comment_id::TEXT, '-', '')
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION rebuild_comment_paths() RETURNS BIGINT AS $$
+DECLARE
+	generation INTEGER := 1;
+	updated BIGINT;
+	total BIGINT;
+BEGIN
+	LOCK TABLE comments IN SHARE ROW EXCLUSIVE MODE;
+	UPDATE comments SET path = comment_path_segment(created_at, comment_id) WHERE parent IS NULL;
+	GET DIAGNOSTICS total = ROW_COUNT;
+	LOOP
+		UPDATE comments AS reply
+		SET path = thread.path || comment_path_segment(reply.created_at, reply.comment_id)
+		FROM comments AS thread
+		WHERE reply.parent = thread.comment_id AND length(thread.path) = generation * 46;
+		GET DIAGNOSTICS updated = ROW_COUNT;
+		EXIT WHEN updated = 0;
+		total := total + updated;
+		generation := generation + 1;
+	END LOOP;
+	RETURN total;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT rebuild_comment_paths();
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS comments_thread_order
+    ON comments (comment_on, path);
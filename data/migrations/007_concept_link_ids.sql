@@ -0,0 +1,14 @@
+-- Numbers concept links in the order they are created, so each worker's
+-- in-memory copy of the link graph can read just the links created since
+-- the newest one it holds, instead of waiting for its next full reload.
+--
+-- Adding the identity column numbers the existing links and rewrites the
+-- table, blocking new links until it completes. The index is built
+-- concurrently, so run this file outside of a transaction block:
+--
+--     psql -d <database> -f 007_concept_link_ids.sql
+
+ALTER TABLE concept_links ADD COLUMN IF NOT EXISTS link_id BIGINT GENERATED BY DEFAULT AS IDENTITY;
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS concept_links_link_id
+    ON concept_links (link_id);
@@ -6,11 +6,13 @@
 
 import logging
 import datetime
+import uuid
 from typing import Union, List
 
-from fastapi import FastAPI, status, Header
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, status, Header, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 
+from .config import ServiceConfig
 from .handlers.factory import EndpointHandlerFactory
 from .services import RegisteredService
 from .models import (
@@ -25,7 +27,11 @@ from .models import (
         ConceptLinkRecord,
         EstablishLink,
         ConceptSearchQuery,
+        ConceptSearchPage,
+        ConceptSearchStream,
         ConceptLineage,
+        ConceptLineageGraph,
+        ConceptLineageRequest,
         AccountFollowingRecord,
         FollowRequest,
         UnfollowRequest,
@@ -34,10 +40,14 @@ from .models import (
         UnlikeRequest,
         ConceptComment,
         CreateComment,
+        ConceptCommentThreads,
+        ConceptCommentsRequest,
+        ConnectionPoolStatistics,
+        CacheStatistics,
         EndpointErrorMessage,
         EndpointInformationalMessage
 )
-from .models.artifacts import FuzzyOption
+from .models.artifacts import FuzzyOption, LineageFormat
 
 
 class IdeabankAPI(FastAPI):
@@ -62,6 +72,16 @@ LOG_HANDLER.setFormatter(LOG_FORMAT)
 LOGGER.addHandler(LOG_HANDLER)
 
 
+@app.on_event("startup")
+async def load_lineage_graph():
+    """Loads the concept graph lineages are walked on before serving requests"""
+    handler = app.endpoint_factory.create_handler(
+            'LineageGraphLoadingHandler',
+            RegisteredService.CONCEPTS_DS
+            )
+    await handler.receive_async(None)
+
+
 @app.post(
         "/accounts/create",
         status_code=status.HTTP_201_CREATED,
@@ -74,7 +94,7 @@ LOGGER.addHandler(LOG_HANDLER)
                 }
             }
         )
-def create_account(
+async def create_account(
         new_account: CredentialSet,
         response: JSONResponse
         ):
@@ -83,7 +103,7 @@ def create_account(
             'AccountCreationHandler',
             RegisteredService.ACCOUNTS_DS
             )
-    handler.receive(new_account)
+    await handler.receive_async(new_account)
     response.status_code = handler.result.code
     return handler.result.body
 
@@ -99,7 +119,7 @@ def create_account(
                 }
             }
         )
-def authenticate(
+async def authenticate(
         credentials: CredentialSet,
         response: JSONResponse
         ):
@@ -111,7 +131,7 @@ def authenticate(
             'AuthenticationHandler',
             RegisteredService.ACCOUNTS_DS
             )
-    handler.receive(credentials)
+    await handler.receive_async(credentials)
     response.status_code = handler.result.code
     return handler.result.body
 
@@ -127,7 +147,7 @@ def authenticate(
                 }
             }
         )
-def fetch_profile(
+async def fetch_profile(
         display_name: str,
         response: JSONResponse
         ):
@@ -136,7 +156,7 @@ def fetch_profile(
             'ProfileRetrievalHandler',
             RegisteredService.ACCOUNTS_DS
             )
-    handler.receive(display_name)
+    await handler.receive_async(display_name)
     response.status_code = handler.result.code
     return handler.result.body
 
@@ -156,7 +176,7 @@ def fetch_profile(
                 }
             }
         )
-def create_concept(
+async def create_concept(
         concept_data: ConceptDataPayload,
         response: JSONResponse,
         authorization: str = Header(default="")
@@ -166,7 +186,7 @@ def create_concept(
             'ConceptCreationHandler',
             RegisteredService.CONCEPTS_DS
             )
-    handler.receive(
+    await handler.receive_async(
             CreateConcept(
                 auth_token=AuthorizationToken(
                     token=authorization,
@@ -194,7 +214,7 @@ def create_concept(
                 }
             }
         )
-def create_link(
+async def create_link(
         link_data: ConceptLinkRecord,
         response: JSONResponse,
         authorization: str = Header(default="")
@@ -204,8 +224,7 @@ def create_link(
             'ConceptLinkingHandler',
             RegisteredService.CONCEPTS_DS
             )
-    handler.use_service(RegisteredService.CONCEPTS_DS)
-    handler.receive(
+    await handler.receive_async(
             EstablishLink(
                 auth_token=AuthorizationToken(
                     token=authorization,
@@ -229,7 +248,7 @@ def create_link(
                 }
             }
         )
-def get_specific_concept(
+async def get_specific_concept(
         author: str,
         title: str,
         response: JSONResponse,
@@ -240,8 +259,7 @@ def get_specific_concept(
             'SpecificConceptRetrievalHandler',
             RegisteredService.CONCEPTS_DS
             )
-    handler.use_service(RegisteredService.CONCEPTS_DS)
-    handler.receive(
+    await handler.receive_async(
             ConceptRequest(
                 title=title,
                 author=author,
@@ -256,30 +274,63 @@ def get_specific_concept(
         "/concepts",
         responses={
             status.HTTP_200_OK: {
-                'model': List[ConceptSimpleView]
+                'model': ConceptSearchPage,
+                'content': {'application/x-ndjson': {}}
+                },
+            status.HTTP_400_BAD_REQUEST: {
+                'model': EndpointErrorMessage
                 }
             }
         )
-def search_concepts(
+async def search_concepts(
         response: JSONResponse,
         author: str = '',
         title: str = '',
         notbefore: datetime.datetime = None,
         notafter: datetime.datetime = None,
-        fuzzy: FuzzyOption = FuzzyOption.NONE
+        *,
+        fuzzy: FuzzyOption = FuzzyOption.NONE,
+        limit: int = Query(25, ge=1, le=100),
+        cursor: str = None,
+        similarity: float = Query(
+            None,
+            ge=0,
+            le=1,
+            description="Minimum trigram similarity, from 0 to 1, of each fuzzy field. Fuzzy "
+                        "matches contain the term and are only filtered by similarity if given"
+            ),
+        text: str = Query(None, min_length=1, max_length=256),
+        accept: str = Header(None)
         ):  # pylint:disable=too-many-arguments
-    """Retrieves the concepts matching the given criteria"""
+    """Retrieves a page of the concepts matching the given criteria, most recently updated first.
+    Fuzzy searches match titles or authors containing the term, ranked by trigram similarity,
+    optionally requiring a minimum similarity.
+    Text searches match titles and descriptions, are ranked by relevance and return highlighted
+    snippets of the description. Author and title then only narrow the search when given.
+    Pass the returned next cursor to retrieve the following page.
+    Accepting application/x-ndjson streams every match instead, one concept per line"""
+    streaming = 'application/x-ndjson' in (accept or '')
     handler = app.endpoint_factory.create_handler(
-            'ConceptSearchResultHandler',
+            'ConceptSearchStreamHandler' if streaming else 'ConceptSearchResultHandler',
             RegisteredService.CONCEPTS_DS
             )
-    handler.receive(ConceptSearchQuery(
+    await handler.receive_async(ConceptSearchQuery(
         author=author,
         title=title,
         not_before=notbefore or datetime.datetime.fromtimestamp(0, datetime.timezone.utc),
         not_after=notafter or datetime.datetime.now(datetime.timezone.utc),
-        fuzzy=fuzzy
+        fuzzy=fuzzy,
+        limit=limit,
+        cursor=cursor,
+        similarity=similarity,
+        text=text
         ))
+    if isinstance(handler.result.body, ConceptSearchStream):
+        return StreamingResponse(
+                handler.result.body.lines,
+                status_code=handler.result.code,
+                media_type=handler.result.body.media_type
+                )
     response.status_code = handler.result.code
     return handler.result.body
 
@@ -288,27 +339,30 @@ def search_concepts(
         "/concepts/{author}/{title}/lineage",
         responses={
             status.HTTP_200_OK: {
-                'model': ConceptLineage
+                'model': Union[ConceptLineage, ConceptLineageGraph]
                 },
             status.HTTP_404_NOT_FOUND: {
                 'model': EndpointErrorMessage
                 }
             }
         )
-def get_lineage(
+async def get_lineage(
         author: str,
         title: str,
-        response: JSONResponse
+        response: JSONResponse,
+        lineage_format: LineageFormat = Query(LineageFormat.TREE, alias='format')
         ):
-    """Retrieve a tree-like structure showing the lineage of the specified concept"""
+    """Retrieve the lineage of the specified concept, either as a tree-like structure
+    or as a flat graph listing every concept and link once"""
     handler = app.endpoint_factory.create_handler(
             'ConceptLineageHandler',
             RegisteredService.CONCEPTS_DS
             )
-    handler.receive(ConceptRequest(
+    await handler.receive_async(ConceptLineageRequest(
         author=author,
         title=title,
-        simple=True
+        simple=True,
+        format=lineage_format
         ))
     response.status_code = handler.result.code
     return handler.result.body
@@ -329,7 +383,7 @@ def get_lineage(
                 }
             }
         )
-def start_following(
+async def start_following(
         response: JSONResponse,
         follow_data: AccountFollowingRecord,
         authorization: str = Header(default='')
@@ -339,7 +393,7 @@ def start_following(
             'StartFollowingAccountHandler',
             RegisteredService.ENGAGE_DS
             )
-    handler.receive(FollowRequest(
+    await handler.receive_async(FollowRequest(
         auth_token=AuthorizationToken(
             token=authorization,
             presenter=follow_data.follower
@@ -361,7 +415,7 @@ def start_following(
                 }
             }
         )
-def check_following(
+async def check_following(
         response: JSONResponse,
         follower: str,
         followee: str
@@ -371,7 +425,7 @@ def check_following(
             'CheckFollowingStatusHandler',
             RegisteredService.ENGAGE_DS
             )
-    handler.receive(AccountFollowingRecord(
+    await handler.receive_async(AccountFollowingRecord(
         follower=follower,
         followee=followee
         ))
@@ -393,7 +447,7 @@ def check_following(
                 }
             }
         )
-def stop_following(
+async def stop_following(
         response: JSONResponse,
         follow_data: AccountFollowingRecord,
         authorization: str = Header(default='')
@@ -403,7 +457,7 @@ def stop_following(
             'StopFollowingAccountHandler',
             RegisteredService.ENGAGE_DS
             )
-    handler.receive(UnfollowRequest(
+    await handler.receive_async(UnfollowRequest(
         auth_token=AuthorizationToken(
             token=authorization,
             presenter=follow_data.follower
@@ -429,7 +483,7 @@ def stop_following(
                 }
             }
         )
-def start_liking(
+async def start_liking(
         response: JSONResponse,
         like_data: ConceptLikingRecord,
         authorization: str = Header(default='')
@@ -439,7 +493,7 @@ def start_liking(
             'StartLikingConceptHandler',
             RegisteredService.ENGAGE_DS
             )
-    handler.receive(LikeRequest(
+    await handler.receive_async(LikeRequest(
         auth_token=AuthorizationToken(
             token=authorization,
             presenter=like_data.user_liking
@@ -461,7 +515,7 @@ def start_liking(
                 }
             }
         )
-def check_liking(
+async def check_liking(
         response: JSONResponse,
         display_name: str,
         concept: str
@@ -471,7 +525,7 @@ def check_liking(
             'CheckLikingStatusHandler',
             RegisteredService.ENGAGE_DS
             )
-    handler.receive(ConceptLikingRecord(
+    await handler.receive_async(ConceptLikingRecord(
         user_liking=display_name,
         concept_liked=concept
         ))
@@ -493,7 +547,7 @@ def check_liking(
                 }
             }
         )
-def stop_liking(
+async def stop_liking(
         response: JSONResponse,
         like_data: ConceptLikingRecord,
         authorization: str = Header(default='')
@@ -503,7 +557,7 @@ def stop_liking(
             'StopLikingConceptHandler',
             RegisteredService.ENGAGE_DS
             )
-    handler.receive(UnlikeRequest(
+    await handler.receive_async(UnlikeRequest(
         auth_token=AuthorizationToken(
             token=authorization,
             presenter=like_data.user_liking
@@ -529,7 +583,7 @@ def stop_liking(
                 }
             }
         )
-def leave_comment_on_concept(
+async def leave_comment_on_concept(
         response: JSONResponse,
         author: str,
         title: str,
@@ -541,7 +595,7 @@ def leave_comment_on_concept(
             'CommentCreationHandler',
             RegisteredService.ENGAGE_DS
             )
-    handler.receive(CreateComment(
+    await handler.receive_async(CreateComment(
         auth_token=AuthorizationToken(
             token=authorization,
             presenter=comment_data.comment_author
@@ -558,24 +612,117 @@ def leave_comment_on_concept(
         "/concepts/{author}/{title}/comment",
         responses={
             status.HTTP_200_OK: {
-                'model': EndpointInformationalMessage
+                'model': ConceptCommentThreads
+                },
+            status.HTTP_400_BAD_REQUEST: {
+                'model': EndpointErrorMessage
                 }
             }
         )
-def get_comments_section_on_concept(
+async def get_comments_section_on_concept(
         response: JSONResponse,
         author: str,
-        title: str
-        ):
-    """Gathers all the comments left on a concept ordered by oldest to newest"""
+        title: str,
+        *,
+        limit: int = Query(ServiceConfig.Comments.PAGE_SIZE, ge=1, le=100),
+        cursor: str = None,
+        depth: int = Query(ServiceConfig.Comments.PREVIEW_DEPTH, ge=0, le=10)
+        ):  # pylint:disable=too-many-arguments
+    """Gathers a page of the comment threads left on a concept ordered by oldest to newest.
+    Each thread previews its responses up to depth levels deep. Pass the returned next
+    cursor to retrieve the following page, and the more_replies cursor of a comment to
+    its replies endpoint to expand the responses left out of it"""
+    handler = app.endpoint_factory.create_handler(
+            'ConceptCommentsSectionHandler',
+            RegisteredService.ENGAGE_DS
+            )
+    await handler.receive_async(ConceptCommentsRequest(
+        author=author,
+        title=title,
+        simple=True,
+        limit=limit,
+        cursor=cursor,
+        depth=depth
+        ))
+    response.status_code = handler.result.code
+    return handler.result.body
+
+
+@app.get(
+        "/concepts/{author}/{title}/comment/{comment_id}/replies",
+        responses={
+            status.HTTP_200_OK: {
+                'model': ConceptCommentThreads
+                },
+            status.HTTP_400_BAD_REQUEST: {
+                'model': EndpointErrorMessage
+                }
+            }
+        )
+async def get_comment_replies(
+        response: JSONResponse,
+        author: str,
+        title: str,
+        comment_id: uuid.UUID,
+        *,
+        limit: int = Query(ServiceConfig.Comments.PAGE_SIZE, ge=1, le=100),
+        cursor: str = None,
+        depth: int = Query(ServiceConfig.Comments.PREVIEW_DEPTH, ge=0, le=10)
+        ):  # pylint:disable=too-many-arguments
+    """Gathers a page of the responses to a comment on a concept ordered by oldest to newest,
+    each previewing its own responses up to depth levels deep. Pass a more_replies cursor
+    of the comment, or the returned next cursor, to resume where it left off"""
     handler = app.endpoint_factory.create_handler(
             'ConceptCommentsSectionHandler',
             RegisteredService.ENGAGE_DS
             )
-    handler.receive(ConceptRequest(
+    await handler.receive_async(ConceptCommentsRequest(
         author=author,
         title=title,
-        simple=True
+        simple=True,
+        response_to=comment_id,
+        limit=limit,
+        cursor=cursor,
+        depth=depth
         ))
     response.status_code = handler.result.code
     return handler.result.body
+
+
+@app.get(
+        "/metrics/db-pool",
+        responses={
+            status.HTTP_200_OK: {
+                'model': List[ConnectionPoolStatistics]
+                }
+            }
+        )
+async def get_connection_pool_statistics(
+        response: JSONResponse
+        ):
+    """Reports the usage of the database connection pools held by this worker"""
+    handler = app.endpoint_factory.create_handler(
+            'ConnectionPoolStatisticsHandler',
+            RegisteredService.RAW_DB
+            )
+    await handler.receive_async(None)
+    response.status_code = handler.result.code
+    return handler.result.body
+
+
+@app.get(
+        "/metrics/caches",
+        responses={
+            status.HTTP_200_OK: {
+                'model': List[CacheStatistics]
+                }
+            }
+        )
+async def get_cache_statistics(
+        response: JSONResponse
+        ):
+    """Reports the usage of the in-process caches held by this worker"""
+    handler = app.endpoint_factory.create_handler('CacheStatisticsHandler')
+    await handler.receive_async(None)
+    response.status_code = handler.result.code
+    return handler.result.body
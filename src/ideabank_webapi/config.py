@@ -20,6 +20,17 @@ class ServiceConfig:  # pylint:disable=too-few-public-methods
         DBUSER = os.getenv('DBUSER')
         DBPASS = os.getenv('DBPASS')
         DBNAME = os.getenv('DBNAME')
+        DBPOOLSIZE = int(os.getenv('DBPOOLSIZE', '5'))
+        DBPOOLOVERFLOW = int(os.getenv('DBPOOLOVERFLOW', '10'))
+        DBPOOLPREPING = os.getenv('DBPOOLPREPING', 'true').lower() == 'true'
+        DBPOOLRECYCLE = int(os.getenv('DBPOOLRECYCLE', '-1'))
+        DBPOOLTIMEOUT = float(os.getenv('DBPOOLTIMEOUT', '30'))
+        DBPREPARETHRESHOLD = int(os.getenv('DBPREPARETHRESHOLD')) \
+            if os.getenv('DBPREPARETHRESHOLD') else None
+        DBPGBOUNCER = os.getenv('DBPGBOUNCER', 'false').lower() == 'true'
+        DBREPLICAS = [dsn.strip() for dsn in os.getenv('DBREPLICAS', '').split(',') if dsn.strip()]
+        DBREPLICABALANCING = os.getenv('DBREPLICABALANCING', 'round-robin')
+        DBREADYOURWRITES = float(os.getenv('DBREADYOURWRITES', '5'))
 
     class FileBucket:  # pylint:disable=too-few-public-methods
         """Content related options"""
@@ -28,6 +39,32 @@ class ServiceConfig:  # pylint:disable=too-few-public-methods
         BUCKET_KEY = os.getenv('S3KEY')
         BUCKET_SECRET = os.getenv('S3SECRET')
         BUCKET_NAME = os.getenv('S3NAME')
+        LINK_CACHE_SIZE = int(os.getenv('S3LINKCACHESIZE', '4096'))
+        LINK_MIN_TTL = int(os.getenv('S3LINKMINTTL', '60'))
+
+    class Search:  # pylint:disable=too-few-public-methods
+        """Concept search related options"""
+        RESULT_CACHE_SIZE = int(os.getenv('SEARCHCACHESIZE', '1024'))
+        RESULT_CACHE_TTL = float(os.getenv('SEARCHCACHETTL', '30'))
+        NOW_BUCKET = int(os.getenv('SEARCHNOWBUCKET', '60'))
+        STREAM_BATCH_SIZE = int(os.getenv('SEARCHSTREAMBATCH', '100'))
+
+    class Lineage:  # pylint:disable=too-few-public-methods
+        """Concept lineage related options"""
+        MAX_DEPTH = int(os.getenv('LINEAGEMAXDEPTH', '10'))
+        MAX_NODES = int(os.getenv('LINEAGEMAXNODES', '500'))
+        GRAPH_ENABLED = os.getenv('LINEAGEGRAPH', 'true').lower() == 'true'
+        GRAPH_REFRESH = float(os.getenv('LINEAGEGRAPHREFRESH', '300'))
+        CACHE_SIZE = int(os.getenv('LINEAGECACHESIZE', '1024'))
+        CACHE_TTL = float(os.getenv('LINEAGECACHETTL', '60'))
+
+    class Comments:  # pylint:disable=too-few-public-methods
+        """Comment section related options"""
+        PAGE_SIZE = int(os.getenv('COMMENTPAGESIZE', '20'))
+        PREVIEW_DEPTH = int(os.getenv('COMMENTPREVIEWDEPTH', '2'))
+        PREVIEW_REPLIES = int(os.getenv('COMMENTPREVIEWREPLIES', '3'))
+        CACHE_SIZE = int(os.getenv('COMMENTCACHESIZE', '256'))
+        CACHE_TTL = float(os.getenv('COMMENTCACHETTL', '60'))
 
     class AuthKey:  # pylint:disable=too-few-public-methods
         """JWT related options"""
@@ -63,3 +63,7 @@ class InvalidCredentialsException(IdeaBankEndpointHandlerException):
 
 class IdeaBankDataModelingException(BaseIdeaBankAPIException):
     """Base exception for data modeling errors"""
+
+
+class InvalidCursorError(IdeaBankEndpointHandlerException):
+    """Exception raised when a pagination cursor cannot be decoded"""
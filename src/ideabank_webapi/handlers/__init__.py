@@ -5,11 +5,12 @@
 """
 
 import logging
-from typing import Any, Union, Sequence
+from typing import Any, Optional, Union, Sequence
 from abc import ABC, abstractmethod
 from enum import Enum
 
 from fastapi import status
+from fastapi.concurrency import run_in_threadpool
 
 from ..models import (
         EndpointResponse,
@@ -17,7 +18,7 @@ from ..models import (
         IdeaBankArtifact,
         EndpointPayload
         )
-from ..services import RegisteredService
+from ..services import RegisteredService, PROVIDER_POOL
 from ..exceptions import (
         BaseIdeaBankAPIException,
         HandlerNotIdleException,
@@ -77,12 +78,22 @@ class BaseEndpointHandler(ABC):
 
     def use_service(self, name: RegisteredService) -> None:
         """Register a service provider that this handler can use.
+        Providers are taken from the process-wide provider pool.
         The current provider is replaced if the named service already exist
         Arguments:
             name: [RegisteredService] enum member of known services
         """
         LOGGER.debug("Using service provider for %s", str(name))
-        self._services.update({name: name.value()})
+        replaced = self._services.get(name)
+        self._services.update({name: PROVIDER_POOL.acquire(name)})
+        if replaced is not None:
+            PROVIDER_POOL.release(name, replaced)
+
+    def _release_services(self) -> None:
+        """Return every service provider held by this handler to the provider pool"""
+        for name, provider in self._services.items():
+            PROVIDER_POOL.release(name, provider)
+        self._services.clear()
 
     def get_service(self, name: RegisteredService):
         """Obtain the service provider instance registed under name
@@ -111,22 +122,81 @@ class BaseEndpointHandler(ABC):
         Returns:
             [None] use results() to obtain handler results
         """
+        self._start_processing()
+        try:
+            self._act_on_behalf_of(self._acting_account(incoming_data))
+            LOGGER.info("Attemping normal workflow %s", self.__class__.__name__)
+            self._complete(self._do_data_ops(incoming_data))
+        except BaseIdeaBankAPIException as err:
+            self._fail(err)
+        finally:
+            self._release_services()
+
+    async def receive_async(self, incoming_data: Union[IdeaBankArtifact, EndpointPayload]) -> None:
+        """Asynchronous counterpart of receive for use by async endpoints
+        Arguments:
+            incoming_data: [BasePayload] the payload to pass to this handler
+        Returns:
+            [None] use results() to obtain handler results
+        """
+        self._start_processing()
+        try:
+            self._act_on_behalf_of(self._acting_account(incoming_data))
+            LOGGER.info("Attemping normal async workflow %s", self.__class__.__name__)
+            self._complete(await self._do_data_ops_async(incoming_data))
+        except BaseIdeaBankAPIException as err:
+            self._fail(err)
+        finally:
+            self._release_services()
+
+    def _acting_account(  # pylint:disable=unused-argument
+            self,
+            request: Union[IdeaBankArtifact, EndpointPayload]
+            ) -> Optional[str]:
+        """The account a request is made by or about. Its reads see the account's own
+        recent writes, so handlers reading what an account may have just written
+        identify that account
+        Arguments:
+            request: [BasePayload] the payload passed to this handler
+        Returns:
+            [Optional[str]] display name of the account, None if the request has none
+        """
+        return None
+
+    def _act_on_behalf_of(self, account: Optional[str]) -> None:
+        """Identify the acting account to every registered db service provider
+        Arguments:
+            account: [Optional[str]] display name of the account, None to leave them as is
+        """
+        if account is None:
+            return
+        for provider in self._services.values():
+            if hasattr(provider, 'acting_as'):
+                provider.acting_as(account)
+
+    def _start_processing(self) -> None:
+        """Move an idle handler into the processing state
+        Raises:
+            HandlerNotIdleException: if the handler already received a request
+        """
         if self.status != EndpointHandlerStatus.IDLE:
             LOGGER.error("Handler not ready to receive")
             raise HandlerNotIdleException(
                     f"Expected handler to be idle, but was {self.status}"
                     )
         self._status = EndpointHandlerStatus.PROCESSING
-        try:
-            LOGGER.info("Attemping normal workflow %s", self.__class__.__name__)
-            data = self._do_data_ops(incoming_data)
-            self._build_success_response(data)
-            self._status = EndpointHandlerStatus.COMPLETE
-            LOGGER.info("Completed normal workflow successfully")
-        except BaseIdeaBankAPIException as err:
-            LOGGER.error("Normal flow unsuccessful, starting error workflow")
-            self._build_error_response(err)
-            self._status = EndpointHandlerStatus.ERROR
+
+    def _complete(self, data: Union[IdeaBankArtifact, Sequence[IdeaBankArtifact], str]) -> None:
+        """Finish the normal workflow with the data obtained from the data operations"""
+        self._build_success_response(data)
+        self._status = EndpointHandlerStatus.COMPLETE
+        LOGGER.info("Completed normal workflow successfully")
+
+    def _fail(self, err: BaseIdeaBankAPIException) -> None:
+        """Finish the workflow with an error response for the given exception"""
+        LOGGER.error("Normal flow unsuccessful, starting error workflow")
+        self._build_error_response(err)
+        self._status = EndpointHandlerStatus.ERROR
 
     @abstractmethod
     def _do_data_ops(
@@ -142,6 +212,21 @@ class BaseEndpointHandler(ABC):
             [BaseIdeaBankDataServiceException] for any service related issues
         """
 
+    async def _do_data_ops_async(
+            self,
+            request: Any
+            ) -> Union[IdeaBankArtifact, Sequence[IdeaBankArtifact], str]:
+        """Asynchronous counterpart of _do_data_ops.
+        Handlers without native async data operations run _do_data_ops in the threadpool
+        Arguments:
+            [BasePayload] data request
+        Returns:
+            Union[IdeaBankArtifact, Sequence[IdeaBankArtifact], str]
+        Raises:
+            [BaseIdeaBankDataServiceException] for any service related issues
+        """
+        return await run_in_threadpool(self._do_data_ops, request)
+
     @abstractmethod
     def _build_success_response(
             self,
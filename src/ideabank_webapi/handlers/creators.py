@@ -9,7 +9,7 @@ import secrets
 import hashlib
 
 from fastapi import status
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import IntegrityError, NoResultFound
 
 from . import BaseEndpointHandler
 from .preprocessors import AuthorizationRequired
@@ -40,6 +40,10 @@ LOGGER = logging.getLogger(__name__)
 class AccountCreationHandler(BaseEndpointHandler):
     """Endpoint handler dealing with account creation"""
 
+    def _acting_account(self, request: CredentialSet) -> str:
+        """The new account writes itself, so logging in right after sees it"""
+        return request.display_name
+
     def _do_data_ops(self, request: CredentialSet) -> str:
         LOGGER.info("Securing new account credentials")
         secured_request = self._secure_payload(
@@ -116,12 +120,15 @@ class ConceptCreationHandler(AuthorizationRequired):
                         diagram=request.diagram
                     ))
                 service.exec_next()
-                return ConceptSimpleView(
+                created = ConceptSimpleView(
                         identifier=service.results.one().identifier,
                         thumbnail_url=service.share_item(
                             f'thumbnails/{request.author}/{request.title}'
                             )
                         )
+            LOGGER.info("Invalidating cached search results")
+            service.SEARCH_RESULTS.invalidate_all()
+            return created
         except IntegrityError as err:
             LOGGER.error(
                     "Cannot create duplicate concept `%s/%s`",
@@ -168,16 +175,26 @@ class ConceptLinkingHandler(AuthorizationRequired):
                     )
         try:
             with self.get_service(RegisteredService.CONCEPTS_DS) as service:
+                service.add_query(service.lock_lineage_closure())
                 service.add_query(service.link_existing_concept(
                     parent_identifier=request.ancestor,
                     child_identifier=request.descendant
                     ))
+                service.add_query(service.extend_lineage_closure(
+                    parent_identifier=request.ancestor,
+                    child_identifier=request.descendant
+                    ))
+                service.exec_next()
                 service.exec_next()
                 result = service.results.one()
-                return ConceptLinkRecord(
+                service.exec_next()
+                created = ConceptLinkRecord(
                         ancestor=result.ancestor,
                         descendant=result.descendant
                         )
+            service.LINEAGE_GRAPH.add_link(created.ancestor, created.descendant)
+            service.LINEAGES.invalidate_tagged(created.ancestor, created.descendant)
+            return created
         except IntegrityError as err:
             LOGGER.error(
                     "Could not establish link between `%s` and `%s`",
@@ -329,7 +346,8 @@ class StartLikingConceptHandler(AuthorizationRequired):
 
 
 class CommentCreationHandler(AuthorizationRequired):
-    """Endpoint handler dealing with comment creation"""
+    """Endpoint handler dealing with comment creation.
+    Once committed, comments are spliced into the cached comments on their concept"""
 
     def _do_data_ops(self, request: CreateComment) -> EndpointInformationalMessage:
         LOGGER.info(
@@ -346,10 +364,11 @@ class CommentCreationHandler(AuthorizationRequired):
                         response_to=request.response_to
                     ))
                 service.exec_next()
-                service.results.one()
-                return EndpointInformationalMessage(
-                        msg='Comment created successfully'
-                        )
+                created = service.results.one()
+            service.record_comment(request.concept_id, created)
+            return EndpointInformationalMessage(
+                    msg='Comment created successfully'
+                    )
         except IntegrityError as err:
             if 'not present in table' in str(err):
                 raise InvalidReferenceException(
@@ -357,6 +376,10 @@ class CommentCreationHandler(AuthorizationRequired):
                         "If responding to another comment, it must exist also."
                         ) from err
             raise
+        except NoResultFound as err:
+            raise InvalidReferenceException(
+                    "The comment being responded to must exist on the same concept."
+                    ) from err
 
     def _build_success_response(self, requested_data: EndpointInformationalMessage):
         self._result = EndpointResponse(
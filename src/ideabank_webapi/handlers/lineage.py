@@ -0,0 +1,103 @@
+"""
+    :module name: lineage
+    :module summary: linear assembly of concept lineages from their link records
+    :module author: Nathan Mendoza (nathancm@uci.edu)
+"""
+
+import itertools
+import logging
+from collections import deque
+from typing import Any, Dict, Iterable, List, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+
+def build_lineage(
+        focus: str,
+        links: Iterable[Tuple[str, str]],
+        views: Dict[str, Any]
+        ) -> Tuple[int, Dict[str, Any]]:
+    """Nest the concepts linked to the focus under the concepts they descend from.
+    Each concept is expanded once, under its nearest parent to a root, and
+    referenced by its data alone from any other parent, so ideas with several
+    parents keep the output linear in the number of links. Concepts no root
+    reaches, such as those in a cycle of links, are expanded from the focus,
+    or failing that from the first of them by identifier
+    Arguments:
+        focus: [str] identifier of the concept the lineage was requested for
+        links: [Iterable[Tuple[str, str]]] (ancestor, descendant) pairs linking the concepts
+        views: [Dict[str, Any]] the data to attach to each concept, by identifier
+    Returns:
+        [Tuple[int, Dict]] the number of concepts in the lineage and the nested lineage,
+        where each concept maps to its data and, if it has any, its children
+    """
+    children, roots = _adjacency(focus, links)
+    lineage = {}
+    entries = []
+    queue = deque()
+    expanded = set()
+    unreached = ([node] for node in itertools.chain([focus], sorted(children)))
+    for starts in itertools.chain([roots], unreached):
+        for start in starts:
+            if start not in expanded:
+                expanded.add(start)
+                lineage[start] = _expand(start, views, entries, queue)
+        while queue:
+            identifier, entry = queue.popleft()
+            for child in sorted(children[identifier]):
+                if child in expanded:
+                    entry['children'].append({child: {'data': views[child]}})
+                    continue
+                expanded.add(child)
+                entry['children'].append({child: _expand(child, views, entries, queue)})
+    for entry in entries:
+        if not entry['children']:
+            del entry['children']
+    LOGGER.debug("Assembled lineage of %d concepts", len(children))
+    return len(children), lineage
+
+
+def _adjacency(
+        focus: str,
+        links: Iterable[Tuple[str, str]]
+        ) -> Tuple[Dict[str, List[str]], List[str]]:
+    """Index the distinct links by ancestor in a single pass
+    Arguments:
+        focus: [str] identifier of the concept the lineage was requested for
+        links: [Iterable[Tuple[str, str]]] (ancestor, descendant) pairs linking the concepts
+    Returns:
+        [Tuple] the children of every concept, and the concepts without parents
+        (the focus if every concept has one)
+    """
+    children = {focus: []}
+    has_parent = set()
+    seen = set()
+    for ancestor, descendant in links:
+        if (ancestor, descendant) in seen:
+            continue
+        seen.add((ancestor, descendant))
+        children.setdefault(ancestor, []).append(descendant)
+        children.setdefault(descendant, [])
+        has_parent.add(descendant)
+    return children, sorted(node for node in children if node not in has_parent) or [focus]
+
+
+def _expand(
+        identifier: str,
+        views: Dict[str, Any],
+        entries: List[Dict[str, Any]],
+        queue: deque
+        ) -> Dict[str, Any]:
+    """Create the entry of a concept whose children are still to be added
+    Arguments:
+        identifier: [str] the concept to create the entry of
+        views: [Dict[str, Any]] the data to attach to each concept, by identifier
+        entries: [List] every entry created so far
+        queue: [deque] concepts waiting for their children to be added
+    Returns:
+        [Dict[str, Any]] the new entry
+    """
+    entry = {'children': [], 'data': views[identifier]}
+    entries.append(entry)
+    queue.append((identifier, entry))
+    return entry
@@ -0,0 +1,68 @@
+"""
+    :module name: pagination
+    :module summary: opaque cursors for keyset paginated endpoints
+    :module author: Nathan Mendoza (nathancm@uci.edu)
+"""
+
+import base64
+import datetime
+import json
+import logging
+from typing import Any, List
+
+from ..exceptions import InvalidCursorError
+
+LOGGER = logging.getLogger(__name__)
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode the sort key of the last item of a page into an opaque cursor
+    Arguments:
+        values: the json compatible values (or datetimes) making up the sort key
+    Returns:
+        [str] the url safe cursor
+    """
+    payload = json.dumps(
+            [v.isoformat() if isinstance(v, datetime.datetime) else v for v in values],
+            separators=(',', ':')
+            )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, *kinds: type) -> List[Any]:
+    """Decode a cursor produced by encode_cursor back into its sort key
+    Arguments:
+        cursor: [str] the cursor presented by the client
+        kinds: the expected type of each value of the sort key
+    Returns:
+        [List] the values making up the sort key
+    Raises:
+        InvalidCursorError: if the cursor was not produced for this sort key
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(kinds):
+            raise ValueError("Cursor does not match the sort key")
+        return [_revive(kind, value) for kind, value in zip(kinds, values)]
+    except (ValueError, TypeError) as err:
+        LOGGER.error("Could not decode cursor %s", cursor)
+        raise InvalidCursorError("The given cursor is not valid.") from err
+
+
+def _revive(kind: type, value: Any) -> Any:
+    """Convert a decoded cursor value back into the expected type
+    Arguments:
+        kind: the expected type of the value
+        value: the value as decoded from json
+    Returns:
+        the value as the expected type
+    Raises:
+        ValueError, TypeError: if the value cannot be of the expected type
+    """
+    if kind is datetime.datetime:
+        return datetime.datetime.fromisoformat(value)
+    if kind is float and isinstance(value, int):
+        return float(value)
+    if not isinstance(value, kind) or isinstance(value, bool) is not (kind is bool):
+        raise TypeError(f"Expected {kind.__name__} in cursor")
+    return value
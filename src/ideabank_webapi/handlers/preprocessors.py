@@ -62,6 +62,15 @@ class AuthorizationRequired(BaseEndpointHandler):
                     "Invalid token presented."
                     ) from err
 
+    def _acting_account(self, request: AuthorizedPayload) -> str:
+        """The authorized presenter acts on its own behalf
+        Arguments:
+            request: [AuthorizedPayload] the payload passed to this handler
+        Returns:
+            [str] the display name the authorization token belongs to
+        """
+        return request.auth_token.presenter
+
     def _build_error_response(
             self,
             exc: BaseIdeaBankAPIException) -> None:
@@ -90,3 +99,21 @@ class AuthorizationRequired(BaseEndpointHandler):
         except NotAuthorizedError as err:
             AuthorizationRequired._build_error_response(self, err)
             self._status = EndpointHandlerStatus.ERROR
+        finally:
+            self._release_services()
+
+    async def receive_async(self, incoming_data: AuthorizedPayload) -> None:
+        """Asynchronous counterpart of receive for use by async endpoints
+        Arguments:
+            incoming_data: [BasePayload] the payload to pass to this handler
+        Returns:
+            [None] use result to obtain handler results
+        """
+        try:
+            self._check_if_authorized(incoming_data.auth_token)
+            await super().receive_async(incoming_data)
+        except NotAuthorizedError as err:
+            AuthorizationRequired._build_error_response(self, err)
+            self._status = EndpointHandlerStatus.ERROR
+        finally:
+            self._release_services()
@@ -9,30 +9,44 @@ import hashlib
 import secrets
 import datetime
 import json
-from typing import Union, List
+import math
+import uuid
+from typing import Union, List, Optional, Tuple, Iterator
 
 from sqlalchemy.exc import NoResultFound
 from fastapi import status
-from treelib import Tree
 import jwt
 
 from . import BaseEndpointHandler
+from .pagination import encode_cursor, decode_cursor
+from .lineage import build_lineage
+from .threads import assemble_page
 from ..config import ServiceConfig
-from ..services import RegisteredService
+from ..services import RegisteredService, CACHES, PROVIDER_POOL
 from ..models import (
         CredentialSet,
         AccountRecord,
         AuthorizationToken,
         ProfileView,
         ConceptRequest,
+        ConceptLineageRequest,
+        ConceptCommentsRequest,
         ConceptSimpleView,
         ConceptFullView,
         ConceptSearchQuery,
+        ConceptSearchHit,
+        ConceptSearchPage,
+        ConceptSearchStream,
+        FuzzyOption,
+        LineageFormat,
         ConceptLineage,
+        ConceptLineageGraph,
+        ConceptLinkRecord,
         AccountFollowingRecord,
         ConceptLikingRecord,
-        ConceptComment,
         ConceptCommentThreads,
+        ConnectionPoolStatistics,
+        CacheStatistics,
         EndpointErrorMessage,
         EndpointInformationalMessage,
         EndpointResponse,
@@ -40,7 +54,8 @@ from ..models import (
 from ..exceptions import (
         InvalidCredentialsException,
         BaseIdeaBankAPIException,
-        RequestedDataNotFound
+        RequestedDataNotFound,
+        InvalidCursorError
     )
 
 LOGGER = logging.getLogger(__name__)
@@ -49,6 +64,10 @@ LOGGER = logging.getLogger(__name__)
 class AuthenticationHandler(BaseEndpointHandler):
     """Endpoint handler dealing into account authenticaiton"""
 
+    def _acting_account(self, request: CredentialSet) -> str:
+        """Logging in reads the account signing up wrote"""
+        return request.display_name
+
     def _do_data_ops(self, request: CredentialSet) -> str:
         try:
             LOGGER.info(
@@ -72,6 +91,29 @@ class AuthenticationHandler(BaseEndpointHandler):
                     "Invalid display name or password"
                     ) from err
 
+    async def _do_data_ops_async(self, request: CredentialSet) -> str:
+        try:
+            LOGGER.info(
+                    "Looking up account information: %s",
+                    request.display_name
+                    )
+            async with self.get_service(RegisteredService.ACCOUNTS_DS) as service:
+                service.add_query(service.fetch_authentication_information(
+                        display_name=request.display_name,
+                    ))
+                await service.exec_next_async()
+                result = service.results.one()
+                self.__verify_credentials(request, result)
+                return result.display_name
+        except NoResultFound as err:
+            LOGGER.error(
+                    "No account record found: %s",
+                    request.display_name
+                    )
+            raise InvalidCredentialsException(
+                    "Invalid display name or password"
+                    ) from err
+
     def _build_success_response(self, requested_data: str):
         self._result = EndpointResponse(
                 code=status.HTTP_200_OK,
@@ -123,6 +165,10 @@ class AuthenticationHandler(BaseEndpointHandler):
 class ProfileRetrievalHandler(BaseEndpointHandler):
     """Endpoint handler dealing with profile retrievals"""
 
+    def _acting_account(self, request: str) -> str:
+        """A profile is read as the account it belongs to"""
+        return request
+
     def _do_data_ops(self, request: str) -> ProfileView:
         try:
             LOGGER.info("Looking up profile information: %s", request)
@@ -143,6 +189,26 @@ class ProfileRetrievalHandler(BaseEndpointHandler):
                     f'Profile for {request} is not available'
                     ) from err
 
+    async def _do_data_ops_async(self, request: str) -> ProfileView:
+        try:
+            LOGGER.info("Looking up profile information: %s", request)
+            async with self.get_service(RegisteredService.ACCOUNTS_DS) as service:
+                service.add_query(service.fetch_account_profile(
+                    display_name=request
+                    ))
+                await service.exec_next_async()
+                result = service.results.one()
+                return ProfileView(
+                    preferred_name=result.preferred_name,
+                    biography=result.biography,
+                    avatar_url=service.share_item(f'avatars/{request}')
+                        )
+        except NoResultFound as err:
+            LOGGER.error("No account record found: %s", request)
+            raise RequestedDataNotFound(
+                    f'Profile for {request} is not available'
+                    ) from err
+
     def _build_success_response(self, requested_data: ProfileView):
         self._result = EndpointResponse(
                 code=status.HTTP_200_OK,
@@ -177,23 +243,34 @@ class SpecificConceptRetrievalHandler(BaseEndpointHandler):
                     author=request.author
                     ))
                 service.exec_next()
-                result = service.results.one()
-                if request.simple:
-                    return ConceptSimpleView(
-                            identifier=f'{result.author}/{result.title}',
-                            thumbnail_url=service.share_item(
-                                f'thumbnails/{result.author}/{result.title}'
-                                )
-                            )
-                return ConceptFullView(
-                        author=result.author,
-                        title=result.title,
-                        description=result.description,
-                        diagram=json.dumps(result.diagram),
-                        thumbnail_url=service.share_item(
-                            f'thumbnails/{result.author}/{result.title}'
-                            )
-                        )
+                return self.__concept_view(request, service.results.one(), service)
+        except NoResultFound as err:
+            LOGGER.error(
+                    "Did not find a concept matching %s/%s",
+                    request.author,
+                    request.title
+                    )
+            raise RequestedDataNotFound(
+                    f"No match for `{request.author}/{request.title}`"
+                    ) from err
+
+    async def _do_data_ops_async(
+            self,
+            request: ConceptRequest
+            ) -> Union[ConceptFullView, ConceptSimpleView]:
+        LOGGER.info(
+                "Searching for specific concept: %s/%s",
+                request.author,
+                request.title
+                )
+        try:
+            async with self.get_service(RegisteredService.CONCEPTS_DS) as service:
+                service.add_query(service.find_exact_concept(
+                    title=request.title,
+                    author=request.author
+                    ))
+                await service.exec_next_async()
+                return self.__concept_view(request, service.results.one(), service)
         except NoResultFound as err:
             LOGGER.error(
                     "Did not find a concept matching %s/%s",
@@ -204,6 +281,24 @@ class SpecificConceptRetrievalHandler(BaseEndpointHandler):
                     f"No match for `{request.author}/{request.title}`"
                     ) from err
 
+    def __concept_view(self, request: ConceptRequest, result, service):
+        if request.simple:
+            return ConceptSimpleView(
+                    identifier=f'{result.author}/{result.title}',
+                    thumbnail_url=service.share_item(
+                        f'thumbnails/{result.author}/{result.title}'
+                        )
+                    )
+        return ConceptFullView(
+                author=result.author,
+                title=result.title,
+                description=result.description,
+                diagram=json.dumps(result.diagram),
+                thumbnail_url=service.share_item(
+                    f'thumbnails/{result.author}/{result.title}'
+                    )
+                )
+
     def _build_success_response(self, requested_data: Union[ConceptFullView, ConceptSimpleView]):
         LOGGER.info("Found a matching concept")
         self._result = EndpointResponse(
@@ -223,47 +318,223 @@ class SpecificConceptRetrievalHandler(BaseEndpointHandler):
 
 
 class ConceptSearchResultHandler(BaseEndpointHandler):
-    """Handler for dealing with search queries for relevant queries"""
-
-    def _do_data_ops(self, request: ConceptSearchQuery) -> List[ConceptSimpleView]:
+    """Handler for dealing with search queries for relevant queries.
+    Pages are cached by normalized query until a concept is created, with
+    their thumbnails signed again each time they are served
+    Attributes:
+        NOW_BUCKET: seconds of the buckets recent not_after values are rounded up to
+    """
+    NOW_BUCKET = ServiceConfig.Search.NOW_BUCKET
+
+    @classmethod
+    def _normalize(cls, request: ConceptSearchQuery) -> ConceptSearchQuery:
+        """Rewrite a search into the canonical form of all searches sharing its results.
+        A not_after within the last bucket is rounded up to the end of its bucket,
+        so searches defaulting to now share a cache entry. Terms only matched
+        case-insensitively are lower cased
+        Arguments:
+            request: [ConceptSearchQuery] the search as requested
+        Returns:
+            [ConceptSearchQuery] the equivalent normalized search
+        """
+        update = {}
+        not_after = request.not_after if request.not_after.tzinfo is not None \
+            else request.not_after.replace(tzinfo=datetime.timezone.utc)
+        recent = datetime.datetime.now(datetime.timezone.utc) \
+            - datetime.timedelta(seconds=cls.NOW_BUCKET)
+        if cls.NOW_BUCKET > 0 and not_after >= recent:
+            update['not_after'] = datetime.datetime.fromtimestamp(
+                    math.ceil(not_after.timestamp() / cls.NOW_BUCKET) * cls.NOW_BUCKET,
+                    datetime.timezone.utc
+                    )
+        if request.fuzzy in (FuzzyOption.ALL, FuzzyOption.AUTHOR):
+            update['author'] = request.author.lower()
+        if request.fuzzy in (FuzzyOption.ALL, FuzzyOption.TITLE):
+            update['title'] = request.title.lower()
+        if request.text is not None:
+            update['text'] = ' '.join(request.text.lower().split())
+        return request.copy(update=update)
+
+    @staticmethod
+    def _resume_after(request: ConceptSearchQuery) -> Tuple[Optional[list], bool]:
+        """Decode the sort key a search resumes after
+        Arguments:
+            request: [ConceptSearchQuery] the search as requested
+        Returns:
+            [Tuple] the sort key from the search's cursor, if any,
+            and whether results are ordered by score
+        Raises:
+            InvalidCursorError: if the cursor was not produced for this kind of search
+        """
+        ranked = request.fuzzy != FuzzyOption.NONE or request.text is not None
+        kinds = (float, datetime.datetime, str) if ranked else (datetime.datetime, str)
+        return (decode_cursor(request.cursor, *kinds) if request.cursor else None), ranked
+
+    def _do_data_ops(self, request: ConceptSearchQuery) -> ConceptSearchPage:
         LOGGER.info(
                 "Searching for concepts matching the following criteria:\n%s",
                 request.json(indent=4)
                 )
+        after, ranked = self._resume_after(request)
+        request = self._normalize(request)
+        key = request.json()
         with self.get_service(RegisteredService.CONCEPTS_DS) as service:
-            service.add_query(service.query_concepts(
-                author=request.author,
-                title=request.title,
-                not_before=request.not_before,
-                not_after=request.not_after,
-                fuzzy=request.fuzzy
-                ))
-            service.exec_next()
-            return [
-                    ConceptSimpleView(
-                        identifier=result.identifier,
-                        thumbnail_url=service.share_item(
-                            f'thumbnails/{result.identifier}'
+            generation = service.SEARCH_RESULTS.generation
+            found = service.SEARCH_RESULTS.get(key)
+            if found is None:
+                found = self._search(service, request, after, ranked)
+                service.SEARCH_RESULTS.put(key, found, generation=generation)
+            else:
+                LOGGER.info("Serving cached search results")
+            hits, following = found
+            thumbnails = service.share_items([
+                f'thumbnails/{identifier}' for identifier, _ in hits
+                ])
+            return ConceptSearchPage(
+                    results=[
+                        ConceptSearchHit(
+                            identifier=identifier,
+                            thumbnail_url=thumbnail,
+                            snippet=snippet
                             )
+                        for (identifier, snippet), thumbnail in zip(hits, thumbnails)
+                        ],
+                    next=following
+                    )
 
-                        )
-                    for result in service.results.all()
-                    ]
+    @staticmethod
+    def _search(
+            service,
+            request: ConceptSearchQuery,
+            after: Optional[list],
+            ranked: bool
+            ) -> Tuple[Tuple[Tuple[str, Optional[str]], ...], Optional[str]]:
+        """Query a page of search results
+        Arguments:
+            service: the concepts data service to query with
+            request: [ConceptSearchQuery] the normalized search
+            after: [list] the sort key decoded from the search's cursor, if any
+            ranked: [bool] whether results are ordered by score
+        Returns:
+            [Tuple] the (identifier, snippet) of each result and the cursor of the next page
+        """
+        service.add_query(service.query_concepts(
+            author=request.author,
+            title=request.title,
+            not_before=request.not_before,
+            not_after=request.not_after,
+            fuzzy=request.fuzzy,
+            limit=request.limit + 1,
+            after=after,
+            similarity=request.similarity,
+            text=request.text
+            ))
+        service.exec_next()
+        rows = service.results.all()
+        page = rows[:request.limit]
+        last = page[-1] if page else None
+        return (
+                tuple(
+                    (row.identifier, row.snippet if request.text is not None else None)
+                    for row in page
+                    ),
+                encode_cursor(
+                    *((last.score,) if ranked else ()),
+                    last.updated_at,
+                    last.identifier
+                    ) if len(rows) > request.limit else None
+                )
 
-    def _build_success_response(self, requested_data: List[ConceptSimpleView]):
+    def _build_success_response(self, requested_data: ConceptSearchPage):
         self._result = EndpointResponse(
                 code=status.HTTP_200_OK,
                 body=requested_data
                 )
 
-    def _build_error_response(self, exc: BaseIdeaBankAPIException):  # pylint:disable=useless-parent-delegation
-        super()._build_error_response(exc)
+    def _build_error_response(self, exc: BaseIdeaBankAPIException):
+        if isinstance(exc, InvalidCursorError):
+            self._result = EndpointResponse(
+                    code=status.HTTP_400_BAD_REQUEST,
+                    body=EndpointErrorMessage(err_msg=str(exc))
+                    )
+        else:
+            super()._build_error_response(exc)
 
 
-class ConceptLineageHandler(BaseEndpointHandler):
-    """Endpoint handler for dealing with concept lineage retrieval"""
+class ConceptSearchStreamHandler(ConceptSearchResultHandler):
+    """Handler writing every concept matching a search as newline delimited json.
+    Rows are read through a server-side cursor and signed a batch at a time,
+    so memory use does not grow with the number of results. The page limit does not apply
+    Attributes:
+        BATCH_SIZE: the number of rows read and signed at a time
+    """
+    BATCH_SIZE = ServiceConfig.Search.STREAM_BATCH_SIZE
 
-    def _do_data_ops(self, request: ConceptRequest) -> ConceptLineage:
+    def _do_data_ops(self, request: ConceptSearchQuery) -> ConceptSearchStream:
+        LOGGER.info(
+                "Streaming concepts matching the following criteria:\n%s",
+                request.json(indent=4)
+                )
+        after, _ = self._resume_after(request)
+        return ConceptSearchStream(lines=self._stream(request, after))
+
+    def _stream(self, request: ConceptSearchQuery, after: Optional[list]) -> Iterator[str]:
+        """Produce a json document per matching concept. The concepts data service is
+        taken from the provider pool once the first document is requested and released
+        once done, so a stream that is never read holds no provider
+        Arguments:
+            request: [ConceptSearchQuery] the search as requested
+            after: [list] the sort key decoded from the search's cursor, if any
+        Returns:
+            [Iterator[str]] newline terminated json documents of each search hit
+        """
+        service = PROVIDER_POOL.acquire(RegisteredService.CONCEPTS_DS)
+        try:
+            with service:
+                service.add_query(service.query_concepts(
+                    author=request.author,
+                    title=request.title,
+                    not_before=request.not_before,
+                    not_after=request.not_after,
+                    fuzzy=request.fuzzy,
+                    after=after,
+                    similarity=request.similarity,
+                    text=request.text
+                    ))
+                service.exec_streamed(self.BATCH_SIZE)
+                for rows in service.results.partitions():
+                    thumbnails = service.share_items([
+                        f'thumbnails/{row.identifier}' for row in rows
+                        ])
+                    for row, thumbnail in zip(rows, thumbnails):
+                        yield ConceptSearchHit(
+                                identifier=row.identifier,
+                                thumbnail_url=thumbnail,
+                                snippet=row.snippet if request.text is not None else None
+                                ).json() + '\n'
+            LOGGER.info("Finished streaming search results")
+        finally:
+            PROVIDER_POOL.release(RegisteredService.CONCEPTS_DS, service)
+
+    def _build_success_response(self, requested_data: ConceptSearchStream):
+        self._result = EndpointResponse(
+                code=status.HTTP_200_OK,
+                body=requested_data
+                )
+
+
+class ConceptLineageHandler(BaseEndpointHandler):
+    """Endpoint handler for dealing with concept lineage retrieval.
+    Lineages are walked on the in-memory concept graph when it knows the concept,
+    and read from the database otherwise"""
+    MAX_DEPTH = ServiceConfig.Lineage.MAX_DEPTH
+    MAX_NODES = ServiceConfig.Lineage.MAX_NODES
+    USE_GRAPH = ServiceConfig.Lineage.GRAPH_ENABLED
+
+    def _do_data_ops(
+            self,
+            request: ConceptLineageRequest
+            ) -> Union[ConceptLineage, ConceptLineageGraph]:
         LOGGER.info(
                 "Building lineage for `%s/%s`",
                 request.author,
@@ -272,64 +543,35 @@ class ConceptLineageHandler(BaseEndpointHandler):
         focus = f'{request.author}/{request.title}'
         try:
             with self.get_service(RegisteredService.CONCEPTS_DS) as service:
-                service.add_query(service.find_exact_concept(
-                    author=request.author,
-                    title=request.title
-                    ))
-                service.exec_next()
-                service.results.one()  # Ensure it exists
-                lineage = Tree()
-                lineage.create_node(
-                    tag=focus,
-                    identifier=focus,
-                    data=ConceptSimpleView(
-                        identifier=focus,
-                        thumbnail_url=service.share_item(
-                            f'thumbnails/{focus}'
+                key = (focus, self.MAX_DEPTH, self.MAX_NODES)
+                generation = service.LINEAGES.generation
+                cached = service.LINEAGES.get(key)
+                if cached is None:
+                    cached = self._find_links(service, request, focus)
+                    service.LINEAGES.put(
+                            key,
+                            cached,
+                            generation=generation,
+                            tags=cached[0]
                             )
+                members, links, truncated = cached
+                thumbnails = service.share_items([f'thumbnails/{member}' for member in members])
+            views = {
+                    member: ConceptSimpleView(identifier=member, thumbnail_url=thumbnail)
+                    for member, thumbnail in zip(members, thumbnails)
+                    }
+            if request.format == LineageFormat.GRAPH:
+                return ConceptLineageGraph(
+                        focus=focus,
+                        nodes=list(views.values()),
+                        edges=[
+                            ConceptLinkRecord(ancestor=ancestor, descendant=descendant)
+                            for ancestor, descendant in links
+                            ],
+                        truncated=truncated
                         )
-                    )
-                service.add_query(service.find_parent_ideas(
-                    identifier=focus,
-                    depth=10
-                    ))
-                service.exec_next()
-                for parent in service.results.all():
-                    new_lineage = Tree()
-                    new_lineage.create_node(
-                            tag=parent.ancestor,
-                            identifier=parent.ancestor,
-                            data=ConceptSimpleView(
-                                identifier=parent.ancestor,
-                                thumbnail_url=service.share_item(
-                                    f'thumbnails/{parent.ancestor}'
-                                    )
-                                )
-                            )
-                    new_lineage.paste(parent.ancestor, lineage)
-                    lineage = new_lineage
-
-                service.add_query(service.find_child_ideas(
-                    identifier=focus,
-                    depth=10
-                    ))
-                service.exec_next()
-                for child in service.results.all():
-                    lineage.create_node(
-                            tag=child.descendant,
-                            identifier=child.descendant,
-                            parent=child.ancestor,
-                            data=ConceptSimpleView(
-                                identifier=child.descendant,
-                                thumbnail_url=service.share_item(
-                                    f'thumbnails/{child.descendant}'
-                                    )
-                                )
-                            )
-            return ConceptLineage(
-                    nodes=lineage.size(),
-                    lineage=lineage.to_dict(with_data=True)
-                    )
+            nodes, lineage = build_lineage(focus, links, views)
+            return ConceptLineage(nodes=nodes, lineage=lineage, truncated=truncated)
         except NoResultFound as err:
             LOGGER.error(
                     "No concept record found for `%s/%s`. Unable to build lineage",
@@ -340,7 +582,99 @@ class ConceptLineageHandler(BaseEndpointHandler):
                     f"Could not build the lineage for {request.author}/{request.title}"
                     ) from err
 
-    def _build_success_response(self, requested_data: ConceptLineage):
+    def _find_links(
+            self,
+            service,
+            request: ConceptLineageRequest,
+            focus: str
+            ) -> Tuple[Tuple[str, ...], Tuple[Tuple[str, str], ...], bool]:
+        """Find the concepts and links making up the lineage of the focus, capped per direction
+        Arguments:
+            service: [ConceptsDataService] the provider to find them with
+            request: [ConceptLineageRequest] the concept the lineage was requested for
+            focus: [str] identifier of that concept
+        Returns:
+            [Tuple] the distinct concepts, starting with the focus, the distinct links,
+            and whether the lineage was truncated
+        Raises:
+            NoResultFound: if the concept does not exist
+        """
+        parents, children = self._walk_graph(service, focus) \
+            if self.USE_GRAPH else (None, None)
+        if parents is None:
+            parents, children = self._walk_database(service, request, focus)
+        truncated = len(parents) > self.MAX_NODES or len(children) > self.MAX_NODES
+        if truncated:
+            LOGGER.warning(
+                    "Lineage of `%s` exceeds %d links, truncating",
+                    focus,
+                    self.MAX_NODES
+                    )
+            parents, children = parents[:self.MAX_NODES], children[:self.MAX_NODES]
+        members = tuple(dict.fromkeys(
+            [focus]
+            + [ancestor for ancestor, _ in parents]
+            + [descendant for _, descendant in children]
+            ))
+        return members, tuple(dict.fromkeys(parents + children)), truncated
+
+    def _walk_graph(
+            self,
+            service,
+            focus: str
+            ) -> Tuple[Optional[List[Tuple[str, str]]], Optional[List[Tuple[str, str]]]]:
+        """Walk the lineage of the focus on the in-memory concept graph, loading it if due
+        and catching it up on the links created since otherwise
+        Arguments:
+            service: [ConceptsDataService] the provider holding the graph
+            focus: [str] identifier of the concept the lineage was requested for
+        Returns:
+            [Tuple] the parent and child links, None for both if the graph cannot answer
+        """
+        service.refresh_lineage_graph()
+        graph = service.LINEAGE_GRAPH
+        parents = graph.walk(focus, self.MAX_DEPTH, self.MAX_NODES + 1, upward=True)
+        if parents is None:
+            return None, None
+        LOGGER.debug("Walking lineage of `%s` in memory", focus)
+        return parents, graph.walk(focus, self.MAX_DEPTH, self.MAX_NODES + 1) or []
+
+    def _walk_database(
+            self,
+            service,
+            request: ConceptLineageRequest,
+            focus: str
+            ) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+        """Read the lineage of the focus from the lineage closure
+        Arguments:
+            service: [ConceptsDataService] the provider to query with
+            request: [ConceptRequest] the concept the lineage was requested for
+            focus: [str] identifier of that concept
+        Returns:
+            [Tuple] the parent and child links
+        Raises:
+            NoResultFound: if the concept does not exist
+        """
+        service.add_query(service.find_exact_concept(
+            author=request.author,
+            title=request.title
+            ))
+        service.add_query(service.find_parent_ideas(
+            identifier=focus,
+            depth=self.MAX_DEPTH,
+            max_nodes=self.MAX_NODES + 1
+            ))
+        service.add_query(service.find_child_ideas(
+            identifier=focus,
+            depth=self.MAX_DEPTH,
+            max_nodes=self.MAX_NODES + 1
+            ))
+        exact, parents, children = service.exec_all()
+        exact.one()  # Ensure it exists
+        return [(link.ancestor, link.descendant) for link in parents.all()], \
+            [(link.ancestor, link.descendant) for link in children.all()]
+
+    def _build_success_response(self, requested_data: Union[ConceptLineage, ConceptLineageGraph]):
         LOGGER.info("Lineage successfully obtained")
         self._result = EndpointResponse(
                 code=status.HTTP_200_OK,
@@ -363,6 +697,10 @@ class ConceptLineageHandler(BaseEndpointHandler):
 class CheckFollowingStatusHandler(BaseEndpointHandler):
     """Endpoint handler dealing with checking if a user follows another"""
 
+    def _acting_account(self, request: AccountFollowingRecord) -> str:
+        """Following is checked as the follower who may have just followed"""
+        return request.follower
+
     def _do_data_ops(self, request: AccountFollowingRecord) -> EndpointInformationalMessage:
         LOGGER.info(
                 "Checking if %s follows %s",
@@ -386,6 +724,32 @@ class CheckFollowingStatusHandler(BaseEndpointHandler):
                     f"{request.follower} is not following {request.followee}"
                     ) from err
 
+    async def _do_data_ops_async(
+            self,
+            request: AccountFollowingRecord
+            ) -> EndpointInformationalMessage:
+        LOGGER.info(
+                "Checking if %s follows %s",
+                request.follower,
+                request.followee
+                )
+        try:
+            async with self.get_service(RegisteredService.ENGAGE_DS) as service:
+                service.add_query(service.check_following(
+                    follower=request.follower,
+                    followee=request.followee
+                    ))
+                await service.exec_next_async()
+                service.results.one()
+                return EndpointInformationalMessage(
+                        msg=f"{request.follower} is following {request.followee}"
+                        )
+        except NoResultFound as err:
+            LOGGER.error("Could not find a matching follow record")
+            raise RequestedDataNotFound(
+                    f"{request.follower} is not following {request.followee}"
+                    ) from err
+
     def _build_success_response(self, requested_data: EndpointInformationalMessage):
         self._result = EndpointResponse(
                 code=status.HTTP_200_OK,
@@ -407,6 +771,10 @@ class CheckFollowingStatusHandler(BaseEndpointHandler):
 class CheckLikingStatusHandler(BaseEndpointHandler):
     """Endpoint handler dealing with checking if a user likes a concept"""
 
+    def _acting_account(self, request: ConceptLikingRecord) -> str:
+        """Liking is checked as the account that may have just liked"""
+        return request.user_liking
+
     def _do_data_ops(self, request: ConceptLikingRecord) -> EndpointInformationalMessage:
         LOGGER.info(
                 "Checking if %s likes %s",
@@ -430,6 +798,32 @@ class CheckLikingStatusHandler(BaseEndpointHandler):
                     f"{request.user_liking} does not like {request.concept_liked}"
                     ) from err
 
+    async def _do_data_ops_async(
+            self,
+            request: ConceptLikingRecord
+            ) -> EndpointInformationalMessage:
+        LOGGER.info(
+                "Checking if %s likes %s",
+                request.user_liking,
+                request.concept_liked
+                )
+        try:
+            async with self.get_service(RegisteredService.ENGAGE_DS) as service:
+                service.add_query(service.check_liking(
+                    account=request.user_liking,
+                    concept=request.concept_liked
+                    ))
+                await service.exec_next_async()
+                service.results.one()
+                return EndpointInformationalMessage(
+                        msg=f"{request.user_liking} does like {request.concept_liked}"
+                        )
+        except NoResultFound as err:
+            LOGGER.error("Could not find a matching liking record")
+            raise RequestedDataNotFound(
+                    f"{request.user_liking} does not like {request.concept_liked}"
+                    ) from err
+
     def _build_success_response(self, requested_data: EndpointInformationalMessage):
         self._result = EndpointResponse(
                 code=status.HTTP_200_OK,
@@ -449,19 +843,56 @@ class CheckLikingStatusHandler(BaseEndpointHandler):
 
 
 class ConceptCommentsSectionHandler(BaseEndpointHandler):
-    """Endpoint handler for retrieving the comments section of a concept"""
-
-    def _do_data_ops(self, request: ConceptRequest) -> ConceptCommentThreads:
-        comment_tree = ConceptCommentThreads(threads=[])
-        comment_tree.threads.extend(self.__thread_starts(
-            concept_id=f'{request.author}/{request.title}'
-            ))
-        for thread in comment_tree.threads:
-            self.__gather_responses(
-                    concept_id=f'{request.author}/{request.title}',
-                    current_thread=thread
+    """Endpoint handler for retrieving a page of the comment threads on a concept.
+    Each thread comes with a preview of its responses, a bounded number of levels deep
+    and of responses wide, and a cursor to expand the responses left out of each comment.
+    Comments carry their author's preferred name and avatar, each avatar signed once per page
+    Attributes:
+        PREVIEW_REPLIES: the number of responses previewed under each comment
+    """
+    PREVIEW_REPLIES = ServiceConfig.Comments.PREVIEW_REPLIES
+
+    @staticmethod
+    def _resume_after(
+            request: ConceptCommentsRequest
+            ) -> Optional[Tuple[datetime.datetime, uuid.UUID]]:
+        """Decode the sort key a page of threads resumes after
+        Arguments:
+            request: [ConceptCommentsRequest] the page as requested
+        Returns:
+            [Tuple] the (created_at, comment_id) from the request's cursor, if any
+        Raises:
+            InvalidCursorError: if the cursor was not produced for comment threads
+        """
+        if request.cursor is None:
+            return None
+        created_at, comment_id = decode_cursor(request.cursor, datetime.datetime, str)
+        try:
+            return created_at, uuid.UUID(comment_id)
+        except ValueError as err:
+            LOGGER.error("Could not decode comment cursor %s", request.cursor)
+            raise InvalidCursorError("The given cursor is not valid.") from err
+
+    def _do_data_ops(self, request: ConceptCommentsRequest) -> ConceptCommentThreads:
+        after = self._resume_after(request)
+        depth = request.depth if self.PREVIEW_REPLIES > 0 else 0
+        with self.get_service(RegisteredService.ENGAGE_DS) as service:
+            section = service.comment_section(f'{request.author}/{request.title}')
+            rows = section.page(request.response_to, after, request.limit + 1)
+            page = rows[:request.limit]
+            previews = section.previews(page, depth, self.PREVIEW_REPLIES + 1)
+            threads = assemble_page(
+                    page,
+                    previews,
+                    request.response_to,
+                    self.PREVIEW_REPLIES,
+                    lambda authors: service.share_items([f'avatars/{name}' for name in authors])
                     )
-        return comment_tree
+        last = page[-1] if len(rows) > request.limit else None
+        return ConceptCommentThreads(
+                threads=threads,
+                next=encode_cursor(last.created_at, str(last.comment_id)) if last else None
+                )
 
     def _build_success_response(self, requested_data: ConceptCommentThreads):
         self._result = EndpointResponse(
@@ -469,38 +900,79 @@ class ConceptCommentsSectionHandler(BaseEndpointHandler):
                 body=requested_data
                 )
 
+    def _build_error_response(self, exc: BaseIdeaBankAPIException):
+        if isinstance(exc, InvalidCursorError):
+            self._result = EndpointResponse(
+                    code=status.HTTP_400_BAD_REQUEST,
+                    body=EndpointErrorMessage(err_msg=str(exc))
+                    )
+        else:
+            super()._build_error_response(exc)
+
+
+class ConnectionPoolStatisticsHandler(BaseEndpointHandler):
+    """Endpoint handler reporting the state of the database connection pools"""
+
+    def _do_data_ops(self, request: None) -> List[ConnectionPoolStatistics]:
+        LOGGER.info("Gathering connection pool statistics")
+        service = self.get_service(RegisteredService.RAW_DB)
+        return [
+                ConnectionPoolStatistics(**stats)
+                for stats in service.pool_statistics()
+                ]
+
+    async def _do_data_ops_async(self, request: None) -> List[ConnectionPoolStatistics]:
+        return self._do_data_ops(request)
+
+    def _build_success_response(self, requested_data: List[ConnectionPoolStatistics]):
+        self._result = EndpointResponse(
+                code=status.HTTP_200_OK,
+                body=requested_data
+                )
+
     def _build_error_response(self, exc: BaseIdeaBankAPIException):  # pylint:disable=useless-parent-delegation
         super()._build_error_response(exc)
 
-    def __thread_starts(self, concept_id: str):
-        with self.get_service(RegisteredService.ENGAGE_DS) as service:
-            service.add_query(service.comments_on(concept_id))
-            service.exec_next()
-            return [
-                    ConceptComment(
-                        comment_id=c.comment_id,
-                        comment_author=c.comment_by,
-                        comment_text=c.free_text
-                        )
-                    for c in service.results.all()
-                    ]
 
-    def __gather_responses(self, concept_id: str, current_thread: ConceptComment):
-        with self.get_service(RegisteredService.ENGAGE_DS) as service:
-            service.add_query(service.comments_on(
-                concept_id=concept_id,
-                response_to=current_thread.comment_id
-                ))
-            service.exec_next()
-            current_thread.responses.extend(
-                    [
-                        ConceptComment(
-                            comment_id=c.comment_id,
-                            comment_author=c.comment_by,
-                            comment_text=c.free_text
-                            )
-                        for c in service.results.all()
-                        ]
-                    )
-        for subthread in current_thread.responses:
-            self.__gather_responses(concept_id, subthread)
+class LineageGraphLoadingHandler(BaseEndpointHandler):
+    """Handler loading the in-memory concept graph ahead of the first lineage request"""
+
+    def _do_data_ops(self, request: None) -> EndpointInformationalMessage:
+        if not ConceptLineageHandler.USE_GRAPH:
+            return EndpointInformationalMessage(msg="Lineage graph disabled")
+        with self.get_service(RegisteredService.CONCEPTS_DS) as service:
+            service.refresh_lineage_graph()
+            graph = service.LINEAGE_GRAPH
+        if not graph.loaded:
+            return EndpointInformationalMessage(msg="Lineage graph not loaded")
+        return EndpointInformationalMessage(msg=f"Lineage graph holds {len(graph)} links")
+
+    def _build_success_response(self, requested_data: EndpointInformationalMessage):
+        LOGGER.info(requested_data.msg)
+        self._result = EndpointResponse(
+                code=status.HTTP_200_OK,
+                body=requested_data
+                )
+
+    def _build_error_response(self, exc: BaseIdeaBankAPIException):  # pylint:disable=useless-parent-delegation
+        super()._build_error_response(exc)
+
+
+class CacheStatisticsHandler(BaseEndpointHandler):
+    """Endpoint handler reporting the usage of the in-process caches"""
+
+    def _do_data_ops(self, request: None) -> List[CacheStatistics]:
+        LOGGER.info("Gathering cache statistics")
+        return [CacheStatistics(**stats) for stats in CACHES.statistics()]
+
+    async def _do_data_ops_async(self, request: None) -> List[CacheStatistics]:
+        return self._do_data_ops(request)
+
+    def _build_success_response(self, requested_data: List[CacheStatistics]):
+        self._result = EndpointResponse(
+                code=status.HTTP_200_OK,
+                body=requested_data
+                )
+
+    def _build_error_response(self, exc: BaseIdeaBankAPIException):  # pylint:disable=useless-parent-delegation
+        super()._build_error_response(exc)
@@ -0,0 +1,115 @@
+"""
+    :module name: threads
+    :module summary: linear assembly of comment threads from flat comment records
+    :module author: Nathan Mendoza (nathancm@uci.edu)
+"""
+
+import datetime
+import logging
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from .pagination import encode_cursor
+from ..models import ConceptComment
+
+LOGGER = logging.getLogger(__name__)
+
+FIRST_REPLY = encode_cursor(datetime.datetime.min, str(uuid.UUID(int=0)))
+
+
+def build_threads(
+        records: Iterable,
+        root: Optional[Any] = None,
+        more_replies: Optional[Mapping[Any, str]] = None,
+        avatars: Optional[Mapping[str, str]] = None
+        ) -> List[ConceptComment]:
+    """Nest comments under the comments they respond to, keeping the order of the records.
+    Comments responding to a comment that is not among the records are left out,
+    as they cannot be reached from any thread
+    Arguments:
+        records: [Iterable] rows with comment_id, parent, comment_by, free_text and
+            preferred_name, in the order comments should appear within each thread
+        root: the comment the threads respond to, None for top-level threads
+        more_replies: [Mapping] the cursor to the responses left out of each comment, if any
+        avatars: [Mapping] the link to the avatar of each author, if any
+    Returns:
+        [List[ConceptComment]] the comments starting a thread, each holding its responses
+    """
+    more_replies = more_replies or {}
+    avatars = avatars or {}
+    comments = {}
+    parents = []
+    for record in records:
+        comments[record.comment_id] = ConceptComment(
+                comment_id=record.comment_id,
+                comment_author=record.comment_by,
+                comment_text=record.free_text,
+                preferred_name=record.preferred_name,
+                avatar_url=avatars.get(record.comment_by),
+                more_replies=more_replies.get(record.comment_id)
+                )
+        parents.append((record.comment_id, record.parent))
+    threads = []
+    for comment_id, parent in parents:
+        if parent == root:
+            threads.append(comments[comment_id])
+        elif parent in comments:
+            comments[parent].responses.append(comments[comment_id])
+    LOGGER.debug("Assembled %d comments into %d threads", len(comments), len(threads))
+    return threads
+
+
+def assemble_page(
+        page: Sequence,
+        previews: Sequence,
+        root: Optional[Any],
+        width: int,
+        share_avatars: Optional[Callable[[List[str]], List[str]]] = None
+        ) -> List[ConceptComment]:
+    """Nest a page of comments and the responses previewed under them, keeping the oldest
+    width responses to each comment. Comments with responses left out, whether past the
+    width or past the depth previewed, are given a cursor to expand them. The avatars of
+    the authors kept are shared in one call, once per distinct author
+    Arguments:
+        page: [Sequence] rows of the comments on the page, oldest first
+        previews: [Sequence] rows of the responses under the page, in display order,
+            with up to width + 1 responses to each comment
+        root: the comment the page responds to, None for top-level threads
+        width: [int] the number of responses to keep under each comment
+        share_avatars: [Callable] links to the avatars of the given authors, in order,
+            None to leave avatars out
+    Returns:
+        [List[ConceptComment]] the comments of the page, each holding its responses
+    """
+    more_replies = {}
+    records = list(page) + _trim(previews, width, more_replies)
+    answered = {record.parent for record in records}
+    for record in records:
+        if record.has_replies and record.comment_id not in answered:
+            more_replies.setdefault(record.comment_id, FIRST_REPLY)
+    avatars = {}
+    if share_avatars is not None and records:
+        authors = list(dict.fromkeys(record.comment_by for record in records))
+        avatars = dict(zip(authors, share_avatars(authors)))
+    return build_threads(records, root, more_replies, avatars)
+
+
+def _trim(rows: Sequence, width: int, more_replies: Dict[Any, str]) -> list:
+    """Keep the oldest responses to each comment, noting where to resume the rest
+    Arguments:
+        rows: [Sequence] responses read under a page of comments, in display order
+        width: [int] the number of responses to keep under each comment
+        more_replies: [Dict] the cursor to the responses left out of each comment
+    Returns:
+        [list] the responses kept, in display order
+    """
+    responses = {}
+    for row in rows:
+        responses.setdefault(row.parent, []).append(row)
+    kept = set()
+    for parent, replies in responses.items():
+        kept.update(reply.comment_id for reply in replies[:width])
+        if len(replies) > width:
+            last = replies[width - 1]
+            more_replies[parent] = encode_cursor(last.created_at, str(last.comment_id))
+    return [row for row in rows if row.comment_id in kept]
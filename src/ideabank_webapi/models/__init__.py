@@ -9,6 +9,7 @@ from .schema import (
         Accounts,
         Concept,
         ConceptLink,
+        ConceptClosure,
         Follows,
         Likes
         )
@@ -26,11 +27,19 @@ from .artifacts import (
         ConceptFullView,
         ConceptLinkRecord,
         ConceptSearchQuery,
+        FuzzyOption,
+        ConceptSearchHit,
+        ConceptSearchPage,
+        ConceptSearchStream,
+        LineageFormat,
         ConceptLineage,
+        ConceptLineageGraph,
         AccountFollowingRecord,
         ConceptLikingRecord,
         ConceptComment,
-        ConceptCommentThreads
+        ConceptCommentThreads,
+        ConnectionPoolStatistics,
+        CacheStatistics
         )
 
 from .payloads import (
@@ -40,6 +49,8 @@ from .payloads import (
         CreateConcept,
         EstablishLink,
         ConceptRequest,
+        ConceptLineageRequest,
+        ConceptCommentsRequest,
         FollowRequest,
         UnfollowRequest,
         LikeRequest,
@@ -7,12 +7,12 @@
 from __future__ import annotations
 import logging
 import datetime
-from typing import Sequence, Union, List, Optional
+from typing import Sequence, Union, List, Optional, Iterable
 from enum import Enum
 
 from pydantic import (  # pylint:disable=no-name-in-module
         BaseModel, Extra, validator,
-        constr, conint, AnyHttpUrl, UUID4, Json
+        constr, conint, confloat, AnyHttpUrl, UUID4, Json
         )
 from fastapi import status
 
@@ -150,18 +150,75 @@ class ConceptSearchQuery(IdeaBankArtifact):
         not_before: [datetime] the timestamp marking the start of the range to search in
         not_after: [datetime] the timestamp marking the end of the range to search in
         fuzzy: [FuzzyOption] level of fuzziness to use during search
+        limit: [int] the maximum number of results per page
+        cursor: [str] the next cursor of the previous page, if any
+        similarity: [float] the minimum similarity of fuzzy matches, if any
+        text: [str] full text query on concept descriptions, if any
     """
     author: str
     title: str
     not_before: datetime.datetime
     not_after: datetime.datetime
     fuzzy: FuzzyOption = FuzzyOption.NONE
+    limit: conint(ge=1, le=100) = 25
+    cursor: Optional[str] = None
+    similarity: Optional[confloat(ge=0, le=1)] = None
+    text: Optional[constr(strip_whitespace=True, min_length=1, max_length=256)] = None
+
+
+class ConceptSearchHit(ConceptSimpleView):
+    """Represents a concept found by a search
+    Attributes:
+        snippet: highlighted excerpt of the description matching a full text query, if any
+    """
+    snippet: Optional[str] = None
+
+
+class ConceptSearchPage(IdeaBankArtifact):
+    """Model representing one page of concept search results
+    Attributes:
+        results: the concepts on this page
+        next: cursor to obtain the following page, None if this is the last page
+    """
+    results: List[ConceptSearchHit]
+    next: Optional[str] = None
+
+
+class ConceptSearchStream(IdeaBankArtifact):
+    """Model representing search results written out as they are read
+    Attributes:
+        lines: lazily produced newline delimited json documents, one per concept
+        media_type: the content type of the lines
+    """
+    lines: Iterable[str]
+    media_type: str = 'application/x-ndjson'
+
+
+class LineageFormat(str, Enum):
+    """Enumeration of the shapes a concept lineage can be reported in"""
+    TREE = 'tree'
+    GRAPH = 'graph'
 
 
 class ConceptLineage(IdeaBankArtifact):
     """Model representing a report of an idea's lineage"""
     nodes: conint(ge=0)
     lineage: dict
+    truncated: bool = False
+
+
+class ConceptLineageGraph(IdeaBankArtifact):
+    """Model representing a report of an idea's lineage as a flat graph
+    Attributes:
+        focus: the {author}/{title} formatted string identifying the concept reported on
+        nodes: every concept in the lineage, once each
+        edges: every link between the concepts in the lineage, once each
+        truncated: whether the lineage was cut short by the link cap
+    """
+    focus: constr(regex=r"^[\w]{3,64}/[\w\-]{1,128}$")
+    nodes: List[ConceptSimpleView]
+    edges: List[ConceptLinkRecord]
+    truncated: bool = False
 
 
 class AccountFollowingRecord(IdeaBankArtifact):
@@ -177,13 +234,74 @@ class ConceptLikingRecord(IdeaBankArtifact):
 
 
 class ConceptComment(IdeaBankArtifact):
-    """Models a single comment instance left by a user"""
+    """Models a single comment instance left by a user
+    Attributes:
+        comment_id: identifier of the comment
+        comment_author: display name of the user leaving the comment
+        comment_text: contents of the comment
+        preferred_name: name the user leaving the comment displays, if known
+        avatar_url: link to view the avatar of the user leaving the comment, if known
+        responses: the responses to this comment included so far
+        more_replies: cursor to expand the responses not included, None if all are
+    """
     comment_id: Optional[UUID4]
     comment_author: constr(min_length=3, max_length=64, regex=r"^[\w]{3,64}$")
     comment_text: constr(min_length=1)
+    preferred_name: Optional[str] = None
+    avatar_url: Optional[AnyHttpUrl] = None
     responses: List[ConceptComment] = []
+    more_replies: Optional[str] = None
 
 
 class ConceptCommentThreads(IdeaBankArtifact):
-    """Models the comment threads left on a concept"""
+    """Models a page of the comment threads left on a concept
+    Attributes:
+        threads: the threads on this page
+        next: cursor to obtain the following page, None if this is the last page
+    """
     threads: List[ConceptComment]
+    next: Optional[str] = None
+
+
+class ConnectionPoolStatistics(IdeaBankArtifact):
+    """Models a snapshot of a database connection pool
+    Attributes:
+        name: label of the engine owning the pool
+        pool_size: number of connections the pool keeps open
+        checked_out: connections currently in use
+        checked_in: idle connections available in the pool
+        overflow: connections opened beyond the pool size
+        checkouts: number of checkouts recorded by the service
+        timeouts: number of checkouts that timed out waiting for a connection
+        avg_wait_ms: average time spent waiting on a checkout
+        max_wait_ms: longest time spent waiting on a checkout
+    """
+    name: str
+    pool_size: conint(ge=0)
+    checked_out: conint(ge=0)
+    checked_in: conint(ge=0)
+    overflow: int
+    checkouts: conint(ge=0)
+    timeouts: conint(ge=0)
+    avg_wait_ms: confloat(ge=0)
+    max_wait_ms: confloat(ge=0)
+
+
+class CacheStatistics(IdeaBankArtifact):
+    """Models a snapshot of an in-process cache
+    Attributes:
+        name: label of the cache
+        capacity: maximum number of entries the cache keeps
+        size: number of entries currently cached
+        hits: number of lookups answered by the cache
+        misses: number of lookups the cache could not answer
+        evictions: number of entries dropped to make room
+        hit_ratio: fraction of lookups answered by the cache
+    """
+    name: str
+    capacity: conint(ge=0)
+    size: conint(ge=0)
+    hits: conint(ge=0)
+    misses: conint(ge=0)
+    evictions: conint(ge=0)
+    hit_ratio: confloat(ge=0, le=1)
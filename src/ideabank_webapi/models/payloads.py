@@ -7,14 +7,15 @@
 import logging
 from typing import Union, List, Dict, Optional
 
-from pydantic import BaseModel, Extra, UUID4, constr  # pylint:disable=no-name-in-module
+from pydantic import BaseModel, Extra, UUID4, constr, conint  # pylint:disable=no-name-in-module
 
 from .artifacts import (
         AuthorizationToken,
         ConceptLinkRecord,
         AccountFollowingRecord,
         ConceptLikingRecord,
-        ConceptComment
+        ConceptComment,
+        LineageFormat
         )
 
 # pylint:disable=too-few-public-methods
@@ -60,6 +61,25 @@ class ConceptRequest(EndpointPayload):
     simple: bool
 
 
+class ConceptLineageRequest(ConceptRequest):
+    """Models a request for the lineage of a particular concept and the shape to report it in"""
+    format: LineageFormat = LineageFormat.TREE
+
+
+class ConceptCommentsRequest(ConceptRequest):
+    """Models a request for a page of the comment threads on a particular concept
+    Attributes:
+        response_to: the comment whose responses are requested, None for the top-level threads
+        limit: the maximum number of threads per page
+        cursor: the next cursor of the previous page, or the more_replies cursor of a comment
+        depth: the number of levels of responses to preview under each thread
+    """
+    response_to: Optional[UUID4] = None
+    limit: conint(ge=1, le=100) = 20
+    cursor: Optional[str] = None
+    depth: conint(ge=0, le=10) = 2
+
+
 class FollowRequest(AuthorizedPayload, AccountFollowingRecord):
     """Models a request for one user to start following another"""
 
@@ -12,11 +12,14 @@ from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy import (
         Column, String, DateTime,
         JSON, ForeignKey, Computed,
-        Uuid
+        Uuid, Index, Integer,
+        BigInteger, Identity
         )
+from sqlalchemy.dialects.postgresql import TSVECTOR
 
 # pylint:disable=too-few-public-methods
 LOGGER = logging.getLogger(__name__)
+TEXT_SEARCH_CONFIG = 'english'
 
 
 class IdeaBankSchema(DeclarativeBase):
@@ -77,6 +80,8 @@ class Concept(IdeaBankSchema):
         created_at: the timestamp of the create time of this concept
         updated_at: the timestamp of the last updated time of this concept
         identifier: [derived] a unique string identifying a given concept
+        search_vector: [derived] the weighted full text search document of the
+            title and description of this concept
     """
     __tablename__ = 'concepts'
     title = Column(String(128), primary_key=True)
@@ -102,6 +107,34 @@ class Concept(IdeaBankSchema):
             Computed("author || '/' || title", persisted=True),
             unique=True
             )
+    search_vector = Column(
+            TSVECTOR,
+            Computed(
+                f"setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', title), 'A') || "
+                f"setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(description, '')), 'B')",
+                persisted=True
+                )
+            )
+    __table_args__ = (
+            Index('concepts_recently_updated', 'updated_at', 'identifier'),
+            Index(
+                'concepts_title_trgm',
+                'title',
+                postgresql_using='gin',
+                postgresql_ops={'title': 'gin_trgm_ops'}
+                ),
+            Index(
+                'concepts_author_trgm',
+                'author',
+                postgresql_using='gin',
+                postgresql_ops={'author': 'gin_trgm_ops'}
+                ),
+            Index(
+                'concepts_search_vector',
+                'search_vector',
+                postgresql_using='gin'
+                ).ddl_if(dialect='postgresql'),
+            )
 
 
 class ConceptLink(IdeaBankSchema):
@@ -109,6 +142,7 @@ class ConceptLink(IdeaBankSchema):
     Attributes:
         ancestor: the unique identifying string of the ancestor concept
         descendant: the unique identifying string of the descendant concept
+        link_id: number assigned to links in the order they are created
     """
     __tablename__ = 'concept_links'
     ancestor = Column(
@@ -127,6 +161,46 @@ class ConceptLink(IdeaBankSchema):
                 ),
             primary_key=True
             )
+    link_id = Column(
+            BigInteger,
+            Identity(),
+            nullable=False
+            )
+    __table_args__ = (
+            Index('concept_links_descendant', 'descendant'),
+            Index('concept_links_link_id', 'link_id', unique=True).ddl_if(dialect='postgresql'),
+            )
+
+
+class ConceptClosure(IdeaBankSchema):
+    """Models a row in the transitive closure of the concept links table
+    Attributes:
+        ancestor: the unique identifying string of a concept the descendant derives from
+        descendant: the unique identifying string of a concept derived from the ancestor
+        depth: the number of links on the shortest path from ancestor to descendant
+    """
+    __tablename__ = 'concept_closure'
+    ancestor = Column(
+            ForeignKey(
+                Concept.identifier,
+                onupdate="CASCADE",
+                ondelete="CASCADE"
+                ),
+            primary_key=True
+            )
+    descendant = Column(
+            ForeignKey(
+                Concept.identifier,
+                onupdate="CASCADE",
+                ondelete="CASCADE"
+                ),
+            primary_key=True
+            )
+    depth = Column(Integer, nullable=False)
+    __table_args__ = (
+            Index('concept_closure_ancestor_depth', 'ancestor', 'depth'),
+            Index('concept_closure_descendant_depth', 'descendant', 'depth'),
+            )
 
 
 class Follows(IdeaBankSchema):
@@ -188,6 +262,8 @@ class Comments(IdeaBankSchema):
         free_text: the contents of this comment
         parent: the comment being responded to (if any)
         created_at: the timestamp the comment was created at
+        path: the path segments of the comment's ancestors followed by its own,
+            ordering the comments of a concept the way their threads are displayed
     """
     __tablename__ = 'comments'
     comment_id = Column(
@@ -215,3 +291,9 @@ class Comments(IdeaBankSchema):
             nullable=True
             )
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    path = Column(String, nullable=True)
+    __table_args__ = (
+            Index('comments_on_concept', 'comment_on', 'created_at'),
+            Index('comments_responses', 'parent', 'created_at', 'comment_id'),
+            Index('comments_thread_order', 'comment_on', 'path'),
+            )
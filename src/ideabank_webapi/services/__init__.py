@@ -11,6 +11,11 @@ from .s3crud import S3Crud
 from .accounts import AccountsDataService
 from .concepts import ConceptsDataService
 from .engage import EngagementDataService
+from .pool import ServiceProviderPool
+from .statements import StatementRegistry, BoundStatement, STATEMENTS
+from .cache import BoundedCache, CacheRegistry, CACHES
+from .graph import ConceptGraph
+from .sections import CommentSection, CommentRecord
 
 
 class RegisteredService(Enum):
@@ -20,3 +25,6 @@ class RegisteredService(Enum):
     ACCOUNTS_DS = AccountsDataService
     CONCEPTS_DS = ConceptsDataService
     ENGAGE_DS = EngagementDataService
+
+
+PROVIDER_POOL = ServiceProviderPool()
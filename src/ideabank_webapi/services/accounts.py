@@ -6,16 +6,36 @@
 
 import logging
 
-from sqlalchemy import select, insert
+from sqlalchemy import select, insert, bindparam
 from sqlalchemy.sql.expression import Select, Insert
 
 from .querydb import QueryService
 from .s3crud import S3Crud
+from .statements import STATEMENTS, BoundStatement
 from ..models.schema import Accounts
 
 LOGGER = logging.getLogger(__name__)
 
 
+def _authentication_information_template() -> Select:
+    """Template selecting an account's credentials by display name"""
+    return select(
+            Accounts.display_name,
+            Accounts.password_hash,
+            Accounts.salt_value
+            ) \
+        .where(Accounts.display_name == bindparam('display_name'))
+
+
+def _account_profile_template() -> Select:
+    """Template selecting an account's profile by display name"""
+    return select(
+            Accounts.preferred_name,
+            Accounts.biography,
+            ) \
+        .where(Accounts.display_name == bindparam('display_name'))
+
+
 class AccountsDataService(QueryService, S3Crud):
     """Provider for account information."""
 
@@ -43,32 +63,29 @@ class AccountsDataService(QueryService, S3Crud):
             .returning(Accounts.display_name)
 
     @staticmethod
-    def fetch_authentication_information(display_name) -> Select:
+    def fetch_authentication_information(display_name) -> BoundStatement:
         """Builds a selection statement to query a user's credentials
         Arguments:
             display_name: [str] the display name of the account to query for
         Returns:
-            [Select] a SQLAlchemy Select statement
+            [BoundStatement] the shared SQLAlchemy Select template and its parameters
         """
         LOGGER.info("Built query to obtain authentication information")
-        return select(
-                Accounts.display_name,
-                Accounts.password_hash,
-                Accounts.salt_value
-                ) \
-            .where(Accounts.display_name == display_name)
+        return STATEMENTS.bind(
+                _authentication_information_template,
+                display_name=display_name
+                )
 
     @staticmethod
-    def fetch_account_profile(display_name) -> Select:
+    def fetch_account_profile(display_name) -> BoundStatement:
         """Builds a selection statement to query a user's profile elements
         Arguments:
             display_name: [str] the display name of the account to query for
         Returns:
-            [Select] a SQLAlchemy Select statement
+            [BoundStatement] the shared SQLAlchemy Select template and its parameters
         """
         LOGGER.info("Built query to obtain account profile")
-        return select(
-                Accounts.preferred_name,
-                Accounts.biography,
-                ) \
-            .where(Accounts.display_name == display_name)
+        return STATEMENTS.bind(
+                _account_profile_template,
+                display_name=display_name
+                )
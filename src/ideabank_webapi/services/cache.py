@@ -0,0 +1,212 @@
+"""
+    :module name: cache
+    :module summary: bounded, thread-safe in-process caches shared by service providers
+    :module author: Nathan Mendoza (nathancm@uci.edu)
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Union
+
+LOGGER = logging.getLogger(__name__)
+
+
+class BoundedCache:  # pylint:disable=too-many-instance-attributes
+    """Thread-safe least recently used cache holding at most capacity entries.
+    Entries may be given a time to live after which they are no longer returned,
+    and tags through which every entry sharing a tag can be invalidated at once
+    Attributes:
+        name: label of the cache reported with its statistics
+        capacity: the maximum number of entries kept, 0 disables the cache
+        ttl: default seconds an entry stays valid, None to never expire
+    """
+
+    def __init__(self, name: str, capacity: int, ttl: Optional[float] = None):
+        self.name = name
+        self.capacity = capacity
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._generation = 0
+        self._tagged = {}
+        CACHES.register(self)
+
+    @property
+    def generation(self) -> int:
+        """The number of times every entry, or every entry sharing a tag, was invalidated
+        Returns:
+            [int] the current generation of the cache
+        """
+        with self._lock:
+            return self._generation
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Look up the value stored under key, marking it as recently used
+        Arguments:
+            key: the key the value was stored under
+        Returns:
+            the stored value, None if it is absent or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(  # pylint:disable=too-many-arguments
+            self,
+            key: Hashable,
+            value: Any,
+            ttl: Optional[float] = None,
+            generation: Optional[int] = None,
+            tags: Iterable[Hashable] = ()
+            ) -> None:
+        """Store the value under key, evicting the least recently used entry if full
+        Arguments:
+            key: the key to store the value under
+            value: the value to store
+            ttl: seconds the entry stays valid, defaults to the cache's ttl
+            generation: the generation the value was computed in, if any.
+                The value is discarded if the cache was invalidated since
+            tags: labels the entry can be invalidated by
+        """
+        if self.capacity <= 0:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                LOGGER.debug("Discarding value computed before %s was invalidated", self.name)
+                return
+            self._drop(key)
+            tags = frozenset(tags)
+            self._entries[key] = (value, expires, tags)
+            for tag in tags:
+                self._tagged.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.capacity:
+                self._drop(next(iter(self._entries)))
+                self._evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop the entry stored under key, if any
+        Arguments:
+            key: the key of the entry to drop
+        """
+        with self._lock:
+            self._drop(key)
+
+    def invalidate_tagged(self, *tags: Hashable) -> int:
+        """Drop every entry carrying any of the given tags and start a new generation,
+        so values computed before the entries were dropped are not stored either
+        Arguments:
+            tags: the tags of the entries to drop
+        Returns:
+            [int] the number of entries dropped
+        """
+        with self._lock:
+            keys = set().union(*(self._tagged.get(tag, ()) for tag in tags))
+            for key in keys:
+                self._drop(key)
+            self._generation += 1
+            return len(keys)
+
+    def start_generation(self) -> int:
+        """Start a new generation without dropping any entry, so values computed before
+        an entry was updated in place are not stored over it
+        Returns:
+            [int] the new generation of the cache
+        """
+        with self._lock:
+            self._generation += 1
+            return self._generation
+
+    def invalidate_all(self) -> None:
+        """Drop every entry and start a new generation, keeping the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._tagged.clear()
+            self._generation += 1
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._tagged.clear()
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def _drop(self, key: Hashable) -> None:
+        """Remove the entry stored under key, if any, from the entries and its tags.
+        The caller must hold the lock
+        Arguments:
+            key: the key of the entry to remove
+        """
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tagged[tag]
+            keys.discard(key)
+            if not keys:
+                del self._tagged[tag]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def statistics(self) -> Dict[str, Union[str, int, float]]:
+        """Report the usage of this cache
+        Returns:
+            [Dict] cache statistics keyed by name
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                    'name': self.name,
+                    'capacity': self.capacity,
+                    'size': len(self._entries),
+                    'hits': self._hits,
+                    'misses': self._misses,
+                    'evictions': self._evictions,
+                    'hit_ratio': self._hits / lookups if lookups else 0.0
+                    }
+
+
+class CacheRegistry:
+    """Process-wide record of every cache so their usage can be reported"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._caches = {}
+
+    def register(self, cache: BoundedCache) -> None:
+        """Record the given cache, replacing any cache registered under its name
+        Arguments:
+            cache: [BoundedCache] the cache to record
+        """
+        with self._lock:
+            self._caches[cache.name] = cache
+
+    def statistics(self) -> List[Dict[str, Union[str, int, float]]]:
+        """Report the usage of every registered cache
+        Returns:
+            [List[Dict]] one set of statistics per cache
+        """
+        with self._lock:
+            caches = list(self._caches.values())
+        return [cache.statistics() for cache in caches]
+
+
+CACHES = CacheRegistry()
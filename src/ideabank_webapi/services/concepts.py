@@ -6,21 +6,61 @@
 
 import logging
 import datetime
-from typing import Union, Dict, List
+import functools
+import operator
+from typing import Union, Dict, List, Optional, Tuple
 
-from sqlalchemy import select, insert, literal
+from sqlalchemy import (
+        select, insert, literal, bindparam, tuple_, func, union_all, cast, Column, String, Float
+        )
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.sql.expression import Select, Insert
 
 from .querydb import QueryService
 from .s3crud import S3Crud
-from ..models.schema import Concept, ConceptLink
+from .statements import STATEMENTS, BoundStatement
+from .cache import BoundedCache
+from .graph import ConceptGraph
+from ..config import ServiceConfig
+from ..models.schema import Concept, ConceptLink, ConceptClosure, TEXT_SEARCH_CONFIG
 from ..models.artifacts import FuzzyOption
 
 LOGGER = logging.getLogger(__name__)
+CLOSURE_LOCK_KEY = 0x6c696e6b  # advisory lock serializing lineage closure updates
+SNIPPET_OPTIONS = 'MaxFragments=2, MaxWords=20, MinWords=8, FragmentDelimiter=" ... "'
+
+
+def _exact_concept_template() -> Select:
+    """Template selecting a concept by title and author"""
+    return select(
+            Concept.author,
+            Concept.title,
+            Concept.description,
+            Concept.diagram
+            ) \
+        .where(Concept.title == bindparam('title'), Concept.author == bindparam('author'))
 
 
 class ConceptsDataService(QueryService, S3Crud):
-    """Provider for account information."""
+    """Provider for account information.
+    Attributes:
+        SEARCH_RESULTS: process-wide cache of search result pages keyed by normalized query
+        LINEAGE_GRAPH: process-wide copy of the concept links lineages are walked on
+        LINEAGES: process-wide cache of the links making up a lineage, keyed by focus
+            and bounds, tagged with every concept in the lineage
+    """
+    SEARCH_RESULTS = BoundedCache(
+            'concept-search',
+            ServiceConfig.Search.RESULT_CACHE_SIZE,
+            ttl=ServiceConfig.Search.RESULT_CACHE_TTL
+            )
+    LINEAGE_GRAPH = ConceptGraph('concept-graph', ServiceConfig.Lineage.GRAPH_REFRESH)
+    LINEAGES = BoundedCache(
+            'concept-lineage',
+            ServiceConfig.Lineage.CACHE_SIZE,
+            ttl=ServiceConfig.Lineage.CACHE_TTL
+            )
 
     def __init__(self):
         QueryService.__init__(self)
@@ -55,22 +95,16 @@ class ConceptsDataService(QueryService, S3Crud):
                     )
 
     @staticmethod
-    def find_exact_concept(title: str, author: str) -> Select:
+    def find_exact_concept(title: str, author: str) -> BoundStatement:
         """Builds a selection statement to query for a specific concept
         Arguments:
             title: [str] title of the concept to look for
             author: [str] author of the concept to look for
         Returns:
-            [Select] the SQLAlchemy selection statement
+            [BoundStatement] the shared SQLAlchemy selection template and its parameters
         """
         LOGGER.info("Built query to select a specific concept")
-        return select(
-                Concept.author,
-                Concept.title,
-                Concept.description,
-                Concept.diagram
-                ) \
-            .where(Concept.title == title, Concept.author == author)
+        return STATEMENTS.bind(_exact_concept_template, title=title, author=author)
 
     @staticmethod
     def link_existing_concept(parent_identifier: str, child_identifier: str) -> Insert:
@@ -93,113 +127,269 @@ class ConceptsDataService(QueryService, S3Crud):
                     )
 
     @staticmethod
-    def query_concepts(
+    def query_concepts(  # pylint:disable=too-many-arguments,too-many-locals
             author: str,
             title: str,
             not_before: datetime.datetime,
             not_after: datetime.datetime,
-            fuzzy: FuzzyOption
+            fuzzy: FuzzyOption,
+            *,
+            limit: Optional[int] = None,
+            after: Optional[Tuple] = None,
+            similarity: Optional[float] = None,
+            text: Optional[str] = None
             ) -> Select:
-        """Builds a selection statement to query the concept records
+        """Builds a selection statement to query a page of concept records.
+        Exact searches are ordered from most to least recently updated. Fuzzy searches
+        match fields containing the term, backed by the trigram indexes, and are ordered
+        from most to least similar, selecting the summed similarity of the fuzzy fields as score.
+        Full text searches match the search vector of each concept, are ordered by
+        its ts_rank, selected as score, and select a highlighted snippet of the description.
+        Postgres defers the snippet past the limit, so only returned rows are highlighted.
+        Scores are real in postgres; they are cast to double precision so the score a
+        cursor holds compares equal to the score it was read from
         Arguments:
             author: [str] the author the query on
             title: [str] the title to query on
             not_before: [datetime] the start of the time range to query on
             not_after: [datetime] the end of the time range to query on
             fuzzy: [FuzzyOption] controls fuzzy searches on author and title
+            limit: [int] the maximum number of records to select, if any
+            after: [Tuple] the sort key of the last record of the previous page, if any.
+                (updated_at, identifier) for exact searches,
+                (score, updated_at, identifier) for fuzzy and full text searches
+            similarity: [float] the minimum similarity of each fuzzy field, if any
+            text: [str] web search style query on titles and descriptions, if any.
+                Author and title then only narrow the search when given
         Returns:
             [Select] the SQLAlchemy selection statement
         """
         LOGGER.info("Built query to search concept records")
-        stmt = select(
-                    Concept.identifier
-                )
-        if fuzzy == FuzzyOption.ALL:
-            stmt = stmt.where(
-                    Concept.author.like(f'%{author}%'),
-                    Concept.title.like(f'%{title}%'),
-                    Concept.updated_at > not_before,
-                    Concept.updated_at < not_after
-                    )
-        elif fuzzy == FuzzyOption.AUTHOR:
-            stmt = stmt.where(
-                    Concept.author.like(f'%{author}%'),
-                    Concept.title == title,
-                    Concept.updated_at > not_before,
-                    Concept.updated_at < not_after
+        criteria = []
+        scores = []
+        for column, term, is_fuzzy in (
+                (Concept.author, author, fuzzy in (FuzzyOption.ALL, FuzzyOption.AUTHOR)),
+                (Concept.title, title, fuzzy in (FuzzyOption.ALL, FuzzyOption.TITLE))
+                ):
+            if text is not None and not term:
+                continue
+            if not is_fuzzy:
+                criteria.append(column == term)
+            elif term:
+                score = func.similarity(column, term)
+                criteria.append(column.like(f'%{term}%'))
+                if similarity is not None:
+                    criteria.append(score >= similarity)
+                scores.append(score)
+        criteria.append(Concept.updated_at > not_before)
+        criteria.append(Concept.updated_at < not_after)
+        stmt = select(Concept.identifier, Concept.updated_at)
+        sort_key = [Concept.updated_at, Concept.identifier]
+        if text is not None:
+            query = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, text)
+            criteria.append(Concept.search_vector.bool_op('@@')(query))
+            scores = [func.ts_rank(Concept.search_vector, query)]
+            stmt = stmt.add_columns(func.ts_headline(
+                TEXT_SEARCH_CONFIG,
+                Concept.description,
+                query,
+                SNIPPET_OPTIONS
+                ).label('snippet'))
+        if text is not None or fuzzy != FuzzyOption.NONE:
+            sort_key.insert(0, cast(
+                functools.reduce(operator.add, scores),
+                Float(53)
+                ) if scores else literal(0.0))
+            stmt = stmt.add_columns(sort_key[0].label('score'))
+        stmt = stmt.where(*criteria)
+        if after is not None:
+            stmt = stmt.where(tuple_(*sort_key) < tuple_(*after))
+        return stmt \
+            .order_by(*(key.desc() for key in sort_key)) \
+            .limit(limit)
+
+    @staticmethod
+    def lock_lineage_closure() -> Select:
+        """Builds a selection statement serializing updates to the lineage closure
+        for the rest of the transaction, so concurrent links see each other's paths
+        Returns:
+            [Select] the selection statement
+        """
+        return select(func.pg_advisory_xact_lock(CLOSURE_LOCK_KEY))
+
+    @staticmethod
+    def extend_lineage_closure(parent_identifier: str, child_identifier: str) -> Insert:
+        """Builds an insertion statement recording the paths a new link creates.
+        Every ancestor of the parent, and the parent itself, becomes an ancestor of
+        the child and every descendant of the child, keeping the shortest depth
+        Arguments:
+            parent_identifier: [str] id of the parent concept
+            child_identifier: [str] id of the child concept
+        Returns:
+            [Insert] the SQLAlchemy insertion statement
+        """
+        above = union_all(
+                select(
+                    ConceptClosure.ancestor.label('node'),
+                    ConceptClosure.depth
+                    ).where(ConceptClosure.descendant == parent_identifier),
+                select(
+                    literal(parent_identifier, String).label('node'),
+                    literal(0).label('depth')
                     )
-        elif fuzzy == FuzzyOption.TITLE:
-            stmt = stmt.where(
-                    Concept.author == author,
-                    Concept.title.like(f'%{title}%'),
-                    Concept.updated_at > not_before,
-                    Concept.updated_at < not_after
+                ).subquery('above')
+        below = union_all(
+                select(
+                    ConceptClosure.descendant.label('node'),
+                    ConceptClosure.depth
+                    ).where(ConceptClosure.ancestor == child_identifier),
+                select(
+                    literal(child_identifier, String).label('node'),
+                    literal(0).label('depth')
                     )
-        else:
-            stmt = stmt.where(
-                    Concept.author == author,
-                    Concept.title == title,
-                    Concept.updated_at > not_before,
-                    Concept.updated_at < not_after
+                ).subquery('below')
+        stmt = pg_insert(ConceptClosure).from_select(
+                ['ancestor', 'descendant', 'depth'],
+                select(
+                    above.c.node,
+                    below.c.node,
+                    above.c.depth + below.c.depth + 1
+                    ).where(above.c.node != below.c.node)
+                )
+        LOGGER.info("Built query to extend the lineage closure with a new link")
+        return stmt.on_conflict_do_update(
+                index_elements=[ConceptClosure.ancestor, ConceptClosure.descendant],
+                set_={'depth': stmt.excluded.depth},
+                where=stmt.excluded.depth < ConceptClosure.depth
+                )
+
+    @staticmethod
+    def find_all_links() -> Select:
+        """Builds a selection statement to find every link between concepts
+        Returns:
+            [Select] the selection statement
+        """
+        return select(ConceptLink.ancestor, ConceptLink.descendant, ConceptLink.link_id)
+
+    @staticmethod
+    def find_links_after(link_id: int) -> Select:
+        """Builds a selection statement to find the links created after a given link
+        Arguments:
+            link_id: [int] the number of the newest link already known
+        Returns:
+            [Select] the selection statement
+        """
+        return select(ConceptLink.ancestor, ConceptLink.descendant, ConceptLink.link_id) \
+            .where(ConceptLink.link_id > link_id) \
+            .order_by(ConceptLink.link_id)
+
+    def refresh_lineage_graph(self) -> bool:
+        """Load every link into the lineage graph if it was never loaded or is out of date.
+        Only one thread loads at a time, the others keep walking the current graph.
+        Otherwise the graph catches up on the links created since its newest link,
+        through any worker, and the cached lineages they extend are dropped.
+        Must be called within a with statement
+        Returns:
+            [bool] True if the graph was loaded
+        """
+        graph = self.LINEAGE_GRAPH
+        loading = graph.begin_load()
+        if not loading and not graph.loaded:
+            return False
+        try:
+            self.add_query(
+                    self.find_all_links() if loading else self.find_links_after(graph.version)
                     )
-        return stmt
+            self.exec_next()
+            links = self.results.all()
+        except SQLAlchemyError as err:
+            LOGGER.warning("Could not read links into the lineage graph: %s", err)
+            if loading:
+                graph.abort_load()
+            return False
+        pairs = [(link.ancestor, link.descendant) for link in links]
+        version = max((link.link_id for link in links), default=graph.version)
+        if loading:
+            graph.finish_load(pairs, version)
+            return True
+        added = graph.catch_up(pairs, version)
+        if added:
+            self.LINEAGES.invalidate_tagged(*{member for link in added for member in link})
+        return False
 
     @staticmethod
-    def find_child_ideas(identifier: str, depth: int) -> Select:
+    def find_child_ideas(identifier: str, depth: int, max_nodes: Optional[int] = None) -> Select:
         """Builds a selection statement to find the child ideas
         Arguments:
             identifier: [str] id of the concep to find children for
             depth: [int] number of generations to cap at
+            max_nodes: [int] number of links to cap at, None for no cap
         Returns:
             [Select] the selection statement
         """
-        steps_cte = select(
-                ConceptLink.descendant,
+        return ConceptsDataService._linked_within(
                 ConceptLink.ancestor,
-                literal(1).label('depth'),
-                ) \
-            .where(ConceptLink.ancestor == identifier) \
-            .cte(recursive=True)
-        recursive_query = steps_cte.union_all(
-                select(
-                    ConceptLink.descendant,
-                    ConceptLink.ancestor,
-                    steps_cte.c.depth + 1,
-                    ).where(ConceptLink.ancestor == steps_cte.c.descendant)
+                ConceptClosure.ancestor,
+                ConceptClosure.descendant,
+                identifier,
+                depth,
+                max_nodes=max_nodes
                 )
-        return select(
-                recursive_query.c.ancestor,
-                recursive_query.c.descendant
-                ) \
-            .where(recursive_query.c.depth <= depth) \
-            .order_by(recursive_query.c.depth)
 
     @staticmethod
-    def find_parent_ideas(identifier: str, depth: int) -> Select:
+    def find_parent_ideas(identifier: str, depth: int, max_nodes: Optional[int] = None) -> Select:
         """Builds a selection statement to find the parent ideas
         Arguments:
             identifier: [str] id of the concept to find parents for
             depth: [int] number of generations to cap at
+            max_nodes: [int] number of links to cap at, None for no cap
         Returns:
             [Select] the selection statement
         """
-        steps_cte = select(
-                    ConceptLink.descendant,
-                    ConceptLink.ancestor,
-                    literal(1).label('depth')
-                ) \
-            .where(ConceptLink.descendant == identifier) \
-            .cte(recursive=True)
-        recursive_query = steps_cte.union_all(
-                select(
-                    ConceptLink.descendant,
-                    ConceptLink.ancestor,
-                    steps_cte.c.depth + 1
-                    ).where(ConceptLink.descendant == steps_cte.c.ancestor)
+        return ConceptsDataService._linked_within(
+                ConceptLink.descendant,
+                ConceptClosure.descendant,
+                ConceptClosure.ancestor,
+                identifier,
+                depth,
+                max_nodes=max_nodes
                 )
-        return select(
-                recursive_query.c.ancestor,
-                recursive_query.c.descendant
-                ) \
-            .where(recursive_query.c.depth <= depth) \
-            .order_by(recursive_query.c.depth)
+
+    @staticmethod
+    def _linked_within(  # pylint:disable=too-many-arguments
+            near: Column,
+            origin: Column,
+            reached: Column,
+            identifier: str,
+            depth: int,
+            *,
+            max_nodes: Optional[int]
+            ) -> Select:
+        """Builds a selection statement for the links leading away from a concept.
+        The concepts within depth - 1 links of it are read from the lineage closure,
+        so the links leaving them are found without walking the graph. Links out of
+        the nearest concepts come first, which keeps a capped lineage connected
+        Arguments:
+            near: [Column] the link column holding the concept walked from
+            origin: [Column] the closure column holding the concept to start from
+            reached: [Column] the closure column holding the concepts reached from it
+            identifier: [str] id of the concept to start from
+            depth: [int] number of generations to cap at
+            max_nodes: [int] number of links to cap at, None for no cap
+        Returns:
+            [Select] the selection statement
+        """
+        reachable = union_all(
+                select(
+                    literal(identifier, String).label('node'),
+                    literal(0).label('depth')
+                    ),
+                select(
+                    reached.label('node'),
+                    ConceptClosure.depth
+                    ).where(origin == identifier, ConceptClosure.depth < depth)
+                ).subquery('reachable')
+        stmt = select(ConceptLink.ancestor, ConceptLink.descendant) \
+            .join(reachable, near == reachable.c.node) \
+            .order_by(reachable.c.depth)
+        return stmt if max_nodes is None else stmt.limit(max_nodes)
@@ -5,20 +5,136 @@
 """
 
 import logging
-from typing import Optional
+import uuid
+import datetime
+from typing import Optional, Sequence, Tuple, Union
 
-from sqlalchemy import select, insert, delete
+from sqlalchemy import (
+        select, insert, delete, bindparam, exists, tuple_, literal, literal_column, true, Integer
+        )
+from sqlalchemy.orm import aliased
 from sqlalchemy.sql.expression import Select, Insert, Delete
 
 from .querydb import QueryService
-from ..models.schema import Likes, Follows, Comments
+from .s3crud import S3Crud
+from .statements import STATEMENTS, BoundStatement
+from .cache import BoundedCache
+from .sections import CommentSection, CommentRecord
+from ..config import ServiceConfig
+from ..models.schema import Accounts, Likes, Follows, Comments
 
 # pylint:disable=singleton-comparison
 LOGGER = logging.getLogger(__name__)
 
+PATH_SEGMENT_LENGTH = 46
+_EPOCH = datetime.datetime(1970, 1, 1)
 
-class EngagementDataService(QueryService):
-    """Provider for user engagement"""
+
+def _path_segment(created_at: datetime.datetime, comment_id: uuid.UUID) -> str:
+    """The part of a comment's path identifying it among the responses to its parent.
+    Segments are fixed width hex of the creation time in microseconds followed by
+    the comment's id, so ordering paths as text orders every thread oldest first
+    Arguments:
+        created_at: [datetime] the naive UTC time the comment was created at
+        comment_id: [UUID] the id of the comment
+    Returns:
+        [str] the path segment of the comment
+    """
+    micros = (created_at - _EPOCH) // datetime.timedelta(microseconds=1)
+    return f'{micros:014x}{comment_id.hex}'
+
+
+def _liking_template() -> Select:
+    """Template selecting the like record of an account on a concept"""
+    return select(Likes).where(
+            Likes.display_name == bindparam('account'),
+            Likes.concept_id == bindparam('concept')
+            )
+
+
+def _following_template() -> Select:
+    """Template selecting the following record between two accounts"""
+    return select(Follows) \
+        .where(
+                Follows.follower == bindparam('follower'),
+                Follows.followee == bindparam('followee')
+                )
+
+
+def _created_columns() -> tuple:
+    """The columns kept for each comment of a concept's comment section
+    Returns:
+        [tuple] the comment, the comment it responds to, its sort key and its path
+    """
+    return (
+            Comments.comment_id,
+            Comments.parent,
+            Comments.comment_by,
+            Comments.free_text,
+            Comments.created_at,
+            Comments.path
+            )
+
+
+def _author_name(author: str):
+    """The preferred name of an account, for statements that cannot join the accounts table
+    Arguments:
+        author: [str] the display name of the account
+    Returns:
+        the labeled scalar subquery selecting the preferred name
+    """
+    return select(Accounts.preferred_name) \
+        .where(Accounts.display_name == author) \
+        .scalar_subquery() \
+        .label('preferred_name')
+
+
+def _written_by(comment):
+    """The condition joining comments to the accounts of their authors
+    Arguments:
+        comment: the columns of the comments table or of a subquery of it
+    Returns:
+        the join condition
+    """
+    return Accounts.display_name == comment.comment_by
+
+
+def _thread_columns(comment) -> tuple:
+    """The columns read for each comment of a paginated thread
+    Arguments:
+        comment: the columns of the comments table or of a subquery of it
+    Returns:
+        [tuple] the comment, the comment it responds to, its sort key, its path,
+        the preferred name of its author and whether anyone responded to it
+    """
+    response = aliased(Comments)
+    return (
+            comment.comment_id,
+            comment.parent,
+            comment.comment_by,
+            comment.free_text,
+            comment.created_at,
+            comment.path,
+            Accounts.preferred_name,
+            exists().where(response.parent == comment.comment_id).label('has_replies')
+            )
+
+
+class EngagementDataService(QueryService, S3Crud):
+    """Provider for user engagement
+    Attributes:
+        COMMENT_SECTIONS: process-wide cache of the comments left on a concept,
+            keyed and tagged by concept
+    """
+    COMMENT_SECTIONS = BoundedCache(
+            'comment-sections',
+            ServiceConfig.Comments.CACHE_SIZE,
+            ttl=ServiceConfig.Comments.CACHE_TTL
+            )
+
+    def __init__(self):
+        QueryService.__init__(self)
+        S3Crud.__init__(self)
 
     @staticmethod
     def insert_liking(account_liking: str, concept_liked: str) -> Insert:
@@ -57,19 +173,16 @@ class EngagementDataService(QueryService):
                     )
 
     @staticmethod
-    def check_liking(account: str, concept: str) -> Select:
+    def check_liking(account: str, concept: str) -> BoundStatement:
         """Builds a selection statement to check if a record of account liking concept exists
         Arguments:
             account: [str] the display name to check for
             concept: [str] the concept identifier to check for
         Returns:
-            [Select] An sqlalchemy selection statement to check for the record
+            [BoundStatement] the shared sqlalchemy selection template and its parameters
         """
         LOGGER.info("Built query to check if an idea is liked by a particular user")
-        return select(Likes).where(
-                Likes.display_name == account,
-                Likes.concept_id == concept
-                )
+        return STATEMENTS.bind(_liking_template, account=account, concept=concept)
 
     @staticmethod
     def insert_following(follower: str, followee: str) -> Insert:
@@ -107,48 +220,76 @@ class EngagementDataService(QueryService):
                 )
 
     @staticmethod
-    def check_following(follower: str, followee: str) -> Select:
+    def check_following(follower: str, followee: str) -> BoundStatement:
         """Builds a selection statement to check if a user follows another user
         Arguments:
             follower: [str] the account following another user
             followee: [str] the account being followed by another user
         Returns:
-            [Select] an sqlalchemy selection statement to find the following record
+            [BoundStatement] the shared sqlalchemy selection template and its parameters
         """
         LOGGER.info("Built query to check if a user is following another user")
-        return select(Follows) \
-            .where(
-                    Follows.follower == follower,
-                    Follows.followee == followee
-                    )
+        return STATEMENTS.bind(_following_template, follower=follower, followee=followee)
 
     @staticmethod
     def create_comment(
             author: str,
             concept: str,
             contents: str,
-            response_to: Optional[int] = None
+            response_to: Optional[uuid.UUID] = None
             ) -> Insert:
-        """Builds an insertion statement to create a new comment
+        """Builds an insertion statement to create a new comment, extending the path of
+        the comment it responds to. A response is only inserted if the comment it
+        responds to was left on the same concept
         Arguments:
             author: [str] the display name of the user creating this comment
             concept: [str] the identifier string of the concept being commented on
             contents: [str] the contents of the comment
-            response_to: [int] the id of the comment this comment responds to (if any)
+            response_to: [UUID] the id of the comment this comment responds to (if any)
         Returns:
-            A sqlalchemy insertion statement to create the comment
+            A sqlalchemy insertion statement to create the comment,
+            returning the comment created and the preferred name of its author
         """
         LOGGER.info("Built query to create a new comment")
-        return insert(Comments) \
-            .values(
-                    comment_on=concept,
-                    comment_by=author,
-                    free_text=contents,
-                    parent=response_to
+        # the table is inserted into directly, as orm inserts cannot return subqueries
+        comment_id = uuid.uuid4()
+        created_at = datetime.datetime.utcnow()
+        segment = _path_segment(created_at, comment_id)
+        if response_to is None:
+            return insert(Comments.__table__) \
+                .values(
+                        comment_id=comment_id,
+                        comment_on=concept,
+                        comment_by=author,
+                        free_text=contents,
+                        parent=None,
+                        created_at=created_at,
+                        path=segment
+                        ) \
+                .returning(*_created_columns(), _author_name(author))
+        thread = aliased(Comments, name='thread')
+        return insert(Comments.__table__) \
+            .from_select(
+                    [
+                        'comment_id',
+                        'comment_on',
+                        'comment_by',
+                        'free_text',
+                        'parent',
+                        'created_at',
+                        'path'
+                        ],
+                    select(
+                        literal(comment_id, Comments.comment_id.type),
+                        thread.comment_on,
+                        literal(author, Comments.comment_by.type),
+                        literal(contents, Comments.free_text.type),
+                        thread.comment_id,
+                        literal(created_at, Comments.created_at.type),
+                        thread.path + segment
+                        ).where(thread.comment_id == response_to, thread.comment_on == concept)
                     ) \
-            .returning(
-                    Comments.comment_id
-                    )
+            .returning(*_created_columns(), _author_name(author))
 
     @staticmethod
     def comments_on(concept_id: str, response_to: str = None) -> Select:
@@ -163,3 +304,170 @@ class EngagementDataService(QueryService):
         return select(Comments.comment_id, Comments.comment_by, Comments.free_text) \
             .where(Comments.comment_on == concept_id, Comments.parent == response_to) \
             .order_by(Comments.created_at)
+
+    @staticmethod
+    def comment_forest(concept_id: str) -> Select:
+        """Builds a selection statement to gather every comment left on a given idea,
+        along with the comment each one responds to and the preferred name of its author,
+        in the order threads are displayed
+        Arguments:
+            concept_id: [str] the string identifier of the concept being commented on
+        Returns:
+            A sqlalchemy selection statement to gather all comments of the concept
+        """
+        LOGGER.info("Built query to find every comment on a concept")
+        return select(*_created_columns(), Accounts.preferred_name) \
+            .outerjoin(Accounts, _written_by(Comments)) \
+            .where(Comments.comment_on == concept_id) \
+            .order_by(Comments.path)
+
+    @staticmethod
+    def thread_page(
+            concept_id: str,
+            response_to: Optional[uuid.UUID] = None,
+            after: Optional[Tuple] = None,
+            limit: int = 20
+            ) -> Select:
+        """Builds a selection statement to gather a page of the comments responding to
+        a given comment on a given idea, or of its top-level comments, oldest first
+        Arguments:
+            concept_id: [str] the string identifier of the concept being commented on
+            response_to: [UUID] the comment whose responses to gather, None for top-level comments
+            after: [Tuple] the (created_at, comment_id) of the last comment of the previous page
+            limit: [int] the maximum number of comments to gather
+        Returns:
+            A sqlalchemy selection statement to gather the page of comments
+        """
+        LOGGER.info("Built query to find a page of comment threads")
+        stmt = select(*_thread_columns(Comments)) \
+            .outerjoin(Accounts, _written_by(Comments)) \
+            .where(Comments.comment_on == concept_id, Comments.parent == response_to)
+        if after is not None:
+            stmt = stmt.where(tuple_(Comments.created_at, Comments.comment_id) > tuple_(*after))
+        return stmt.order_by(Comments.created_at, Comments.comment_id).limit(limit)
+
+    @staticmethod
+    def thread_previews(concept_id: str, paths: Sequence[str], depth: int, width: int) -> Select:
+        """Builds a selection statement to gather the responses under a page of comments,
+        in display order. Starting from the page, each level reads only the oldest responses
+        to each comment of the level before it, so no more than width responses are read
+        per comment however many were left under it
+        Arguments:
+            concept_id: [str] the string identifier of the concept being commented on
+            paths: [Sequence[str]] the paths of the comments whose responses to gather
+            depth: [int] the number of levels of responses to gather
+            width: [int] the maximum number of responses to gather per comment
+        Returns:
+            A sqlalchemy selection statement to gather the responses
+        """
+        LOGGER.info("Built query to preview the responses to a page of comments")
+        previewed = select(*_created_columns(), literal_column('0', Integer).label('level')) \
+            .where(Comments.comment_on == concept_id, Comments.path.in_(paths)) \
+            .cte('previewed', recursive=True)
+        reply = aliased(Comments, name='replies')
+        responses = select(
+                reply.comment_id,
+                reply.parent,
+                reply.comment_by,
+                reply.free_text,
+                reply.created_at,
+                reply.path
+                ) \
+            .where(reply.comment_on == concept_id, reply.parent == previewed.c.comment_id) \
+            .order_by(reply.created_at, reply.comment_id) \
+            .limit(width) \
+            .lateral('responses')
+        previewed = previewed.union_all(
+                select(responses, previewed.c.level + 1)
+                .select_from(previewed.join(responses, true()))
+                .where(previewed.c.level < depth)
+                )
+        return select(*_thread_columns(previewed.c)) \
+            .select_from(previewed) \
+            .outerjoin(Accounts, _written_by(previewed.c)) \
+            .where(previewed.c.level > 0) \
+            .order_by(previewed.c.path)
+
+    def comment_section(self, concept_id: str) -> Union[CommentSection, 'QueriedSection']:
+        """Obtain the comments left on a concept. The cached copy is used, reading every
+        comment in display order if it is not cached. With the cache disabled, comments
+        are queried a page at a time instead. Must be called within a with statement
+        Arguments:
+            concept_id: [str] the string identifier of the concept being commented on
+        Returns:
+            the comments left on the concept, served through page and previews
+        """
+        if self.COMMENT_SECTIONS.capacity <= 0:
+            return QueriedSection(self, concept_id)
+        generation = self.COMMENT_SECTIONS.generation
+        section = self.COMMENT_SECTIONS.get(concept_id)
+        if section is not None:
+            LOGGER.info("Serving cached comments on %s", concept_id)
+            return section
+        self.add_query(self.comment_forest(concept_id))
+        self.exec_next()
+        section = CommentSection(concept_id, self.results.all())
+        self.COMMENT_SECTIONS.put(concept_id, section, generation=generation, tags=(concept_id,))
+        return section
+
+    def record_comment(self, concept_id: str, created) -> None:
+        """Splice a committed comment into the cached copy of the comments on its concept.
+        The copy is dropped instead if it cannot take the comment. A new generation is
+        started first, so copies being read concurrently are not cached over the one the
+        comment is spliced into, and no copy misses it
+        Arguments:
+            concept_id: [str] the string identifier of the concept commented on
+            created: the row returned by the statement built by create_comment
+        """
+        self.COMMENT_SECTIONS.start_generation()
+        section = self.COMMENT_SECTIONS.get(concept_id)
+        if section is not None and section.add(CommentRecord(*created)):
+            return
+        self.COMMENT_SECTIONS.invalidate_tagged(concept_id)
+
+
+class QueriedSection:
+    """The comments left on a concept, queried a page at a time through a data service
+    Attributes:
+        service: the engagement data service to query with, within its with statement
+        concept_id: identifier of the concept the comments were left on
+    """
+
+    def __init__(self, service: EngagementDataService, concept_id: str):
+        self.service = service
+        self.concept_id = concept_id
+
+    def page(self, response_to: Optional[uuid.UUID], after: Optional[Tuple], limit: int) -> list:
+        """Query the responses to a comment, or the comments starting a thread, oldest first
+        Arguments:
+            response_to: [UUID] the comment whose responses to query, None for top-level comments
+            after: [Tuple] the (created_at, comment_id) of the last comment of the previous page
+            limit: [int] the maximum number of comments to query
+        Returns:
+            [list] the comments of the page
+        """
+        self.service.add_query(self.service.thread_page(self.concept_id, response_to, after, limit))
+        self.service.exec_next()
+        return self.service.results.all()
+
+    def previews(self, page: Sequence, depth: int, width: int) -> list:
+        """Query the responses under a page of comments in display order,
+        reading at most width responses to each comment
+        Arguments:
+            page: [Sequence] the comments whose responses to query, in display order
+            depth: [int] the number of levels of responses to query
+            width: [int] the maximum number of responses to query per comment
+        Returns:
+            [list] the responses
+        """
+        if depth == 0 or not any(row.has_replies for row in page) \
+                or not all(row.path for row in page):
+            return []
+        self.service.add_query(self.service.thread_previews(
+            self.concept_id,
+            [row.path for row in page],
+            depth,
+            width
+            ))
+        self.service.exec_next()
+        return self.service.results.all()
@@ -0,0 +1,292 @@
+"""
+    :module name: graph
+    :module summary: compact in-process copy of the concept link graph for lineage serving
+    :module author: Nathan Mendoza (nathancm@uci.edu)
+"""
+
+import logging
+import threading
+import time
+from array import array
+from typing import Iterable, List, Optional, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+
+class _Adjacency:
+    """Links out of each concept in compressed sparse row form. Concept i links to
+    targets[offsets[i]:offsets[i + 1]]. Links added after the arrays were built
+    are kept per concept until the next compaction
+    Attributes:
+        offsets: where the targets of each concept start, one more than the concept count
+        targets: the concepts linked to, grouped by the concept linked from
+        extra: links added since the arrays were built, by concept linked from
+    """
+
+    def __init__(self, count: int, links: List[Tuple[int, int]]):
+        degrees = array('l', [0]) * (count + 1)
+        for source, _ in links:
+            degrees[source + 1] += 1
+        for i in range(count):
+            degrees[i + 1] += degrees[i]
+        self.offsets = degrees
+        self.targets = array('l', [0]) * len(links)
+        fill = array('l', degrees)
+        for source, target in links:
+            self.targets[fill[source]] = target
+            fill[source] += 1
+        self.extra = {}
+
+    def neighbors(self, node: int) -> List[int]:
+        """List the concepts the given concept links to
+        Arguments:
+            node: [int] interned id of the concept
+        Returns:
+            [List[int]] interned ids of the linked concepts
+        """
+        linked = self.extra.get(node, [])
+        if node + 1 < len(self.offsets):
+            return self.targets[self.offsets[node]:self.offsets[node + 1]].tolist() + linked
+        return linked
+
+    def links(self) -> Iterable[Tuple[int, int]]:
+        """Iterate over every link, compacted or not
+        Returns:
+            [Iterable[Tuple[int, int]]] (from, to) pairs of interned ids
+        """
+        for source in range(len(self.offsets) - 1):
+            for i in range(self.offsets[source], self.offsets[source + 1]):
+                yield source, self.targets[i]
+        for source, targets in self.extra.items():
+            for target in targets:
+                yield source, target
+
+
+class _CompactGraph:
+    """Concept identifiers interned as integers with their links in both directions
+    Attributes:
+        ids: interned id of each concept identifier
+        names: concept identifier of each interned id
+        down: links from ancestors to descendants
+        up: links from descendants to ancestors
+        added: links added since the adjacency arrays were built
+    """
+
+    def __init__(self, links: Iterable[Tuple[str, str]]):
+        self.ids = {}
+        self.names = []
+        edges = [(self.intern(ancestor), self.intern(descendant)) for ancestor, descendant in links]
+        self.down = _Adjacency(len(self.names), edges)
+        self.up = _Adjacency(len(self.names), [(target, source) for source, target in edges])
+        self.added = 0
+
+    def __len__(self) -> int:
+        return len(self.down.targets) + self.added
+
+    def intern(self, identifier: str) -> int:
+        """Obtain the interned id of a concept identifier, assigning one if it has none
+        Arguments:
+            identifier: [str] the concept identifier
+        Returns:
+            [int] the interned id
+        """
+        node = self.ids.get(identifier)
+        if node is None:
+            node = self.ids[identifier] = len(self.names)
+            self.names.append(identifier)
+        return node
+
+    def add(self, ancestor: str, descendant: str) -> bool:
+        """Record a link, compacting the adjacency arrays once enough links were added
+        Arguments:
+            ancestor: [str] identifier of the concept linked from
+            descendant: [str] identifier of the concept linked to
+        Returns:
+            [bool] True if the link was new
+        """
+        source, target = self.intern(ancestor), self.intern(descendant)
+        if target in self.down.neighbors(source):
+            return False
+        self.down.extra.setdefault(source, []).append(target)
+        self.up.extra.setdefault(target, []).append(source)
+        self.added += 1
+        if self.added > max(64, len(self.down.targets) // 8):
+            edges = list(self.down.links())
+            self.down = _Adjacency(len(self.names), edges)
+            self.up = _Adjacency(len(self.names), [(target, source) for source, target in edges])
+            self.added = 0
+        return True
+
+
+class ConceptGraph:  # pylint:disable=too-many-instance-attributes
+    """Thread-safe in-process copy of the concept link graph answering bounded
+    breadth first walks from memory. It is loaded in full from the database,
+    reloaded once older than refresh seconds, and kept current in between by
+    the links created through this process and by catching up on the links
+    numbered after the newest one it holds
+    Attributes:
+        name: label of the graph reported in logs
+        refresh: seconds a load stays current, 0 to keep it until the process exits
+    """
+
+    def __init__(self, name: str, refresh: float):
+        self.name = name
+        self.refresh = refresh
+        self._lock = threading.Lock()
+        self._graph = None
+        self._loaded_at = None
+        self._claimed_at = None
+        self._pending = None
+        self._version = 0
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the graph can answer walks
+        Returns:
+            [bool] True once a load completed
+        """
+        with self._lock:
+            return self._graph is not None
+
+    @property
+    def version(self) -> int:
+        """The number of the newest link read from the database
+        Returns:
+            [int] the highest link id loaded or caught up on, 0 if none
+        """
+        with self._lock:
+            return self._version
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._graph) if self._graph is not None else 0
+
+    def begin_load(self) -> bool:
+        """Claim the next load if one is due and no other thread is loading
+        Returns:
+            [bool] True if the caller must load the graph and call finish_load or abort_load
+        """
+        with self._lock:
+            if self._pending is not None:
+                return False
+            if self._loaded_at is not None \
+                    and (self.refresh <= 0 or time.monotonic() - self._loaded_at < self.refresh):
+                return False
+            self._pending = []
+            self._claimed_at = time.monotonic()
+            return True
+
+    def finish_load(self, links: Iterable[Tuple[str, str]], version: int = 0) -> int:
+        """Replace the graph with the given links and any added while they were read
+        Arguments:
+            links: [Iterable[Tuple[str, str]]] every (ancestor, descendant) link
+            version: [int] the highest link id among them
+        Returns:
+            [int] the number of links loaded
+        """
+        started = time.monotonic()
+        graph = _CompactGraph(links)
+        with self._lock:
+            for ancestor, descendant in self._pending or []:
+                graph.add(ancestor, descendant)
+            self._graph = graph
+            self._loaded_at = self._claimed_at
+            self._pending = None
+            self._version = max(self._version, version)
+            count = len(graph)
+        LOGGER.info(
+                "Loaded %d links into %s in %.1f ms",
+                count,
+                self.name,
+                1000 * (time.monotonic() - started)
+                )
+        return count
+
+    def abort_load(self) -> None:
+        """Give up the claimed load, keeping the current graph"""
+        with self._lock:
+            self._pending = None
+
+    def add_link(self, ancestor: str, descendant: str) -> None:
+        """Record a link committed by this process
+        Arguments:
+            ancestor: [str] identifier of the concept linked from
+            descendant: [str] identifier of the concept linked to
+        """
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((ancestor, descendant))
+            if self._graph is not None:
+                self._graph.add(ancestor, descendant)
+
+    def catch_up(self, links: Iterable[Tuple[str, str]], version: int) -> List[Tuple[str, str]]:
+        """Record links read from the database after the graph was loaded
+        Arguments:
+            links: [Iterable[Tuple[str, str]]] the (ancestor, descendant) links numbered
+                after the graph's version
+            version: [int] the highest link id among them
+        Returns:
+            [List[Tuple[str, str]]] the links the graph did not hold yet
+        """
+        links = list(links)
+        with self._lock:
+            if self._pending is not None:
+                self._pending.extend(links)
+            self._version = max(self._version, version)
+            if self._graph is None:
+                return []
+            added = [link for link in links if self._graph.add(*link)]
+        if added:
+            LOGGER.info("Caught %s up on %d links", self.name, len(added))
+        return added
+
+    def walk(
+            self,
+            identifier: str,
+            depth: int,
+            limit: int,
+            upward: bool = False
+            ) -> Optional[List[Tuple[str, str]]]:
+        """Collect the links leaving the concepts within depth - 1 links of a concept,
+        nearest first, the way the lineage queries do
+        Arguments:
+            identifier: [str] identifier of the concept to start from
+            depth: [int] number of generations to cap at
+            limit: [int] number of links to cap at
+            upward: [bool] walk to ancestors instead of descendants
+        Returns:
+            [Optional[List[Tuple[str, str]]]] (ancestor, descendant) pairs,
+            None if the graph is not loaded or does not know the concept
+        """
+        with self._lock:
+            graph = self._graph
+            start = graph.ids.get(identifier) if graph is not None else None
+            if start is None:
+                return None
+            adjacency = graph.up if upward else graph.down
+            seen = {start}
+            frontier = [start]
+            found = []
+            for _ in range(depth):
+                reached = []
+                for node in frontier:
+                    for linked in adjacency.neighbors(node):
+                        found.append((linked, node) if upward else (node, linked))
+                        if len(found) >= limit:
+                            return self._named(graph.names, found)
+                        if linked not in seen:
+                            seen.add(linked)
+                            reached.append(linked)
+                frontier = reached
+            return self._named(graph.names, found)
+
+    @staticmethod
+    def _named(names: List[str], links: List[Tuple[int, int]]) -> List[Tuple[str, str]]:
+        """Translate interned links back to concept identifiers
+        Arguments:
+            names: [List[str]] the concept identifier of each interned id
+            links: [List[Tuple[int, int]]] (ancestor, descendant) pairs of interned ids
+        Returns:
+            [List[Tuple[str, str]]] (ancestor, descendant) pairs of identifiers
+        """
+        return [(names[ancestor], names[descendant]) for ancestor, descendant in links]
@@ -0,0 +1,69 @@
+"""
+    :module name: pool
+    :module summary: process-wide pool of reusable service providers
+    :module author: Nathan Mendoza (nathancm@uci.edu)
+"""
+
+import logging
+import threading
+from collections import defaultdict
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ServiceProviderPool:
+    """Thread-safe pool that hands out reusable service provider instances.
+    Providers share the process-wide clients (db engine, s3 client) and only
+    hold per-request state, which is reset when a provider is released.
+    Attributes:
+        MAX_IDLE: the maximum number of idle providers kept per service
+    """
+    MAX_IDLE = 64
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle = defaultdict(list)
+
+    def acquire(self, name):
+        """Obtain a provider for the named service, reusing an idle one if possible
+        Arguments:
+            name: [RegisteredService] enum member of known services
+        Returns:
+            API service provider
+        """
+        with self._lock:
+            idle = self._idle[name]
+            if idle:
+                LOGGER.debug("Reusing idle provider for %s", str(name))
+                return idle.pop()
+        LOGGER.debug("No idle provider for %s. Creating one", str(name))
+        return name.value()
+
+    def release(self, name, provider) -> None:
+        """Return a provider to the pool so later requests can reuse it
+        Arguments:
+            name: [RegisteredService] enum member the provider was acquired under
+            provider: the API service provider to return
+        """
+        if not provider.reset():
+            LOGGER.warning("Provider for %s is still busy. Discarding", str(name))
+            return
+        with self._lock:
+            idle = self._idle[name]
+            if len(idle) < self.MAX_IDLE:
+                idle.append(provider)
+
+    def idle_count(self, name) -> int:
+        """Report the number of idle providers kept for the named service
+        Arguments:
+            name: [RegisteredService] enum member of known services
+        Returns:
+            [int] number of providers ready for reuse
+        """
+        with self._lock:
+            return len(self._idle[name])
+
+    def clear(self) -> None:
+        """Drop all idle providers"""
+        with self._lock:
+            self._idle.clear()
@@ -5,22 +5,240 @@
 """
 
 import logging
-from typing import Union, Optional
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Union, Optional, Dict, List, Tuple
 
-from sqlalchemy import create_engine, URL, Result
+import psycopg
+from sqlalchemy import create_engine, URL, Result, Engine, Connection
+from sqlalchemy.engine import IteratorResult
+from sqlalchemy.engine.result import SimpleResultMetaData
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncConnection, AsyncEngine
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.sql.expression import Select, Update, Delete
+from sqlalchemy.types import TypeEngine
 
+from .statements import STATEMENTS, BoundStatement
 from ..config import ServiceConfig
 from ..exceptions import NoQueryToRunError, NoSessionToQueryOnError
 
 LOGGER = logging.getLogger(__name__)
 
 
-class QueryService:
-    """A class wrapping database connection and transactions
+class PoolMonitor:
+    """Thread-safe accumulator of connection checkout statistics for an engine
+    Attributes:
+        name: label of the engine being monitored
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        """Record the time spent waiting on a successful connection checkout
+        Arguments:
+            seconds: [float] time spent waiting for the connection
+        """
+        with self._lock:
+            self._checkouts += 1
+            self._total_wait += seconds
+            self._max_wait = max(self._max_wait, seconds)
+
+    def record_timeout(self) -> None:
+        """Record a checkout that gave up waiting for a connection"""
+        with self._lock:
+            self._timeouts += 1
+
+    def snapshot(self, engine) -> Dict[str, Union[str, int, float]]:
+        """Report the current state of the given engine's pool with recorded waits
+        Arguments:
+            engine: the sqlalchemy engine this monitor tracks
+        Returns:
+            [Dict] pool statistics keyed by name
+        """
+        pool = engine.pool
+        is_queue = isinstance(pool, QueuePool)
+        with self._lock:
+            avg_wait = self._total_wait / self._checkouts if self._checkouts else 0.0
+            return {
+                    'name': self.name,
+                    'pool_size': pool.size() if is_queue else 0,
+                    'checked_out': pool.checkedout() if is_queue else 0,
+                    'checked_in': pool.checkedin() if is_queue else 0,
+                    'overflow': pool.overflow() if is_queue else 0,
+                    'checkouts': self._checkouts,
+                    'timeouts': self._timeouts,
+                    'avg_wait_ms': 1000 * avg_wait,
+                    'max_wait_ms': 1000 * self._max_wait
+                    }
+
+
+
+class ReplicaSet:
+    """Read replicas of the application db and the policy balancing sessions across them
+    Attributes:
+        ROUND_ROBIN: balance by handing out replicas in turn
+        LEAST_CONNECTIONS: balance by handing out the replica with the fewest checkouts
+        engines: the engines of each replica
+        async_engines: the asyncio engines of each replica
+    """
+    ROUND_ROBIN = 'round-robin'
+    LEAST_CONNECTIONS = 'least-connections'
+
+    def __init__(self, dsns: List[str], balancing: str, **pool_options):
+        if balancing not in (self.ROUND_ROBIN, self.LEAST_CONNECTIONS):
+            LOGGER.warning("Unknown replica balancing %s. Using %s", balancing, self.ROUND_ROBIN)
+            balancing = self.ROUND_ROBIN
+        self._balancing = balancing
+        self._lock = threading.Lock()
+        self._turn = 0
+        self.engines = [create_engine(dsn, **pool_options) for dsn in dsns]
+        self.async_engines = [create_async_engine(dsn, **pool_options) for dsn in dsns]
+        self._monitors = {}
+        for i, (engine, async_engine) in enumerate(zip(self.engines, self.async_engines)):
+            self._monitors[engine] = PoolMonitor(f'replica-{i}')
+            self._monitors[async_engine.sync_engine] = PoolMonitor(f'replica-{i}-async')
+
+    def __len__(self) -> int:
+        return len(self.engines)
+
+    def choose(self, asynchronous: bool = False) -> Union[Engine, AsyncEngine]:
+        """Pick the replica the next read-only unit of work should use
+        Arguments:
+            asynchronous: [bool] pick among the asyncio engines instead
+        Returns:
+            [Engine | AsyncEngine] the engine of the chosen replica
+        """
+        engines = self.async_engines if asynchronous else self.engines
+        if self._balancing == self.LEAST_CONNECTIONS:
+            return min(
+                    engines,
+                    key=lambda engine: engine.pool.checkedout()
+                    if isinstance(engine.pool, QueuePool) else 0
+                    )
+        with self._lock:
+            self._turn = (self._turn + 1) % len(engines)
+            return engines[self._turn]
+
+    def monitor_for(self, engine: Engine) -> Optional[PoolMonitor]:
+        """Find the monitor tracking the given replica engine
+        Arguments:
+            engine: [Engine] the (sync) engine of a replica
+        Returns:
+            [Optional[PoolMonitor]] the monitor, None if the engine is not a replica
+        """
+        return self._monitors.get(engine)
+
+    def statistics(self) -> List[Dict[str, Union[str, int, float]]]:
+        """Report the connection pool statistics of every replica engine
+        Returns:
+            [List[Dict]] one set of statistics per engine
+        """
+        return [monitor.snapshot(engine) for engine, monitor in self._monitors.items()]
+
+
+class WriteTracker:
+    """Thread-safe record of the accounts that recently wrote to the primary through
+    this process. Other workers keep their own, so only reads handled by the worker
+    that handled the write are kept on the primary
+    Attributes:
+        window: seconds after a write during which the writer's reads use the primary
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._lock = threading.Lock()
+        self._writes = {}
+
+    def record(self, account: str) -> None:
+        """Note that the given account just committed a write
+        Arguments:
+            account: [str] display name of the writer
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._writes[account] = now
+            expired = [k for k, v in self._writes.items() if now - v > self.window]
+            for key in expired:
+                del self._writes[key]
+
+    def wrote_recently(self, account: Optional[str]) -> bool:
+        """Check if the given account committed a write within the window
+        Arguments:
+            account: [Optional[str]] display name of the reader, if known
+        Returns:
+            [bool] True if the account's reads must see the primary
+        """
+        if account is None or self.window <= 0:
+            return False
+        with self._lock:
+            written = self._writes.get(account)
+        return written is not None and time.monotonic() - written <= self.window
+
+
+class RoutingSession(Session):  # pylint:disable=too-few-public-methods
+    """Session sending selections to a replica and everything else to the primary.
+    A replica is chosen once per session. Once the session writes, it is pinned
+    to the primary for the rest of the transaction
+    Attributes:
+        pinned: whether every statement of this session must use the primary
+        wrote: whether this session ran anything other than a selection
+    """
+
+    def __init__(
+            self,
+            bind: Engine,
+            replicas: Optional[ReplicaSet] = None,
+            asynchronous: bool = False,
+            pinned: bool = False,
+            **kwargs
+            ):
+        super().__init__(bind=bind, **kwargs)
+        self._primary = bind
+        self._replicas = replicas
+        self._asynchronous = asynchronous
+        self._replica = None
+        self.pinned = pinned
+        self.wrote = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):  # pylint:disable=unused-argument
+        """Choose the engine the given clause runs on
+        Arguments:
+            mapper: the mapped class involved, if any
+            clause: the statement about to run, if any
+        Returns:
+            [Engine] a replica for selections of unpinned sessions, the primary otherwise
+        """
+        if self._flushing or (clause is not None and not isinstance(clause, Select)):
+            self.pinned = True
+            self.wrote = True
+        if self.pinned or not self._replicas or not isinstance(clause, Select):
+            return self._primary
+        if self._replica is None:
+            replica = self._replicas.choose(self._asynchronous)
+            self._replica = replica.sync_engine if self._asynchronous else replica
+            LOGGER.debug("Routing selections to replica %s", self._replica.url.host)
+        return self._replica
+
+
+class QueryService:  # pylint:disable=too-many-instance-attributes
+    """A class wrapping database connection and transactions.
+    Units of work that only select run on a read-only autocommit connection;
+    a transactional session is opened once anything else needs to run
     Attributes:
         ENGINE: the db engine used by the service.
+        ASYNC_ENGINE: the asyncio db engine used by the service within async with
+        REPLICAS: read replicas selection-only sessions are routed to
+        RECENT_WRITES: accounts whose reads stay on the primary after writing
         query_buffer: the list of queued queries to execute
         results: results of the last executed query
     """
@@ -32,17 +250,62 @@ class QueryService:
                         port=ServiceConfig.DataBase.DBPORT,
                         database=ServiceConfig.DataBase.DBNAME
                         )
-    ENGINE = create_engine(CONNINFO)
+    POOL_OPTIONS = {
+            'pool_size': ServiceConfig.DataBase.DBPOOLSIZE,
+            'max_overflow': ServiceConfig.DataBase.DBPOOLOVERFLOW,
+            'pool_pre_ping': ServiceConfig.DataBase.DBPOOLPREPING,
+            'pool_recycle': ServiceConfig.DataBase.DBPOOLRECYCLE,
+            'pool_timeout': ServiceConfig.DataBase.DBPOOLTIMEOUT,
+            'connect_args': STATEMENTS.connect_args()
+            }
+    ENGINE = create_engine(CONNINFO, **POOL_OPTIONS)
+    ASYNC_ENGINE = create_async_engine(CONNINFO, **POOL_OPTIONS)
+    POOL_MONITOR = PoolMonitor('primary')
+    ASYNC_POOL_MONITOR = PoolMonitor('primary-async')
+    REPLICAS = ReplicaSet(
+            ServiceConfig.DataBase.DBREPLICAS,
+            ServiceConfig.DataBase.DBREPLICABALANCING,
+            **POOL_OPTIONS
+            )
+    RECENT_WRITES = WriteTracker(ServiceConfig.DataBase.DBREADYOURWRITES)
 
     def __init__(self):
-        self._query_buffer = []
+        self._query_buffer = deque()
         self._query_results = None
+        self._active = False
+        self._async_active = False
         self._session = None
+        self._async_session = None
+        self._connection = None
+        self._async_connection = None
+        self._actor = None
+        self._connected = set()
+
+    def reset(self) -> bool:
+        """Clear the per-request state so this provider can be reused
+        Returns:
+            [bool] True if the provider was reset, False if a session is still open
+        """
+        if self._active or self._async_active:
+            LOGGER.warning("Cannot reset a service with an active session")
+            return False
+        self._query_buffer.clear()
+        self._query_results = None
+        self._actor = None
+        return True
 
-    def add_query(self, query: Union[Select, Update, Delete]) -> None:
+    def acting_as(self, account: str) -> None:
+        """Identify the account on whose behalf queries are run
+        so its reads follow its own recent writes to the primary
+        Arguments:
+            account: [str] display name of the requesting account
+        """
+        self._actor = account
+
+    def add_query(self, query: Union[Select, Update, Delete, BoundStatement]) -> None:
         """Adds the given query to the query buffer
         Arguments:
-            query: [Select | Update | Delete] a sqlalchemy stmt
+            query: [Select | Update | Delete | BoundStatement] a sqlalchemy stmt
         Returns:
             None
         """
@@ -61,7 +324,162 @@ class QueryService:
         Raises:
              if no next query is queued
         """
-        if not self._session:
+        self._check_ready(self._active)
+        stmt, params = self._unpack(self._query_buffer.popleft())
+        executor, _ = self._executor(stmt, self._pending_statements(stmt))
+        self._query_results = executor.execute(stmt, params)
+        LOGGER.debug("Executed query: %s", str(stmt))
+
+    def exec_streamed(self, batch_size: int) -> None:
+        """Execute the next query in the buffer through a server-side cursor.
+        Rows are fetched batch_size at a time as the results are consumed, for which
+        the unit of work runs in a transaction, on a replica for selections
+        Arguments:
+            batch_size: [int] the number of rows fetched per round trip
+        Raises:
+            NoSessionToQueryOnError: if there is no active session
+            NoQueryToRunError: if no next query is queued
+        """
+        self._check_ready(self._active)
+        stmt, params = self._unpack(self._query_buffer.popleft())
+        executor, _ = self._executor(stmt, self._pending_statements(stmt), transactional=True)
+        self._query_results = executor.execute(
+                stmt,
+                params,
+                execution_options={'stream_results': True, 'yield_per': batch_size}
+                )
+        LOGGER.debug("Streaming query: %s", str(stmt))
+
+    def exec_all(self) -> List[Result]:
+        """Execute every query in the buffer.
+        When the buffer only holds selections of columns, run by a psycopg connection
+        whose libpq supports it, the queries are sent in a single round trip using
+        psycopg's pipeline mode. Selections of whole ORM entities are executed one by one
+        Returns:
+            [List[Result]] results of each query in the order they were queued
+        Raises:
+            NoSessionToQueryOnError: if there is no active session
+            NoQueryToRunError: if no query is queued
+        """
+        self._check_ready(self._active)
+        statements = [self._unpack(query) for query in self._query_buffer]
+        self._query_buffer.clear()
+        executor, connection = self._executor(
+                statements[0][0],
+                [stmt for stmt, _ in statements]
+                )
+        driver_connection = connection.connection.driver_connection
+        if isinstance(driver_connection, psycopg.Connection) and psycopg.Pipeline.is_supported() \
+                and all(self._selects_columns(stmt) for stmt, _ in statements):
+            results = self._exec_pipelined(connection.dialect, driver_connection, statements)
+        else:
+            results = [executor.execute(stmt, params) for stmt, params in statements]
+        self._query_results = results[-1]
+        LOGGER.debug("Executed %d queries", len(results))
+        return results
+
+    @staticmethod
+    def _selects_columns(stmt) -> bool:
+        """Whether a statement is a selection whose rows hold only column values,
+        which can be built without the ORM
+        Arguments:
+            stmt: the statement to check
+        Returns:
+            [bool] True if the statement only selects columns
+        """
+        return isinstance(stmt, Select) and all(
+                isinstance(column['type'], TypeEngine) for column in stmt.column_descriptions
+                )
+
+    @staticmethod
+    def _exec_pipelined(
+            dialect,
+            driver_connection,
+            statements: List[Tuple[Select, Optional[Dict[str, Any]]]]
+            ) -> List[Result]:
+        """Send the given selections through the driver in a single pipeline.
+        Values are converted by the result processors of the dialect, as they
+        would be when executed through sqlalchemy
+        Arguments:
+            dialect: the sqlalchemy dialect to compile the selections with
+            driver_connection: [psycopg.Connection] the connection the session is using
+            statements: [List[Tuple]] the selections to run with their parameters
+        Returns:
+            [List[Result]] results of each selection in order
+        """
+        cursors = []
+        with driver_connection.pipeline():
+            for stmt, params in statements:
+                compiled = stmt.compile(
+                        dialect=dialect,
+                        compile_kwargs={'render_postcompile': True}
+                        )
+                cursor = driver_connection.cursor()
+                cursor.execute(compiled.string, compiled.construct_params(params))
+                cursors.append(cursor)
+        LOGGER.debug("Pipelined %d queries", len(cursors))
+        results = []
+        for (stmt, _), cursor in zip(statements, cursors):
+            with cursor:
+                processors = [
+                        column.type.dialect_impl(dialect).result_processor(dialect, field.type_code)
+                        for column, field in zip(stmt.selected_columns, cursor.description)
+                        ]
+                rows = [
+                        tuple(value if process is None else process(value)
+                              for process, value in zip(processors, row))
+                        for row in cursor.fetchall()
+                        ]
+                results.append(IteratorResult(
+                    SimpleResultMetaData([field.name for field in cursor.description]),
+                    iter(rows)
+                    ))
+        return results
+
+    async def exec_next_async(self) -> None:
+        """Asynchronous counterpart of exec_next for use within an async with statement
+        Returns:
+            None
+        Raises:
+            NoSessionToQueryOnError: if there is no active async session
+            NoQueryToRunError: if no next query is queued
+        """
+        self._check_ready(self._async_active)
+        stmt, params = self._unpack(self._query_buffer.popleft())
+        executor = await self._executor_async(stmt, self._pending_statements(stmt))
+        self._query_results = await executor.execute(stmt, params)
+        LOGGER.debug("Executed query: %s", str(stmt))
+
+    @staticmethod
+    def _unpack(query) -> Tuple[Union[Select, Update, Delete], Optional[Dict[str, Any]]]:
+        """Separate a queued query into the statement and its parameter values
+        Arguments:
+            query: [Select | Update | Delete | BoundStatement] a queued query
+        Returns:
+            [Tuple] the statement to execute and its parameters, if any
+        """
+        if isinstance(query, BoundStatement):
+            return query.statement, query.params
+        return query, None
+
+    def _pending_statements(self, stmt) -> List[Union[Select, Update, Delete]]:
+        """List the statement about to run followed by the ones still queued
+        Arguments:
+            stmt: the statement about to run
+        Returns:
+            [List] the statements left in this unit of work
+        """
+        return [stmt] + [self._unpack(query)[0] for query in self._query_buffer]
+
+    def _check_ready(self, active: bool) -> None:
+        """Verify a query can be executed
+        Arguments:
+            active: whether the sync or async context expected to execute the query was entered
+        Raises:
+            NoSessionToQueryOnError: if the session is not defined
+            NoQueryToRunError: if no next query is queued
+        """
+        if not active:
             LOGGER.error("Attempted to execute a query without an active session")
             raise NoSessionToQueryOnError(
                     "The session for this service is not defined."
@@ -74,9 +492,155 @@ class QueryService:
                     " Enqueue one by calling QueryService.add_query()"
                     )
 
-        stmt = self._query_buffer.pop(0)
-        self._query_results = self._session.execute(stmt)
-        LOGGER.debug("Executed query: %s", str(stmt))
+    def _executor(
+            self,
+            stmt,
+            pending: List,
+            transactional: bool = False
+            ) -> Tuple[Union[Session, Connection], Connection]:
+        """Pick what runs the statement. Until a session is needed, units of work
+        that only select run on a read-only autocommit connection, skipping the
+        ORM session along with its BEGIN and COMMIT round trips
+        Arguments:
+            stmt: the statement about to run
+            pending: the statements left in this unit of work
+            transactional: [bool] whether the statement must run within a transaction
+        Returns:
+            [Tuple] the session or connection to execute with, and its connection
+        """
+        selects_only = all(isinstance(query, Select) for query in pending)
+        if self._session is None and selects_only and not transactional:
+            if self._connection is None:
+                engine = self._readonly_engine(asynchronous=False)
+                with self._timed_checkout(engine):
+                    self._connection = engine.connect()
+                self._connection.execution_options(isolation_level='AUTOCOMMIT')
+                LOGGER.info("Start read-only DB connection.")
+            return self._connection, self._connection
+        if self._session is None:
+            self._session = RoutingSession(
+                    self.ENGINE,
+                    replicas=self.REPLICAS,
+                    pinned=not selects_only or self.RECENT_WRITES.wrote_recently(self._actor)
+                    )
+            LOGGER.info("Start DB session.")
+        return self._session, self._checkout(stmt)
+
+    async def _executor_async(self, stmt, pending: List) -> Union[AsyncSession, AsyncConnection]:
+        """Asynchronous counterpart of _executor for the async path
+        Arguments:
+            stmt: the statement about to run
+            pending: the statements left in this unit of work
+        Returns:
+            [AsyncSession | AsyncConnection] the session or connection to execute with
+        """
+        if self._async_session is None and all(isinstance(query, Select) for query in pending):
+            if self._async_connection is None:
+                engine = self._readonly_engine(asynchronous=True)
+                with self._timed_checkout(engine.sync_engine):
+                    self._async_connection = await engine.connect()
+                await self._async_connection.execution_options(isolation_level='AUTOCOMMIT')
+                LOGGER.info("Start read-only async DB connection.")
+            return self._async_connection
+        if self._async_session is None:
+            self._async_session = AsyncSession(
+                    self.ASYNC_ENGINE,
+                    sync_session_class=RoutingSession,
+                    replicas=self.REPLICAS,
+                    asynchronous=True,
+                    pinned=True
+                    )
+            LOGGER.info("Start async DB session.")
+        await self._checkout_async(stmt)
+        return self._async_session
+
+    def _readonly_engine(self, asynchronous: bool) -> Union[Engine, AsyncEngine]:
+        """Choose the engine a read-only unit of work runs on
+        Arguments:
+            asynchronous: [bool] choose among the asyncio engines instead
+        Returns:
+            [Engine | AsyncEngine] a replica, or the primary if the actor wrote recently
+        """
+        if len(self.REPLICAS) == 0 or self.RECENT_WRITES.wrote_recently(self._actor):
+            return self.ASYNC_ENGINE if asynchronous else self.ENGINE
+        return self.REPLICAS.choose(asynchronous)
+
+    @classmethod
+    @contextmanager
+    def _timed_checkout(cls, engine: Engine):
+        """Record the time spent checking out a connection from the given engine
+        Arguments:
+            engine: [Engine] the (sync) engine a connection is checked out from
+        Raises:
+            sqlalchemy.exc.TimeoutError: if the pool has no connection available in time
+        """
+        monitor = cls._monitor_for(engine)
+        start = time.perf_counter()
+        try:
+            yield
+        except PoolTimeoutError:
+            LOGGER.error("Timed out waiting for a pooled connection from %s", monitor.name)
+            monitor.record_timeout()
+            raise
+        monitor.record_wait(time.perf_counter() - start)
+
+    def _checkout(self, stmt=None) -> Connection:
+        """Acquire the connection the session routes the statement to,
+        recording the time spent waiting if it had to be checked out
+        Arguments:
+            stmt: the statement about to run, None for the primary
+        Returns:
+            [Connection] the connection the statement will run on
+        Raises:
+            sqlalchemy.exc.TimeoutError: if the pool has no connection available in time
+        """
+        engine = self._session.get_bind(clause=stmt)
+        if engine in self._connected:
+            return self._session.connection(bind_arguments={'bind': engine})
+        with self._timed_checkout(engine):
+            connection = self._session.connection(bind_arguments={'bind': engine})
+        self._connected.add(engine)
+        return connection
+
+    async def _checkout_async(self, stmt=None) -> AsyncConnection:
+        """Asynchronous counterpart of _checkout for the async session
+        Arguments:
+            stmt: the statement about to run, None for the primary
+        Returns:
+            [AsyncConnection] the connection the statement will run on
+        Raises:
+            sqlalchemy.exc.TimeoutError: if the pool has no connection available in time
+        """
+        engine = self._async_session.sync_session.get_bind(clause=stmt)
+        if engine in self._connected:
+            return await self._async_session.connection(bind_arguments={'bind': engine})
+        with self._timed_checkout(engine):
+            connection = await self._async_session.connection(bind_arguments={'bind': engine})
+        self._connected.add(engine)
+        return connection
+
+    @classmethod
+    def _monitor_for(cls, engine: Engine) -> PoolMonitor:
+        """Find the monitor tracking the given engine
+        Arguments:
+            engine: [Engine] the (sync) engine a connection is checked out from
+        Returns:
+            [PoolMonitor] the replica's monitor, or the primary's otherwise
+        """
+        if engine is cls.ASYNC_ENGINE.sync_engine:
+            return cls.ASYNC_POOL_MONITOR
+        return cls.REPLICAS.monitor_for(engine) or cls.POOL_MONITOR
+
+    @classmethod
+    def pool_statistics(cls) -> List[Dict[str, Union[str, int, float]]]:
+        """Report the connection pool statistics of every engine used by the service
+        Returns:
+            [List[Dict]] one set of statistics per engine
+        """
+        return [
+                cls.POOL_MONITOR.snapshot(cls.ENGINE),
+                cls.ASYNC_POOL_MONITOR.snapshot(cls.ASYNC_ENGINE.sync_engine)
+                ] + cls.REPLICAS.statistics()
 
     @property
     def results(self) -> Optional[Result]:
@@ -92,17 +656,55 @@ class QueryService:
         return self._query_results
 
     def __enter__(self):
-        self._session = Session(self.ENGINE)
-        LOGGER.info("Start DB session.")
+        self._active = True
         return self
 
     def __exit__(self, exc_type, exc_val, traceback):
-        LOGGER.info("Stop DB session.")
-        if exc_val:
-            LOGGER.error("Exception during transaction. ROLLBACK")
-            self._session.rollback()
-        else:
-            LOGGER.info("No issues during transaction. COMMIT")
-            self._session.commit()
-        self._session.close()
-        self._session = None
+        if self._session is not None:
+            LOGGER.info("Stop DB session.")
+            if exc_val:
+                LOGGER.error("Exception during transaction. ROLLBACK")
+                self._session.rollback()
+            else:
+                LOGGER.info("No issues during transaction. COMMIT")
+                self._session.commit()
+                self._note_writes(self._session)
+            self._session.close()
+            self._session = None
+        if self._connection is not None:
+            LOGGER.info("Stop read-only DB connection.")
+            self._connection.close()
+            self._connection = None
+        self._connected.clear()
+        self._active = False
+
+    async def __aenter__(self):
+        self._async_active = True
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, traceback):
+        if self._async_session is not None:
+            LOGGER.info("Stop async DB session.")
+            if exc_val:
+                LOGGER.error("Exception during transaction. ROLLBACK")
+                await self._async_session.rollback()
+            else:
+                LOGGER.info("No issues during transaction. COMMIT")
+                await self._async_session.commit()
+                self._note_writes(self._async_session.sync_session)
+            await self._async_session.close()
+            self._async_session = None
+        if self._async_connection is not None:
+            LOGGER.info("Stop read-only async DB connection.")
+            await self._async_connection.close()
+            self._async_connection = None
+        self._connected.clear()
+        self._async_active = False
+
+    def _note_writes(self, session: RoutingSession) -> None:
+        """Remember the acting account wrote if the committed session wrote
+        Arguments:
+            session: [RoutingSession] the session that was just committed
+        """
+        if session.wrote and self._actor is not None:
+            self.RECENT_WRITES.record(self._actor)
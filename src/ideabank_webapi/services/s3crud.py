@@ -5,9 +5,14 @@
 """
 
 import logging
+import threading
+from typing import List
 
 import boto3
+from botocore.config import Config
 
+from .cache import BoundedCache
+from .presign import SigV4Presigner
 from ..config import ServiceConfig
 
 LOGGER = logging.getLogger(__name__)
@@ -17,17 +22,55 @@ class S3Crud:
     """Class that interfaces with S3 storage provide CRUD operations
     Attributes:
         s3_client: connection to an s3 compatible stores
+        LINK_TLL: seconds a signed link stays valid
+        LINK_MIN_TTL: seconds of validity a cached link must have left to be handed out
+        SIGNED_LINKS: process-wide cache of signed links keyed by (method, key)
     """
     LINK_TLL = 300
+    LINK_MIN_TTL = ServiceConfig.FileBucket.LINK_MIN_TTL
+    SIGNED_LINKS = BoundedCache('signed-links', ServiceConfig.FileBucket.LINK_CACHE_SIZE)
+    _SHARED_CLIENT = None
+    _PRESIGNER = None
+    _CLIENT_LOCK = threading.Lock()
 
     def __init__(self):
-        self._s3_client = boto3.session.Session().client(
-                's3',
-                endpoint_url=ServiceConfig.FileBucket.BUCKET_HOST,
-                region_name=ServiceConfig.FileBucket.BUCKET_REGION,
-                aws_access_key_id=ServiceConfig.FileBucket.BUCKET_KEY,
-                aws_secret_access_key=ServiceConfig.FileBucket.BUCKET_SECRET
-                )
+        self._s3_client = S3Crud.shared_client()
+
+    @staticmethod
+    def shared_client():
+        """Obtain the process-wide s3 client, creating it on first use.
+        boto3 clients are thread-safe, so one client serves every provider
+        Returns:
+            the shared boto3 s3 client
+        """
+        if S3Crud._SHARED_CLIENT is None:
+            with S3Crud._CLIENT_LOCK:
+                if S3Crud._SHARED_CLIENT is None:
+                    LOGGER.info("Creating shared s3 client")
+                    session = boto3.session.Session(
+                            region_name=ServiceConfig.FileBucket.BUCKET_REGION,
+                            aws_access_key_id=ServiceConfig.FileBucket.BUCKET_KEY,
+                            aws_secret_access_key=ServiceConfig.FileBucket.BUCKET_SECRET
+                            )
+                    client = session.client(
+                            's3',
+                            endpoint_url=ServiceConfig.FileBucket.BUCKET_HOST,
+                            config=Config(signature_version='s3v4')
+                            )
+                    S3Crud._PRESIGNER = SigV4Presigner.for_client(
+                            client,
+                            session.get_credentials(),
+                            ServiceConfig.FileBucket.BUCKET_NAME
+                            )
+                    S3Crud._SHARED_CLIENT = client
+        return S3Crud._SHARED_CLIENT
+
+    def reset(self) -> bool:
+        """S3 providers hold no per-request state
+        Returns:
+            [bool] always True
+        """
+        return True
 
     def put_item(self, key: str) -> str:
         """Provides a link to put an item in file store bucket with the given key
@@ -35,14 +78,7 @@ class S3Crud:
             key: unique string that indexes the data. Can be path like
         """
         LOGGER.debug("Generating upload link for %s", key)
-        return self._s3_client.generate_presigned_url(
-                ClientMethod='put_object',
-                Params={
-                    'Bucket': ServiceConfig.FileBucket.BUCKET_NAME,
-                    'Key': key
-                    },
-                ExpiresIn=self.LINK_TLL
-                )
+        return self._signed_link('put_object', key)
 
     def share_item(self, key) -> str:
         """Provide a share link to object with the given key
@@ -52,8 +88,56 @@ class S3Crud:
             [str]: a url to access the object
         """
         LOGGER.debug("Generating share link for object at %s", key)
+        return self._signed_link('get_object', key)
+
+    def share_items(self, keys: List[str]) -> List[str]:
+        """Provide share links to each object with the given keys.
+        Links missing from the cache are signed together in one batch
+        Arguments:
+            keys: [List[str]] string indices of the objects to share
+        Returns:
+            [List[str]]: a url to access each object, in order
+        """
+        links = [self.SIGNED_LINKS.get(('get_object', key)) for key in keys]
+        unsigned = list(dict.fromkeys(key for key, link in zip(keys, links) if link is None))
+        if not unsigned:
+            return links
+        LOGGER.debug("Generating share links for %d objects", len(unsigned))
+        if S3Crud._PRESIGNER is None:
+            signed = [self._sign('get_object', key) for key in unsigned]
+        else:
+            signed = S3Crud._PRESIGNER.presign(unsigned, self.LINK_TLL)
+        fresh = dict(zip(unsigned, signed))
+        for key, link in fresh.items():
+            self.SIGNED_LINKS.put(('get_object', key), link, ttl=self.LINK_TLL - self.LINK_MIN_TTL)
+        return [link if link is not None else fresh[key] for key, link in zip(keys, links)]
+
+    def _signed_link(self, method: str, key: str) -> str:
+        """Sign a link for the given client method on the object with the given key.
+        A cached link is reused while at least LINK_MIN_TTL seconds of it remain
+        Arguments:
+            method: [str] the s3 client method the link grants
+            key: [str] string index of the object
+        Returns:
+            [str]: the signed url
+        """
+        link = self.SIGNED_LINKS.get((method, key))
+        if link is not None:
+            return link
+        link = self._sign(method, key)
+        self.SIGNED_LINKS.put((method, key), link, ttl=self.LINK_TLL - self.LINK_MIN_TTL)
+        return link
+
+    def _sign(self, method: str, key: str) -> str:
+        """Sign a link for the given client method on the object with the given key using boto3
+        Arguments:
+            method: [str] the s3 client method the link grants
+            key: [str] string index of the object
+        Returns:
+            [str]: the signed url
+        """
         return self._s3_client.generate_presigned_url(
-                ClientMethod='get_object',
+                ClientMethod=method,
                 Params={
                     'Bucket': ServiceConfig.FileBucket.BUCKET_NAME,
                     'Key': key
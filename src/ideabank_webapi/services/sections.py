@@ -0,0 +1,145 @@
+"""
+    :module name: sections
+    :module summary: in-process copy of the comments left on a concept, served a page at a time
+    :module author: Nathan Mendoza (nathancm@uci.edu)
+"""
+
+import bisect
+import logging
+import threading
+from typing import Any, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+
+class CommentRecord(NamedTuple):
+    """A comment as read from the comments table
+    Attributes:
+        comment_id: identifier of the comment
+        parent: the comment responded to, None if the comment starts a thread
+        comment_by: display name of the comment's author
+        free_text: contents of the comment
+        created_at: the time the comment was created at
+        path: the materialized path of the comment
+        preferred_name: the name the comment's author displays, None if unknown
+        has_replies: whether anyone responded to the comment
+    """
+    comment_id: Any
+    parent: Optional[Any]
+    comment_by: str
+    free_text: str
+    created_at: Any
+    path: Optional[str]
+    preferred_name: Optional[str] = None
+    has_replies: bool = False
+
+
+class CommentSection:
+    """Thread-safe copy of every comment left on a concept, indexed by the comment
+    each one responds to and kept oldest first, so pages of threads and their
+    previews are read without querying. New comments are spliced in as they are created
+    Attributes:
+        concept_id: identifier of the concept the comments were left on
+    """
+
+    def __init__(self, concept_id: str, records: Iterable):
+        self.concept_id = concept_id
+        self._lock = threading.Lock()
+        self._records = {}
+        self._responses = {}
+        for record in records:
+            self._records[record.comment_id] = CommentRecord(
+                    record.comment_id,
+                    record.parent,
+                    record.comment_by,
+                    record.free_text,
+                    record.created_at,
+                    record.path,
+                    record.preferred_name
+                    )
+            self._responses.setdefault(record.parent, []).append(
+                    (record.created_at, record.comment_id)
+                    )
+        for responses in self._responses.values():
+            responses.sort()
+        LOGGER.debug("Copied %d comments left on %s", len(self._records), concept_id)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._records)
+
+    def add(self, record: CommentRecord) -> bool:
+        """Splice a newly created comment under the comment it responds to
+        Arguments:
+            record: [CommentRecord] the comment created
+        Returns:
+            [bool] False if the comment it responds to is unknown, so the copy is out of date
+        """
+        with self._lock:
+            if record.comment_id in self._records:
+                return True
+            if record.parent is not None and record.parent not in self._records:
+                return False
+            self._records[record.comment_id] = record._replace(has_replies=False)
+            bisect.insort(
+                    self._responses.setdefault(record.parent, []),
+                    (record.created_at, record.comment_id)
+                    )
+            return True
+
+    def page(
+            self,
+            response_to: Optional[Any],
+            after: Optional[Tuple],
+            limit: int
+            ) -> List[CommentRecord]:
+        """List the responses to a comment, or the comments starting a thread, oldest first
+        Arguments:
+            response_to: the comment whose responses to list, None for top-level comments
+            after: [Tuple] the (created_at, comment_id) of the last comment of the previous page
+            limit: [int] the maximum number of comments to list
+        Returns:
+            [List[CommentRecord]] the comments of the page
+        """
+        with self._lock:
+            responses = self._responses.get(response_to, [])
+            start = bisect.bisect_right(responses, tuple(after)) if after is not None else 0
+            return [self._record(key[1]) for key in responses[start:start + limit]]
+
+    def previews(
+            self,
+            page: Sequence,
+            depth: int,
+            width: int
+            ) -> List[CommentRecord]:
+        """List the responses under a page of comments in display order
+        Arguments:
+            page: [Sequence] the comments whose responses to list, in display order
+            depth: [int] the number of levels of responses to list
+            width: [int] the maximum number of responses to list per comment
+        Returns:
+            [List[CommentRecord]] the responses
+        """
+        with self._lock:
+            found = []
+            stack = [(row.comment_id, 0, False) for row in reversed(page)]
+            while stack:
+                comment_id, level, listed = stack.pop()
+                if listed:
+                    found.append(self._record(comment_id))
+                if level < depth:
+                    responses = self._responses.get(comment_id, [])[:width]
+                    stack.extend((key[1], level + 1, True) for key in reversed(responses))
+            return found
+
+    def _record(self, comment_id: Any) -> CommentRecord:
+        """Look up a comment, noting whether anyone responded to it.
+        The caller must hold the lock
+        Arguments:
+            comment_id: the comment to look up
+        Returns:
+            [CommentRecord] the comment
+        """
+        return self._records[comment_id]._replace(
+                has_replies=bool(self._responses.get(comment_id))
+                )
@@ -0,0 +1,107 @@
+"""
+    :module name: statements
+    :module summary: process-wide registry of parameterized statement templates
+    :module author: Nathan Mendoza (nathancm@uci.edu)
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from sqlalchemy.sql.expression import Executable
+
+from ..config import ServiceConfig
+
+LOGGER = logging.getLogger(__name__)
+
+
+class BoundStatement(NamedTuple):
+    """A statement template paired with the parameter values to execute it with
+    Attributes:
+        statement: the shared sqlalchemy statement template
+        params: values for the template's bound parameters
+    """
+    statement: Executable
+    params: Dict[str, Any]
+
+    def __str__(self) -> str:
+        return str(self.statement)
+
+
+class StatementRegistry:
+    """Thread-safe registry building each statement template once per process.
+    Reusing the same template object lets sqlalchemy skip statement construction
+    and reuse its compiled form, while the database can reuse a prepared plan
+    Attributes:
+        prepare_threshold: executions before psycopg prepares a statement server-side
+    """
+
+    def __init__(self, prepare_threshold: Optional[int] = None, pgbouncer: bool = False):
+        self._lock = threading.Lock()
+        self._templates = {}
+        self._prepare_threshold = prepare_threshold
+        self._pgbouncer = pgbouncer
+
+    @property
+    def prepare_threshold(self) -> Optional[int]:
+        """The psycopg prepare threshold to connect with
+        Returns:
+            [Optional[int]] the threshold, None if it is left to the driver
+            or server-side preparation is off
+        """
+        if self._pgbouncer:
+            return None
+        return self._prepare_threshold
+
+    def connect_args(self) -> Dict[str, Optional[int]]:
+        """Driver connection arguments controlling server-side preparation.
+        Without a configured threshold psycopg keeps its own default
+        Returns:
+            [Dict] keyword arguments for the psycopg connection
+        """
+        if self._pgbouncer:
+            return {'prepare_threshold': None}
+        if self._prepare_threshold is None:
+            return {}
+        return {'prepare_threshold': self._prepare_threshold}
+
+    def template(self, factory: Callable[[], Executable]) -> Executable:
+        """Obtain the template built by the given factory, building it on first use
+        Arguments:
+            factory: a callable returning a statement with named bound parameters
+        Returns:
+            [Executable] the shared statement template
+        """
+        template = self._templates.get(factory)
+        if template is None:
+            with self._lock:
+                template = self._templates.get(factory)
+                if template is None:
+                    LOGGER.debug("Building statement template %s", factory.__qualname__)
+                    template = factory()
+                    self._templates[factory] = template
+        return template
+
+    def bind(self, factory: Callable[[], Executable], **params) -> BoundStatement:
+        """Pair the template built by the given factory with parameter values
+        Arguments:
+            factory: a callable returning a statement with named bound parameters
+            params: values for each of the template's bound parameters
+        Returns:
+            [BoundStatement] the template ready for execution
+        """
+        return BoundStatement(self.template(factory), params)
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def clear(self) -> None:
+        """Drop all built templates"""
+        with self._lock:
+            self._templates.clear()
+
+
+STATEMENTS = StatementRegistry(
+        prepare_threshold=ServiceConfig.DataBase.DBPREPARETHRESHOLD,
+        pgbouncer=ServiceConfig.DataBase.DBPGBOUNCER
+        )
@@ -4,9 +4,34 @@ import pytest
 import random
 import string
 import faker
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.sql.elements import BinaryExpression
 
 from ideabank_webapi.models import AuthorizationToken, ConceptSimpleView, CredentialSet
 
+SQLITE_FUNCTIONS = {'@@': 'ts_match'}
+
+
+@compiles(CreateColumn, 'sqlite')
+def _skip_postgresql_only_columns(element, compiler, **kwargs):
+    """Leaves columns only postgres can compute out of sqlite tables: search vectors,
+    and identities sqlite cannot generate outside of the primary key"""
+    column = element.element
+    if isinstance(column.type, TSVECTOR) or (column.identity is not None and not column.primary_key):
+        return None
+    return compiler.visit_create_column(element, **kwargs)
+
+
+@compiles(BinaryExpression, 'sqlite')
+def _postgresql_operators_as_functions(element, compiler, **kwargs):
+    """Renders the postgres search operators as functions sqlite tests can register"""
+    name = SQLITE_FUNCTIONS.get(getattr(element.operator, 'opstring', None))
+    if name is None:
+        return compiler.visit_binary(element, **kwargs)
+    return f'{name}({compiler.process(element.left, **kwargs)}, {compiler.process(element.right, **kwargs)})'
+
 
 @pytest.fixture
 def fake_jwt(scope='session'):
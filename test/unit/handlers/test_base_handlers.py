@@ -1,6 +1,7 @@
 """Tests for base handler template class"""
 
 import json
+import asyncio
 from unittest.mock import patch
 import pytest
 from fastapi import status
@@ -12,7 +13,8 @@ from ideabank_webapi.handlers import (
 from ideabank_webapi.services import (
         QueryService,
         S3Crud,
-        RegisteredService
+        RegisteredService,
+        PROVIDER_POOL
         )
 
 from ideabank_webapi.exceptions import (
@@ -134,3 +136,54 @@ def test_use_of_missing_service_provider(test_handler):
 def test_getting_results_before_ready_throws_error(test_handler):
     th = test_handler()
     th.result
+
+
+def test_services_are_returned_to_pool_after_receive(test_handler):
+    th = test_handler()
+    th.use_service(RegisteredService.RAW_DB)
+    provider = th.get_service(RegisteredService.RAW_DB)
+    th.receive(EndpointPayload())
+    assert len(th._services) == 0
+    assert PROVIDER_POOL.acquire(RegisteredService.RAW_DB) is provider
+
+
+def test_async_receive_falls_back_to_sync_data_ops(test_handler):
+    th = test_handler()
+    asyncio.run(th.receive_async(EndpointPayload()))
+    assert th.status == EndpointHandlerStatus.COMPLETE
+    assert th.result.body == EndpointInformationalMessage(
+            msg=json.dumps(th._do_data_ops(None))
+            )
+
+
+def test_async_receive_uses_native_async_data_ops(test_handler):
+    class AsyncTestHandler(test_handler):
+        async def _do_data_ops_async(self, request):
+            return {'number': 2}
+
+    th = AsyncTestHandler()
+    asyncio.run(th.receive_async(EndpointPayload()))
+    assert th.status == EndpointHandlerStatus.COMPLETE
+    assert th.result.body == EndpointInformationalMessage(msg=json.dumps({'number': 2}))
+
+
+@pytest.mark.parametrize("error_type, error_code", [
+    (RecoverableServiceException, status.HTTP_400_BAD_REQUEST),
+    (UnrecoverableServiceException, status.HTTP_500_INTERNAL_SERVER_ERROR)
+    ])
+def test_async_handler_state_is_error_when_failed(test_handler, error_type, error_code):
+    th = test_handler()
+    with patch.object(type(th), '_do_data_ops', side_effect=error_type('oops')):
+        asyncio.run(th.receive_async(EndpointPayload()))
+    assert th.status == EndpointHandlerStatus.ERROR
+    assert th.result == EndpointResponse(
+            code=error_code,
+            body=EndpointErrorMessage(err_msg='oops')
+            )
+
+
+def test_non_idle_handler_cannot_receive_async(test_handler):
+    th = test_handler()
+    th._status = EndpointHandlerStatus.PROCESSING
+    with pytest.raises(HandlerNotIdleException):
+        asyncio.run(th.receive_async(EndpointPayload()))
@@ -3,6 +3,7 @@
 import pytest
 import faker
 import uuid
+import datetime
 from unittest.mock import patch
 from ideabank_webapi.handlers import EndpointHandlerStatus
 from ideabank_webapi.handlers.creators import (
@@ -18,6 +19,12 @@ from ideabank_webapi.services import (
         RegisteredService,
         QueryService,
         S3Crud,
+        ConceptsDataService,
+        EngagementDataService,
+        ConceptGraph,
+        BoundedCache,
+        CommentSection,
+        CommentRecord,
         )
 from ideabank_webapi.models import (
         CredentialSet,
@@ -40,7 +47,7 @@ from ideabank_webapi.exceptions import (
         )
 
 from sqlalchemy import create_engine
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import IntegrityError, NoResultFound
 from fastapi import status
 
 
@@ -223,6 +230,28 @@ class TestConceptCreationHandler:
         mock_query.assert_called_once()
         mock_auth_check.assert_called_once_with(test_auth_token)
 
+    @patch.object(AuthorizationRequired, '_check_if_authorized')
+    @patch.object(S3Crud, 'share_item')
+    def test_concept_creation_invalidates_search_results(
+        self,
+        mock_s3_url,
+        mock_auth_check,
+        mock_query_result,
+        mock_query,
+        test_auth_token,
+        test_concept_payload,
+        test_concept_simple_view
+    ):
+        mock_query_result.one.return_value = test_concept_simple_view
+        mock_s3_url.return_value = test_concept_simple_view.thumbnail_url
+        ConceptsDataService.SEARCH_RESULTS.put('search', ((), None))
+        self.handler.receive(CreateConcept(
+            auth_token=test_auth_token,
+            **test_concept_payload.dict()
+        ))
+        assert self.handler.status == EndpointHandlerStatus.COMPLETE
+        assert ConceptsDataService.SEARCH_RESULTS.get('search') is None
+
     @patch.object(AuthorizationRequired, '_check_if_authorized')
     @patch.object(S3Crud, 'share_item')
     def test_duplicate_concept_creation(
@@ -327,6 +356,50 @@ class TestConceptLinkingHandler:
         assert self.handler.status == EndpointHandlerStatus.COMPLETE
         assert self.handler.result.code == status.HTTP_201_CREATED
         assert self.handler.result.body == test_linking_request
+        assert mock_query.call_count == 3  # closure lock, link and closure update
+
+    @patch.object(AuthorizationRequired, '_check_if_authorized')
+    def test_linking_request_invalidates_lineages_of_its_families(
+            self,
+            mock_auth_check,
+            mock_query_results,
+            mock_query,
+            test_auth_token,
+            test_linking_request
+            ):
+        ConceptsDataService.LINEAGES.put('family', (), tags=(test_linking_request.descendant,))
+        ConceptsDataService.LINEAGES.put('stranger', (), tags=('someone/else',))
+        mock_query_results.one.return_value = test_linking_request
+        self.handler.receive(EstablishLink(
+            auth_token=test_auth_token,
+            **test_linking_request.dict()
+        ))
+        assert self.handler.status == EndpointHandlerStatus.COMPLETE
+        assert ConceptsDataService.LINEAGES.get('family') is None
+        assert ConceptsDataService.LINEAGES.get('stranger') == ()
+
+    @patch.object(AuthorizationRequired, '_check_if_authorized')
+    def test_linking_request_updates_lineage_graph(
+            self,
+            mock_auth_check,
+            mock_query_results,
+            mock_query,
+            test_auth_token,
+            test_linking_request
+            ):
+        graph = ConceptGraph('test-graph', refresh=0)
+        graph.begin_load()
+        graph.finish_load([])
+        mock_query_results.one.return_value = test_linking_request
+        with patch.object(ConceptsDataService, 'LINEAGE_GRAPH', graph):
+            self.handler.receive(EstablishLink(
+                auth_token=test_auth_token,
+                **test_linking_request.dict()
+            ))
+        assert self.handler.status == EndpointHandlerStatus.COMPLETE
+        assert graph.walk(test_linking_request.ancestor, 1, 10) == [
+                (test_linking_request.ancestor, test_linking_request.descendant)
+                ]
 
     @pytest.mark.parametrize("err_type, err_cause, err_msg", [
         (IntegrityError, "not present in table", "Both concepts must exist to link them"),
@@ -665,6 +738,7 @@ class TestStartLikingHandler:
         self.handler.receive(test_like_request)
 
 
+@patch.object(EngagementDataService, 'COMMENT_SECTIONS', BoundedCache('test-created-comments', 4))
 @patch.object(QueryService, 'ENGINE', create_engine('sqlite:///:memory:', echo=True))
 @patch.object(QueryService, 'exec_next')
 @patch.object(QueryService, 'results')
@@ -721,6 +795,65 @@ class TestCommentCreationHandler:
                         "If responding to another comment, it must exist also."
                 )
 
+    @patch.object(AuthorizationRequired, "_check_if_authorized")
+    def test_response_is_spliced_into_cached_comments(
+            self,
+            mock_auth_check,
+            mock_query_results,
+            mock_query,
+            test_responsd_in_thread
+            ):
+        created = datetime.datetime(2023, 6, 1)
+        thread = CommentRecord(
+                test_responsd_in_thread.response_to, None, 'testuser', 'thread', created, 'p'
+                )
+        section = CommentSection(test_responsd_in_thread.concept_id, [thread])
+        EngagementDataService.COMMENT_SECTIONS.put(test_responsd_in_thread.concept_id, section)
+        mock_query_results.one.return_value = CommentRecord(
+                uuid.uuid4(),
+                thread.comment_id,
+                test_responsd_in_thread.comment_author,
+                test_responsd_in_thread.comment_text,
+                created + datetime.timedelta(minutes=1),
+                'pp'
+                )
+        self.handler.receive(test_responsd_in_thread)
+        assert self.handler.status == EndpointHandlerStatus.COMPLETE
+        assert EngagementDataService.COMMENT_SECTIONS.get(test_responsd_in_thread.concept_id) is section
+        assert section.page(thread.comment_id, None, 10) == [
+                mock_query_results.one.return_value
+                ]
+
+    @patch.object(AuthorizationRequired, "_check_if_authorized")
+    def test_uncached_comments_are_not_cached_stale(
+            self,
+            mock_auth_check,
+            mock_query_results,
+            mock_query,
+            test_start_new_thread
+            ):
+        EngagementDataService.COMMENT_SECTIONS.clear()
+        generation = EngagementDataService.COMMENT_SECTIONS.generation
+        self.handler.receive(test_start_new_thread)
+        assert self.handler.status == EndpointHandlerStatus.COMPLETE
+        assert EngagementDataService.COMMENT_SECTIONS.generation > generation
+
+    @patch.object(AuthorizationRequired, '_check_if_authorized')
+    def test_response_to_comment_elsewhere_is_rejected(
+            self,
+            mock_auth_check,
+            mock_query_results,
+            mock_query,
+            test_responsd_in_thread
+            ):
+        mock_query_results.one.side_effect = NoResultFound()
+        self.handler.receive(test_responsd_in_thread)
+        assert self.handler.status == EndpointHandlerStatus.ERROR
+        assert self.handler.result.code == status.HTTP_403_FORBIDDEN
+        assert self.handler.result.body == EndpointErrorMessage(
+                err_msg="The comment being responded to must exist on the same concept."
+                )
+
     @pytest.mark.parametrize("err_type, err_msg", [
         (NotAuthorizedError, 'Invalid token presented'),
         (NotAuthorizedError, 'Unable to verify token ownership')
@@ -0,0 +1,67 @@
+"""Tests for lineage assembly"""
+
+from ideabank_webapi.handlers.lineage import build_lineage
+
+
+def views(*identifiers):
+    return {identifier: identifier.upper() for identifier in identifiers}
+
+
+def test_lone_concept_is_its_own_lineage():
+    assert build_lineage('a', [], views('a')) == (1, {'a': {'data': 'A'}})
+
+
+def test_chain_nests_the_focus_under_its_ancestors():
+    nodes, lineage = build_lineage('c', [('b', 'c'), ('a', 'b'), ('c', 'd')], views('a', 'b', 'c', 'd'))
+    assert nodes == 4
+    assert lineage == {'a': {'data': 'A', 'children': [
+        {'b': {'data': 'B', 'children': [
+            {'c': {'data': 'C', 'children': [
+                {'d': {'data': 'D'}}
+                ]}}
+            ]}}
+        ]}}
+
+
+def test_children_are_ordered_by_identifier():
+    _, lineage = build_lineage('a', [('a', 'c'), ('a', 'b')], views('a', 'b', 'c'))
+    assert [next(iter(child)) for child in lineage['a']['children']] == ['b', 'c']
+
+
+def test_concept_with_several_parents_is_expanded_once():
+    links = [('a', 'c'), ('b', 'c'), ('c', 'd'), ('a', 'c')]
+    nodes, lineage = build_lineage('c', links, views('a', 'b', 'c', 'd'))
+    assert nodes == 4
+    assert list(lineage) == ['a', 'b']
+    assert lineage['a']['children'] == [
+            {'c': {'data': 'C', 'children': [{'d': {'data': 'D'}}]}}
+            ]
+    assert lineage['b']['children'] == [{'c': {'data': 'C'}}]
+
+
+def test_concepts_in_cycles_no_root_reaches_are_kept():
+    links = [('p', 'q'), ('q', 'p'), ('p', 'c'), ('c', 'd'), ('x', 'y'), ('y', 'x'), ('x', 'd')]
+    nodes, lineage = build_lineage('c', links, views('c', 'd', 'p', 'q', 'x', 'y'))
+    assert nodes == 6
+    assert lineage == {
+            'c': {'data': 'C', 'children': [{'d': {'data': 'D'}}]},
+            'p': {'data': 'P', 'children': [
+                {'c': {'data': 'C'}},
+                {'q': {'data': 'Q', 'children': [{'p': {'data': 'P'}}]}}
+                ]},
+            'x': {'data': 'X', 'children': [
+                {'d': {'data': 'D'}},
+                {'y': {'data': 'Y', 'children': [{'x': {'data': 'X'}}]}}
+                ]}
+            }
+
+
+def test_deep_lineage_does_not_recurse():
+    chain = [(f'n{i}', f'n{i + 1}') for i in range(5000)]
+    nodes, lineage = build_lineage('n5000', chain, {f'n{i}': i for i in range(5001)})
+    assert nodes == 5001
+    depth, entry = 0, lineage['n0']
+    while 'children' in entry:
+        entry = next(iter(entry['children'][0].values()))
+        depth += 1
+    assert depth == 5000
@@ -0,0 +1,30 @@
+"""Tests for pagination cursors"""
+
+import datetime
+import pytest
+
+from ideabank_webapi.handlers.pagination import encode_cursor, decode_cursor
+from ideabank_webapi.exceptions import InvalidCursorError
+
+
+def test_cursor_round_trips_its_sort_key():
+    updated = datetime.datetime(2023, 6, 1, 12, 30, 15, 123456)
+    cursor = encode_cursor(updated, 'someuser/an idea?')
+    assert '=' not in cursor
+    assert decode_cursor(cursor, datetime.datetime, str) == [updated, 'someuser/an idea?']
+
+
+def test_cursor_round_trips_numbers():
+    assert decode_cursor(encode_cursor(0.5, 3), float, int) == [0.5, 3]
+
+
+@pytest.mark.parametrize("cursor", [
+    'not-a-cursor',
+    encode_cursor('someuser/idea'),
+    encode_cursor('yesterday', 'someuser/idea'),
+    encode_cursor(datetime.datetime.utcnow(), 5),
+    ''
+    ])
+def test_invalid_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, datetime.datetime, str)
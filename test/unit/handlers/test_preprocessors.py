@@ -12,6 +12,7 @@ import pytest
 from fastapi import status
 import jwt
 from unittest.mock import patch
+from ideabank_webapi.services import RegisteredService, QueryService
 
 
 @pytest.fixture
@@ -52,6 +53,21 @@ def test_handler_proceeds_when_authorized(mock_jwt, test_auth_handler, test_auth
             )
 
 
+@patch('jwt.decode')
+@patch.object(QueryService, 'acting_as')
+def test_authorized_presenter_is_identified_to_db_services(
+        mock_acting_as,
+        mock_jwt,
+        test_auth_handler,
+        test_auth_token
+        ):
+    th = test_auth_handler()
+    th.use_service(RegisteredService.RAW_DB)
+    mock_jwt.return_value = {'username': test_auth_token.presenter}
+    th.receive(AuthorizedPayload(auth_token=test_auth_token))
+    mock_acting_as.assert_called_once_with(test_auth_token.presenter)
+
+
 @patch('jwt.decode')
 def test_handler_fails_when_ownership_is_falsified(mock_jwt, test_auth_handler, test_auth_token):
     th = test_auth_handler()
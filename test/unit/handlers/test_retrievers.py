@@ -1,53 +1,107 @@
 """Tests for retrieval handlers"""
 
+import asyncio
 import pytest
 import faker
 import random
 import datetime
-import treelib
 import uuid
-from unittest.mock import patch
+from collections import namedtuple
+from unittest.mock import patch, MagicMock
+from freezegun import freeze_time
 from ideabank_webapi.handlers import EndpointHandlerStatus
 from ideabank_webapi.handlers.retrievers import (
         AuthenticationHandler,
         ProfileRetrievalHandler,
         SpecificConceptRetrievalHandler,
         ConceptSearchResultHandler,
+        ConceptSearchStreamHandler,
         ConceptLineageHandler,
         CheckFollowingStatusHandler,
         CheckLikingStatusHandler,
         ConceptCommentsSectionHandler,
+        ConnectionPoolStatisticsHandler,
+        CacheStatisticsHandler,
+        LineageGraphLoadingHandler,
         )
 from ideabank_webapi.services import (
         RegisteredService,
         QueryService,
-        S3Crud
+        ConceptsDataService,
+        EngagementDataService,
+        S3Crud,
+        ConceptGraph,
+        BoundedCache,
+        PROVIDER_POOL
         )
+from ideabank_webapi.services.querydb import ReplicaSet, WriteTracker
+from ideabank_webapi.handlers.creators import AccountCreationHandler, StartFollowingAccountHandler
+from ideabank_webapi.handlers.preprocessors import AuthorizationRequired
+from ideabank_webapi.handlers.pagination import encode_cursor, decode_cursor
+from ideabank_webapi.handlers.threads import FIRST_REPLY
 from ideabank_webapi.models import (
         CredentialSet,
+        FollowRequest,
         AccountRecord,
         AuthorizationToken,
         ProfileView,
         ConceptRequest,
+        ConceptLineageRequest,
+        ConceptCommentsRequest,
         ConceptFullView,
         ConceptSearchQuery,
+        ConceptSearchPage,
+        ConceptSearchHit,
+        ConceptSearchStream,
+        FuzzyOption,
         ConceptSimpleView,
         ConceptLinkRecord,
+        LineageFormat,
         ConceptLineage,
+        ConceptLineageGraph,
         AccountFollowingRecord,
         ConceptLikingRecord,
         ConceptComment,
         ConceptCommentThreads,
+        ConnectionPoolStatistics,
+        CacheStatistics,
         EndpointErrorMessage,
         EndpointInformationalMessage
 )
-from ideabank_webapi.models.schema import Comments, Accounts
+from ideabank_webapi.models.schema import IdeaBankSchema, Comments, Accounts
 from ideabank_webapi.exceptions import BaseIdeaBankAPIException
 
 from sqlalchemy import create_engine
-from sqlalchemy.exc import NoResultFound
+from sqlalchemy.exc import NoResultFound, OperationalError
+from sqlalchemy.pool import StaticPool
 from fastapi import status
 
+SearchRow = namedtuple('SearchRow', ['identifier', 'updated_at'])
+RankedSearchRow = namedtuple('RankedSearchRow', ['identifier', 'updated_at', 'score'])
+TextSearchRow = namedtuple('TextSearchRow', ['identifier', 'updated_at', 'snippet', 'score'])
+LinkRow = namedtuple('LinkRow', ['ancestor', 'descendant', 'link_id'])
+SectionRow = namedtuple(
+        'SectionRow',
+        ['comment_id', 'parent', 'comment_by', 'free_text', 'created_at', 'path', 'preferred_name']
+        )
+ThreadRow = namedtuple(
+        'ThreadRow',
+        [
+            'comment_id',
+            'parent',
+            'comment_by',
+            'free_text',
+            'created_at',
+            'path',
+            'preferred_name',
+            'has_replies'
+            ]
+        )
+
+
+def share_avatars(_, keys):
+    return [f'http://example.com/{key}' for key in keys]
+
 
 @pytest.fixture
 def test_creds_set(test_auth_projection):
@@ -89,43 +143,29 @@ def test_full_concept_view(test_concept_simple_view, faker):
 
 @pytest.fixture
 def test_lineage():
-    t = treelib.Tree()
-    t.create_node(
-            tag='testuser/old-idea',
-            identifier='testuser/old-idea',
-            data=ConceptSimpleView(
-                identifier='testuser/old-idea',
-                thumbnail_url='http://example.com/thumbnails/testuser/old-idea'
-                )
-            )
-    t.create_node(
-            tag='testuser/new-idea',
-            identifier='testuser/new-idea',
-            parent='testuser/old-idea',
-            data=ConceptSimpleView(
-                identifier='testuser/new-idea',
-                thumbnail_url='http://example.com/thumbnails/testuser/new-idea'
-                )
-            )
-    t.create_node(
-            tag='anotheruser/helpful-suggestion',
-            identifier='anotheruser/helpful-suggestion',
-            parent='testuser/new-idea',
-            data=ConceptSimpleView(
-                identifier='anotheruser/helpful-suggestion',
-                thumbnail_url='http://example.com/thumbnails/anotheruser/helpful-suggestion'
-                )
-            )
-    t.create_node(
-            tag='someotheruser/a-little-improvement',
-            identifier='someotheruser/a-little-improvement',
-            parent='testuser/new-idea',
-            data=ConceptSimpleView(
-                identifier='someotheruser/a-little-improvement',
-                thumbnail_url='http://example.com/thumbnails/someotheruser/a-little-improvement'
+    def view(identifier):
+        return ConceptSimpleView(
+                identifier=identifier,
+                thumbnail_url=f'http://example.com/thumbnails/{identifier}'
                 )
-            )
-    return t
+    return {
+            'testuser/old-idea': {
+                'children': [
+                    {'testuser/new-idea': {
+                        'children': [
+                            {'anotheruser/helpful-suggestion': {
+                                'data': view('anotheruser/helpful-suggestion')
+                                }},
+                            {'someotheruser/a-little-improvement': {
+                                'data': view('someotheruser/a-little-improvement')
+                                }}
+                            ],
+                        'data': view('testuser/new-idea')
+                        }}
+                    ],
+                'data': view('testuser/old-idea')
+                }
+            }
 
 
 @pytest.fixture
@@ -151,17 +191,23 @@ def test_existing_comment_thread():
                 ConceptComment(
                     comment_id=uuid.uuid4(),
                     comment_author='testuser',
+                    preferred_name='Testuser',
+                    avatar_url='http://example.com/avatars/testuser',
                     comment_text='thread #1',
                     responses=[
                         ConceptComment(
                             comment_id=uuid.uuid4(),
                             comment_author='someuser',
+                            preferred_name='Someuser',
+                            avatar_url='http://example.com/avatars/someuser',
                             comment_text='thread #1.1',
                             responses=[]
                             ),
                         ConceptComment(
                             comment_id=uuid.uuid4(),
                             comment_author='anotheruser',
+                            preferred_name='Anotheruser',
+                            avatar_url='http://example.com/avatars/anotheruser',
                             comment_text='thread #1.2',
                             responses=[]
                             )
@@ -170,6 +216,8 @@ def test_existing_comment_thread():
                 ConceptComment(
                     comment_id=uuid.uuid4(),
                     comment_author='someotheruser',
+                    preferred_name='Someotheruser',
+                    avatar_url='http://example.com/avatars/someotheruser',
                     comment_text='thread#2',
                     responses=[]
                     )
@@ -432,11 +480,30 @@ class TestConceptSearchHandler:
     def setup_method(self):
         self.handler = ConceptSearchResultHandler()
         self.handler.use_service(RegisteredService.CONCEPTS_DS)
+        ConceptsDataService.SEARCH_RESULTS.clear()
+
+    @staticmethod
+    def search_query(view, **kwargs):
+        return ConceptSearchQuery(
+                author=view.identifier.split('/')[0],
+                title=view.identifier.split('/')[1],
+                not_before=datetime.datetime.fromtimestamp(0, datetime.timezone.utc),
+                not_after=datetime.datetime.now(datetime.timezone.utc),
+                **kwargs
+            )
+
+    @staticmethod
+    def search_rows(count):
+        start = datetime.datetime(2023, 6, 1, 12, 0, 0)
+        return [
+                SearchRow(f'someuser/idea-{i}', start - datetime.timedelta(minutes=i))
+                for i in range(count)
+                ]
 
     @patch.object(
             S3Crud,
-            'share_item',
-            side_effect=(lambda key: f'http://example.com/{key}')
+            'share_items',
+            side_effect=(lambda keys: [f'http://example.com/{key}' for key in keys])
             )
     def test_successful_search_result_retrieval(
             self,
@@ -445,16 +512,238 @@ class TestConceptSearchHandler:
             mock_query,
             test_concept_simple_view
             ):
-        mock_query_results.all.return_value = 10 * [test_concept_simple_view]
-        self.handler.receive(ConceptSearchQuery(
-                author=test_concept_simple_view.identifier.split('/')[0],
-                title=test_concept_simple_view.identifier.split('/')[1],
-                not_before=datetime.datetime.fromtimestamp(0, datetime.timezone.utc),
-                not_after=datetime.datetime.now(datetime.timezone.utc)
-            ))
+        mock_query_results.all.return_value = self.search_rows(10)
+        self.handler.receive(self.search_query(test_concept_simple_view))
         assert self.handler.status == EndpointHandlerStatus.COMPLETE
         assert self.handler.result.code == status.HTTP_200_OK
-        assert self.handler.result.body == mock_query_results.all.return_value
+        assert self.handler.result.body == ConceptSearchPage(
+                results=[
+                    ConceptSimpleView(
+                        identifier=row.identifier,
+                        thumbnail_url=f'http://example.com/thumbnails/{row.identifier}'
+                        )
+                    for row in self.search_rows(10)
+                    ],
+                next=None
+                )
+
+    @patch.object(
+            S3Crud,
+            'share_items',
+            side_effect=(lambda keys: [f'http://example.com/{key}' for key in keys])
+            )
+    def test_full_page_links_to_the_next_page(
+            self,
+            mock_s3_url,
+            mock_query_results,
+            mock_query,
+            test_concept_simple_view
+            ):
+        rows = self.search_rows(3)
+        mock_query_results.all.return_value = rows
+        self.handler.receive(self.search_query(test_concept_simple_view, limit=2))
+        page = self.handler.result.body
+        assert [view.identifier for view in page.results] == [row.identifier for row in rows[:2]]
+        assert decode_cursor(page.next, datetime.datetime, str) == [rows[1].updated_at, rows[1].identifier]
+        mock_s3_url.assert_called_once_with([f'thumbnails/{row.identifier}' for row in rows[:2]])
+
+    @patch.object(S3Crud, 'share_items', return_value=[])
+    @patch.object(ConceptsDataService, 'query_concepts')
+    def test_cursor_resumes_after_the_last_result(
+            self,
+            mock_builder,
+            mock_s3_url,
+            mock_query_results,
+            mock_query,
+            test_concept_simple_view
+            ):
+        mock_query_results.all.return_value = []
+        last = datetime.datetime(2023, 6, 1, 12, 0, 0)
+        self.handler.receive(self.search_query(
+            test_concept_simple_view,
+            limit=5,
+            cursor=encode_cursor(last, 'someuser/idea-4')
+            ))
+        assert self.handler.status == EndpointHandlerStatus.COMPLETE
+        assert mock_builder.call_args.kwargs['limit'] == 6
+        assert mock_builder.call_args.kwargs['after'] == [last, 'someuser/idea-4']
+
+    @patch.object(
+            S3Crud,
+            'share_items',
+            side_effect=(lambda keys: [f'http://example.com/{key}' for key in keys])
+            )
+    def test_ranked_page_links_by_score(
+            self,
+            mock_s3_url,
+            mock_query_results,
+            mock_query,
+            test_concept_simple_view
+            ):
+        rows = [
+                RankedSearchRow(row.identifier, row.updated_at, 1.0 - i / 10)
+                for i, row in enumerate(self.search_rows(3))
+                ]
+        mock_query_results.all.return_value = rows
+        self.handler.receive(self.search_query(
+            test_concept_simple_view,
+            fuzzy=FuzzyOption.TITLE,
+            limit=2
+            ))
+        page = self.handler.result.body
+        assert [view.identifier for view in page.results] == [row.identifier for row in rows[:2]]
+        assert decode_cursor(page.next, float, datetime.datetime, str) == \
+            [rows[1].score, rows[1].updated_at, rows[1].identifier]
+
+    @patch.object(S3Crud, 'share_items', return_value=[])
+    @patch.object(ConceptsDataService, 'query_concepts')
+    def test_ranked_cursor_resumes_after_the_last_result(
+            self,
+            mock_builder,
+            mock_s3_url,
+            mock_query_results,
+            mock_query,
+            test_concept_simple_view
+            ):
+        mock_query_results.all.return_value = []
+        last = datetime.datetime(2023, 6, 1, 12, 0, 0)
+        self.handler.receive(self.search_query(
+            test_concept_simple_view,
+            fuzzy=FuzzyOption.ALL,
+            similarity=0.4,
+            cursor=encode_cursor(0.75, last, 'someuser/idea-4')
+            ))
+        assert self.handler.status == EndpointHandlerStatus.COMPLETE
+        assert mock_builder.call_args.kwargs['after'] == [0.75, last, 'someuser/idea-4']
+        assert mock_builder.call_args.kwargs['similarity'] == 0.4
+
+    @patch.object(
+            S3Crud,
+            'share_items',
+            side_effect=(lambda keys: [f'http://example.com/{key}' for key in keys])
+            )
+    def test_text_search_returns_snippets(
+            self,
+            mock_s3_url,
+            mock_query_results,
+            mock_query,
+            test_concept_simple_view
+            ):
+        rows = [
+                TextSearchRow(row.identifier, row.updated_at, f'<b>solar</b> idea {i}', 0.5)
+                for i, row in enumerate(self.search_rows(3))
+                ]
+        mock_query_results.all.return_value = rows
+        self.handler.receive(self.search_query(
+            test_concept_simple_view,
+            text='solar',
+            limit=2
+            ))
+        page = self.handler.result.body
+        assert [hit.snippet for hit in page.results] == ['<b>solar</b> idea 0', '<b>solar</b> idea 1']
+        assert decode_cursor(page.next, float, datetime.datetime, str) == \
+            [0.5, rows[1].updated_at, rows[1].identifier]
+
+    def test_recency_cursor_is_rejected_by_ranked_search(
+            self,
+            mock_query_results,
+            mock_query,
+            test_concept_simple_view
+            ):
+        self.handler.receive(self.search_query(
+            test_concept_simple_view,
+            fuzzy=FuzzyOption.AUTHOR,
+            cursor=encode_cursor(datetime.datetime(2023, 6, 1), 'someuser/idea-4')
+            ))
+        assert self.handler.result.code == status.HTTP_400_BAD_REQUEST
+
+    @patch.object(
+            S3Crud,
+            'share_items',
+            side_effect=(lambda keys: [f'http://example.com/{key}' for key in keys])
+            )
+    def test_repeated_search_is_served_from_cache(
+            self,
+            mock_s3_url,
+            mock_query_results,
+            mock_query,
+            test_concept_simple_view
+            ):
+        mock_query_results.all.return_value = self.search_rows(3)
+        self.handler.receive(self.search_query(test_concept_simple_view))
+        first = self.handler.result.body
+        handler = ConceptSearchResultHandler()
+        handler.use_service(RegisteredService.CONCEPTS_DS)
+        handler.receive(self.search_query(test_concept_simple_view))
+        assert handler.result.body == first
+        mock_query.assert_called_once()
+        assert mock_s3_url.call_count == 2
+
+    @patch.object(S3Crud, 'share_items', return_value=[])
+    def test_search_after_invalidation_queries_again(
+            self,
+            mock_s3_url,
+            mock_query_results,
+            mock_query,
+            test_concept_simple_view
+            ):
+        mock_query_results.all.return_value = []
+        self.handler.receive(self.search_query(test_concept_simple_view))
+        ConceptsDataService.SEARCH_RESULTS.invalidate_all()
+        handler = ConceptSearchResultHandler()
+        handler.use_service(RegisteredService.CONCEPTS_DS)
+        handler.receive(self.search_query(test_concept_simple_view))
+        assert mock_query.call_count == 2
+
+    def test_recent_not_after_is_bucketed(
+            self,
+            mock_query_results,
+            mock_query,
+            test_concept_simple_view
+            ):
+        with freeze_time('2023-06-01 12:00:10'):
+            first = ConceptSearchResultHandler._normalize(self.search_query(test_concept_simple_view))
+        with freeze_time('2023-06-01 12:00:50'):
+            second = ConceptSearchResultHandler._normalize(self.search_query(test_concept_simple_view))
+        assert first.json() == second.json()
+        assert first.not_after == datetime.datetime(2023, 6, 1, 12, 1, tzinfo=datetime.timezone.utc)
+
+    def test_past_not_after_is_kept(
+            self,
+            mock_query_results,
+            mock_query,
+            test_concept_simple_view
+            ):
+        query = self.search_query(test_concept_simple_view).copy(update={
+            'not_after': datetime.datetime(2020, 1, 1, 0, 0, 30, tzinfo=datetime.timezone.utc)
+            })
+        assert ConceptSearchResultHandler._normalize(query).not_after == query.not_after
+
+    def test_fuzzy_terms_are_normalized(
+            self,
+            mock_query_results,
+            mock_query,
+            test_concept_simple_view
+            ):
+        query = ConceptSearchResultHandler._normalize(self.search_query(
+            test_concept_simple_view,
+            fuzzy=FuzzyOption.TITLE,
+            text='  Solar   POWER '
+            ))
+        assert query.title == self.search_query(test_concept_simple_view).title.lower()
+        assert query.author == self.search_query(test_concept_simple_view).author
+        assert query.text == 'solar power'
+
+    def test_malformed_cursor_is_a_bad_request(
+            self,
+            mock_query_results,
+            mock_query,
+            test_concept_simple_view
+            ):
+        self.handler.receive(self.search_query(test_concept_simple_view, cursor='not-a-cursor'))
+        assert self.handler.status == EndpointHandlerStatus.ERROR
+        assert self.handler.result.code == status.HTTP_400_BAD_REQUEST
+        mock_query.assert_not_called()
 
     @patch.object(
             ConceptSearchResultHandler,
@@ -468,12 +757,7 @@ class TestConceptSearchHandler:
             mock_query,
             test_concept_simple_view
             ):
-        self.handler.receive(ConceptSearchQuery(
-                author=test_concept_simple_view.identifier.split('/')[0],
-                title=test_concept_simple_view.identifier.split('/')[1],
-                not_before=datetime.datetime.fromtimestamp(0, datetime.timezone.utc),
-                not_after=datetime.datetime.now(datetime.timezone.utc)
-            ))
+        self.handler.receive(self.search_query(test_concept_simple_view))
         mock_data_ops.assert_called_once()
         assert self.handler.status == EndpointHandlerStatus.ERROR
         assert self.handler.result.code == status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -481,61 +765,154 @@ class TestConceptSearchHandler:
                 err_msg='Really obscure error'
                 )
 
+    @patch.object(S3Crud, 'share_items', return_value=[])
+    def test_no_results_is_not_an_error(
+            self,
+            mock_s3_url,
+            mock_query_results,
+            mock_query,
+            test_concept_simple_view
+            ):
+        mock_query_results.all.return_value = []
+        self.handler.receive(self.search_query(test_concept_simple_view))
+        assert self.handler.status == EndpointHandlerStatus.COMPLETE
+        assert self.handler.result.code == status.HTTP_200_OK
+        assert self.handler.result.body == ConceptSearchPage(results=[], next=None)
+
+
+@patch.object(QueryService, 'ENGINE', create_engine('sqlite:///:memory:', echo=True))
+@patch.object(QueryService, 'exec_streamed')
+@patch.object(QueryService, 'results')
+class TestConceptSearchStreamHandler:
+
+    def setup_method(self):
+        PROVIDER_POOL.clear()
+        self.handler = ConceptSearchStreamHandler()
+        self.handler.use_service(RegisteredService.CONCEPTS_DS)
+
     @patch.object(
             S3Crud,
-            'share_item',
-            side_effect=(lambda key: f'http://example.com/{key}')
+            'share_items',
+            side_effect=(lambda keys: [f'http://example.com/{key}' for key in keys])
             )
-    def test_no_results_is_not_an_error(
+    def test_matches_are_streamed_as_ndjson(
             self,
             mock_s3_url,
             mock_query_results,
             mock_query,
             test_concept_simple_view
             ):
-        mock_query_results.all.return_value = []
-        self.handler.receive(ConceptSearchQuery(
-                author=test_concept_simple_view.identifier.split('/')[0],
-                title=test_concept_simple_view.identifier.split('/')[1],
-                not_before=datetime.datetime.fromtimestamp(0, datetime.timezone.utc),
-                not_after=datetime.datetime.now(datetime.timezone.utc)
-            ))
+        rows = TestConceptSearchHandler.search_rows(3)
+        mock_query_results.partitions.return_value = iter([rows[:2], rows[2:]])
+        self.handler.receive(TestConceptSearchHandler.search_query(test_concept_simple_view))
         assert self.handler.status == EndpointHandlerStatus.COMPLETE
         assert self.handler.result.code == status.HTTP_200_OK
-        assert self.handler.result.body == mock_query_results.all.return_value
+        assert isinstance(self.handler.result.body, ConceptSearchStream)
+        mock_query.assert_not_called()
+        lines = list(self.handler.result.body.lines)
+        assert [ConceptSearchHit.parse_raw(line) for line in lines] == [
+                ConceptSearchHit(
+                    identifier=row.identifier,
+                    thumbnail_url=f'http://example.com/thumbnails/{row.identifier}'
+                    )
+                for row in rows
+                ]
+        assert all(line.endswith('\n') for line in lines)
+        mock_query.assert_called_once_with(ConceptSearchStreamHandler.BATCH_SIZE)
+        assert mock_s3_url.call_count == 2
+
+    @patch.object(S3Crud, 'share_items', return_value=[])
+    def test_service_is_released_once_streamed(
+            self,
+            mock_s3_url,
+            mock_query_results,
+            mock_query,
+            test_concept_simple_view
+            ):
+        mock_query_results.partitions.return_value = iter([])
+        self.handler.receive(TestConceptSearchHandler.search_query(test_concept_simple_view))
+        assert PROVIDER_POOL.idle_count(RegisteredService.CONCEPTS_DS) == 1
+        lines = iter(self.handler.result.body.lines)
+        assert next(lines, None) is None
+        assert PROVIDER_POOL.idle_count(RegisteredService.CONCEPTS_DS) == 1
+
+    def test_stream_closed_unread_holds_no_provider(
+            self,
+            mock_query_results,
+            mock_query,
+            test_concept_simple_view
+            ):
+        self.handler.receive(TestConceptSearchHandler.search_query(test_concept_simple_view))
+        self.handler.result.body.lines.close()
+        assert PROVIDER_POOL.idle_count(RegisteredService.CONCEPTS_DS) == 1
+        mock_query.assert_not_called()
+
+    @patch.object(S3Crud, 'share_items', side_effect=ConnectionError('signing failed'))
+    def test_service_is_released_when_streaming_fails(
+            self,
+            mock_s3_url,
+            mock_query_results,
+            mock_query,
+            test_concept_simple_view
+            ):
+        mock_query_results.partitions.return_value = iter([TestConceptSearchHandler.search_rows(1)])
+        self.handler.receive(TestConceptSearchHandler.search_query(test_concept_simple_view))
+        with pytest.raises(ConnectionError):
+            list(self.handler.result.body.lines)
+        assert PROVIDER_POOL.idle_count(RegisteredService.CONCEPTS_DS) == 1
+
+    def test_malformed_cursor_is_a_bad_request(
+            self,
+            mock_query_results,
+            mock_query,
+            test_concept_simple_view
+            ):
+        self.handler.receive(TestConceptSearchHandler.search_query(
+            test_concept_simple_view,
+            cursor='not-a-cursor'
+            ))
+        assert self.handler.status == EndpointHandlerStatus.ERROR
+        assert self.handler.result.code == status.HTTP_400_BAD_REQUEST
+        assert PROVIDER_POOL.idle_count(RegisteredService.CONCEPTS_DS) == 1
 
 
 @patch.object(QueryService, 'ENGINE', create_engine('sqlite:///:memory:', echo=True))
 @patch.object(QueryService, 'exec_next')
 @patch.object(QueryService, 'results')
+@patch.object(ConceptLineageHandler, 'USE_GRAPH', False)
 class TestConceptLineageHandler:
 
     def setup_method(self):
+        ConceptsDataService.LINEAGES.clear()
         self.handler = ConceptLineageHandler()
         self.handler.use_service(RegisteredService.CONCEPTS_DS)
 
+    @patch.object(QueryService, 'exec_all')
     @patch.object(
             S3Crud,
-            'share_item',
-            side_effect=(lambda key: f'http://example.com/{key}')
+            'share_items',
+            side_effect=(lambda keys: [f'http://example.com/{key}' for key in keys])
             )
     def test_successful_lineage_retrieval(
             self,
             mock_s3_url,
+            mock_exec_all,
             mock_query_results,
             mock_query,
             test_concept_simple_view,
             test_lineage
             ):
-        mock_query_results.one.return_value = test_concept_simple_view
-        mock_query_results.all.side_effect = [
-                [ConceptLinkRecord(ancestor='testuser/old-idea', descendant='testuser/new-idea')],
-                [
-                    ConceptLinkRecord(ancestor='testuser/new-idea', descendant='someotheruser/a-little-improvement'),
-                    ConceptLinkRecord(ancestor='testuser/new-idea', descendant='anotheruser/helpful-suggestion')
-                    ]
+        exact, parents, children = MagicMock(), MagicMock(), MagicMock()
+        exact.one.return_value = test_concept_simple_view
+        parents.all.return_value = [
+                ConceptLinkRecord(ancestor='testuser/old-idea', descendant='testuser/new-idea')
                 ]
-        self.handler.receive(ConceptRequest(
+        children.all.return_value = [
+                ConceptLinkRecord(ancestor='testuser/new-idea', descendant='someotheruser/a-little-improvement'),
+                ConceptLinkRecord(ancestor='testuser/new-idea', descendant='anotheruser/helpful-suggestion')
+                ]
+        mock_exec_all.return_value = [exact, parents, children]
+        self.handler.receive(ConceptLineageRequest(
             author='testuser',
             title='new-idea',
             simple=True
@@ -543,17 +920,249 @@ class TestConceptLineageHandler:
         assert self.handler.status == EndpointHandlerStatus.COMPLETE
         assert self.handler.result.code == status.HTTP_200_OK
         assert self.handler.result.body == ConceptLineage(
-                nodes=test_lineage.size(),
-                lineage=test_lineage.to_dict(with_data=True)
+                nodes=4,
+                lineage=test_lineage
                 )
 
+    @patch.object(QueryService, 'exec_all')
+    @patch.object(
+            S3Crud,
+            'share_items',
+            side_effect=(lambda keys: [f'http://example.com/{key}' for key in keys])
+            )
+    def test_repeated_lineage_retrieval_is_cached(
+            self,
+            mock_s3_url,
+            mock_exec_all,
+            mock_query_results,
+            mock_query,
+            test_concept_simple_view,
+            test_lineage
+            ):
+        exact, parents, children = MagicMock(), MagicMock(), MagicMock()
+        exact.one.return_value = test_concept_simple_view
+        parents.all.return_value = [
+                ConceptLinkRecord(ancestor='testuser/old-idea', descendant='testuser/new-idea')
+                ]
+        children.all.return_value = [
+                ConceptLinkRecord(ancestor='testuser/new-idea', descendant='someotheruser/a-little-improvement'),
+                ConceptLinkRecord(ancestor='testuser/new-idea', descendant='anotheruser/helpful-suggestion')
+                ]
+        mock_exec_all.return_value = [exact, parents, children]
+        repeat = ConceptLineageHandler()
+        repeat.use_service(RegisteredService.CONCEPTS_DS)
+        for handler in (self.handler, repeat):
+            handler.receive(ConceptLineageRequest(
+                author='testuser',
+                title='new-idea',
+                simple=True
+                ))
+            assert handler.result.body == ConceptLineage(nodes=4, lineage=test_lineage)
+        mock_exec_all.assert_called_once()
+        assert mock_s3_url.call_count == 2
+
+    @patch.object(QueryService, 'exec_all')
+    @patch.object(
+            S3Crud,
+            'share_items',
+            side_effect=(lambda keys: [f'http://example.com/{key}' for key in keys])
+            )
+    def test_lineage_retrieval_as_graph(
+            self,
+            mock_s3_url,
+            mock_exec_all,
+            mock_query_results,
+            mock_query,
+            test_concept_simple_view
+            ):
+        exact, parents, children = MagicMock(), MagicMock(), MagicMock()
+        exact.one.return_value = test_concept_simple_view
+        parents.all.return_value = [
+                ConceptLinkRecord(ancestor='testuser/old-idea', descendant='testuser/new-idea'),
+                ConceptLinkRecord(ancestor='anotheruser/other-idea', descendant='testuser/new-idea')
+                ]
+        children.all.return_value = [
+                ConceptLinkRecord(ancestor='testuser/new-idea', descendant='someotheruser/a-little-improvement'),
+                ConceptLinkRecord(ancestor='anotheruser/other-idea', descendant='someotheruser/a-little-improvement')
+                ]
+        mock_exec_all.return_value = [exact, parents, children]
+        self.handler.receive(ConceptLineageRequest(
+            author='testuser',
+            title='new-idea',
+            simple=True,
+            format=LineageFormat.GRAPH
+            ))
+        assert self.handler.status == EndpointHandlerStatus.COMPLETE
+        assert self.handler.result.body == ConceptLineageGraph(
+                focus='testuser/new-idea',
+                nodes=[
+                    ConceptSimpleView(
+                        identifier=identifier,
+                        thumbnail_url=f'http://example.com/thumbnails/{identifier}'
+                        )
+                    for identifier in [
+                        'testuser/new-idea',
+                        'testuser/old-idea',
+                        'anotheruser/other-idea',
+                        'someotheruser/a-little-improvement'
+                        ]
+                    ],
+                edges=parents.all.return_value + children.all.return_value
+                )
+        mock_s3_url.assert_called_once_with([
+            'thumbnails/testuser/new-idea',
+            'thumbnails/testuser/old-idea',
+            'thumbnails/anotheruser/other-idea',
+            'thumbnails/someotheruser/a-little-improvement'
+            ])
+
+    @patch.object(QueryService, 'exec_all')
+    @patch.object(
+            S3Crud,
+            'share_items',
+            side_effect=(lambda keys: [f'http://example.com/{key}' for key in keys])
+            )
+    def test_lineage_retrieval_from_memory(
+            self,
+            mock_s3_url,
+            mock_exec_all,
+            mock_query_results,
+            mock_query,
+            test_lineage
+            ):
+        graph = ConceptGraph('test-graph', refresh=0)
+        graph.begin_load()
+        graph.finish_load([
+            ('testuser/old-idea', 'testuser/new-idea'),
+            ('testuser/new-idea', 'someotheruser/a-little-improvement'),
+            ('testuser/new-idea', 'anotheruser/helpful-suggestion')
+            ], version=3)
+        mock_query_results.all.return_value = []
+        with patch.object(ConceptsDataService, 'LINEAGE_GRAPH', graph), \
+                patch.object(ConceptLineageHandler, 'USE_GRAPH', True), \
+                patch.object(ConceptsDataService, 'find_links_after') as mock_links_after:
+            self.handler.receive(ConceptLineageRequest(
+                author='testuser',
+                title='new-idea',
+                simple=True
+                ))
+        assert self.handler.status == EndpointHandlerStatus.COMPLETE
+        assert self.handler.result.body == ConceptLineage(
+                nodes=4,
+                lineage=test_lineage
+                )
+        mock_links_after.assert_called_once_with(3)
+        assert mock_query.call_count == 1
+        mock_exec_all.assert_not_called()
+
+    @patch.object(QueryService, 'exec_all')
+    @patch.object(
+            S3Crud,
+            'share_items',
+            side_effect=(lambda keys: [f'http://example.com/{key}' for key in keys])
+            )
+    def test_links_created_by_other_workers_are_caught_up_on(
+            self,
+            mock_s3_url,
+            mock_exec_all,
+            mock_query_results,
+            mock_query
+            ):
+        graph = ConceptGraph('test-graph', refresh=0)
+        graph.begin_load()
+        graph.finish_load([('testuser/old-idea', 'testuser/new-idea')], version=1)
+        mock_query_results.all.return_value = [
+                LinkRow('testuser/new-idea', 'anotheruser/helpful-suggestion', 2)
+                ]
+        with patch.object(ConceptsDataService, 'LINEAGE_GRAPH', graph), \
+                patch.object(ConceptLineageHandler, 'USE_GRAPH', True):
+            self.handler.receive(ConceptLineageRequest(
+                author='testuser',
+                title='new-idea',
+                simple=True
+                ))
+        assert self.handler.status == EndpointHandlerStatus.COMPLETE
+        assert self.handler.result.body.nodes == 3
+        assert graph.version == 2
+        mock_exec_all.assert_not_called()
+
+    @patch.object(QueryService, 'exec_all')
+    @patch.object(
+            S3Crud,
+            'share_items',
+            side_effect=(lambda keys: [f'http://example.com/{key}' for key in keys])
+            )
+    def test_lineage_of_concept_unknown_to_memory_is_read_from_database(
+            self,
+            mock_s3_url,
+            mock_exec_all,
+            mock_query_results,
+            mock_query,
+            test_concept_simple_view
+            ):
+        exact, parents, children = MagicMock(), MagicMock(), MagicMock()
+        exact.one.return_value = test_concept_simple_view
+        parents.all.return_value = []
+        children.all.return_value = []
+        mock_exec_all.return_value = [exact, parents, children]
+        graph = ConceptGraph('test-graph', refresh=0)
+        graph.begin_load()
+        graph.finish_load([('testuser/old-idea', 'testuser/other-idea')])
+        with patch.object(ConceptsDataService, 'LINEAGE_GRAPH', graph), \
+                patch.object(ConceptLineageHandler, 'USE_GRAPH', True):
+            self.handler.receive(ConceptLineageRequest(
+                author='testuser',
+                title='new-idea',
+                simple=True
+                ))
+        assert self.handler.status == EndpointHandlerStatus.COMPLETE
+        assert self.handler.result.body.nodes == 1
+        mock_exec_all.assert_called_once()
+
+    @patch.object(QueryService, 'exec_all')
+    @patch.object(ConceptLineageHandler, 'MAX_NODES', 1)
+    @patch.object(
+            S3Crud,
+            'share_items',
+            side_effect=(lambda keys: [f'http://example.com/{key}' for key in keys])
+            )
+    def test_lineage_retrieval_is_capped(
+            self,
+            mock_s3_url,
+            mock_exec_all,
+            mock_query_results,
+            mock_query,
+            test_concept_simple_view
+            ):
+        exact, parents, children = MagicMock(), MagicMock(), MagicMock()
+        exact.one.return_value = test_concept_simple_view
+        parents.all.return_value = []
+        children.all.return_value = [
+                ConceptLinkRecord(ancestor='testuser/new-idea', descendant='someotheruser/a-little-improvement'),
+                ConceptLinkRecord(ancestor='someotheruser/a-little-improvement', descendant='anotheruser/helpful-suggestion')
+                ]
+        mock_exec_all.return_value = [exact, parents, children]
+        self.handler.receive(ConceptLineageRequest(
+            author='testuser',
+            title='new-idea',
+            simple=True
+            ))
+        assert self.handler.status == EndpointHandlerStatus.COMPLETE
+        assert self.handler.result.body.nodes == 2
+        assert self.handler.result.body.truncated
+        assert list(self.handler.result.body.lineage) == ['testuser/new-idea']
+
+    @patch.object(QueryService, 'exec_all')
     def test_retrieval_of_lineage_where_focus_does_not_exist(
             self,
+            mock_exec_all,
             mock_query_results,
             mock_query
             ):
-        mock_query_results.one.side_effect = NoResultFound
-        self.handler.receive(ConceptRequest(
+        exact = MagicMock()
+        exact.one.side_effect = NoResultFound
+        mock_exec_all.return_value = [exact, MagicMock(), MagicMock()]
+        self.handler.receive(ConceptLineageRequest(
             author='testuser',
             title='fake-idea',
             simple=True
@@ -575,7 +1184,7 @@ class TestConceptLineageHandler:
             mock_query_results,
             mock_query
             ):
-        self.handler.receive(ConceptRequest(
+        self.handler.receive(ConceptLineageRequest(
             author='testuser',
             title='fake-idea',
             simple=True
@@ -704,50 +1313,42 @@ class TestLikeStatusHandler:
                 )
 
 
+@patch.object(EngagementDataService, 'COMMENT_SECTIONS', BoundedCache('test-uncached-comments', 0))
 @patch.object(QueryService, 'ENGINE', create_engine('sqlite:///:memory:', echo=True))
 @patch.object(QueryService, 'exec_next')
 @patch.object(QueryService, 'results')
+@patch.object(S3Crud, 'share_items', share_avatars)
 class TestCommentSectionHandler:
 
     def setup_method(self):
         self.handler = ConceptCommentsSectionHandler()
         self.handler.use_service(RegisteredService.ENGAGE_DS)
 
+    @staticmethod
+    def thread_row(comment, parent=None, has_replies=None, created_at=None, path='0' * 46):
+        return ThreadRow(
+                comment.comment_id,
+                parent,
+                comment.comment_author,
+                comment.comment_text,
+                created_at or datetime.datetime(2023, 6, 1),
+                path,
+                comment.preferred_name,
+                bool(comment.responses) if has_replies is None else has_replies
+                )
+
     def test_obtain_existing_comment_thread(
             self,
             mock_query_results,
             mock_query,
             test_existing_comment_thread
             ):
+        first, second = test_existing_comment_thread.threads
         mock_query_results.all.side_effect = [
-                [
-                    Comments(
-                        comment_id=c.comment_id,
-                        comment_by=c.comment_author,
-                        free_text=c.comment_text
-                        )
-                    for c in test_existing_comment_thread.threads
-                    ],
-                [
-                    Comments(
-                        comment_id=c.comment_id,
-                        comment_by=c.comment_author,
-                        free_text=c.comment_text
-                        )
-                    for c in test_existing_comment_thread.threads[0].responses
-                    ],
-                [
-                    Comments(
-                        comment_id=c.comment_id,
-                        comment_by=c.comment_author,
-                        free_text=c.comment_text
-                        )
-                    for c in test_existing_comment_thread.threads[1].responses
-                    ],
-                test_existing_comment_thread.threads[0].responses[0].responses,
-                test_existing_comment_thread.threads[0].responses[1].responses
+                [self.thread_row(first), self.thread_row(second)],
+                [self.thread_row(reply, first.comment_id) for reply in first.responses]
                 ]
-        self.handler.receive(ConceptRequest(
+        self.handler.receive(ConceptCommentsRequest(
             author='testuser',
             title='sample-idea',
             simple=True
@@ -755,6 +1356,7 @@ class TestCommentSectionHandler:
         assert self.handler.status == EndpointHandlerStatus.COMPLETE
         assert self.handler.result.code == status.HTTP_200_OK
         assert self.handler.result.body == test_existing_comment_thread
+        assert mock_query.call_count == 2
 
     def test_obtain_blank_comment_thread(
             self,
@@ -762,8 +1364,8 @@ class TestCommentSectionHandler:
             mock_query,
             test_empty_comment_thread
             ):
-        mock_query_results.all.side_effect = [[]]
-        self.handler.receive(ConceptRequest(
+        mock_query_results.all.return_value = []
+        self.handler.receive(ConceptCommentsRequest(
             author='testuser',
             title='sample-idea',
             simple=True
@@ -771,6 +1373,205 @@ class TestCommentSectionHandler:
         assert self.handler.status == EndpointHandlerStatus.COMPLETE
         assert self.handler.result.code == status.HTTP_200_OK
         assert self.handler.result.body == test_empty_comment_thread
+        assert mock_query.call_count == 1
+
+    def test_threads_are_paginated(
+            self,
+            mock_query_results,
+            mock_query,
+            test_existing_comment_thread
+            ):
+        first, second = test_existing_comment_thread.threads
+        created = datetime.datetime(2023, 6, 1, 12)
+        mock_query_results.all.return_value = [
+                self.thread_row(first, has_replies=False, created_at=created),
+                self.thread_row(second)
+                ]
+        self.handler.receive(ConceptCommentsRequest(
+            author='testuser',
+            title='sample-idea',
+            simple=True,
+            limit=1
+            ))
+        assert self.handler.status == EndpointHandlerStatus.COMPLETE
+        page = self.handler.result.body
+        assert [thread.comment_id for thread in page.threads] == [first.comment_id]
+        assert decode_cursor(page.next, datetime.datetime, str) == [created, str(first.comment_id)]
+        assert mock_query.call_count == 1
+
+    def test_page_resumes_from_cursor(
+            self,
+            mock_query_results,
+            mock_query,
+            test_existing_comment_thread
+            ):
+        created = datetime.datetime(2023, 6, 1, 12)
+        comment_id = uuid.uuid4()
+        mock_query_results.all.return_value = []
+        with patch.object(EngagementDataService, 'thread_page') as mock_page:
+            self.handler.receive(ConceptCommentsRequest(
+                author='testuser',
+                title='sample-idea',
+                simple=True,
+                response_to=comment_id,
+                cursor=encode_cursor(created, str(comment_id)),
+                limit=5
+                ))
+        assert self.handler.status == EndpointHandlerStatus.COMPLETE
+        mock_page.assert_called_once_with('testuser/sample-idea', comment_id, (created, comment_id), 6)
+
+    @pytest.mark.parametrize("cursor", ['garbage', encode_cursor('2023-06-01T00:00:00', 'not-a-uuid')])
+    def test_invalid_cursor_is_rejected(
+            self,
+            mock_query_results,
+            mock_query,
+            cursor
+            ):
+        self.handler.receive(ConceptCommentsRequest(
+            author='testuser',
+            title='sample-idea',
+            simple=True,
+            cursor=cursor
+            ))
+        assert self.handler.status == EndpointHandlerStatus.ERROR
+        assert self.handler.result.code == status.HTTP_400_BAD_REQUEST
+        assert mock_query.call_count == 0
+
+    @patch.object(ConceptCommentsSectionHandler, 'PREVIEW_REPLIES', 1)
+    def test_preview_is_bounded_in_width_and_depth(
+            self,
+            mock_query_results,
+            mock_query,
+            test_existing_comment_thread
+            ):
+        first, second = test_existing_comment_thread.threads
+        created = datetime.datetime(2023, 6, 1, 12)
+        mock_query_results.all.side_effect = [
+                [self.thread_row(first), self.thread_row(second)],
+                [
+                    self.thread_row(first.responses[0], first.comment_id, True, created),
+                    self.thread_row(first.responses[1], first.comment_id)
+                    ]
+                ]
+        self.handler.receive(ConceptCommentsRequest(
+            author='testuser',
+            title='sample-idea',
+            simple=True,
+            depth=1
+            ))
+        assert self.handler.status == EndpointHandlerStatus.COMPLETE
+        shown, other = self.handler.result.body.threads
+        assert [reply.comment_id for reply in shown.responses] == [first.responses[0].comment_id]
+        assert decode_cursor(shown.more_replies, datetime.datetime, str) \
+            == [created, str(first.responses[0].comment_id)]
+        assert shown.responses[0].more_replies == FIRST_REPLY
+        assert other.responses == []
+        assert other.more_replies is None
+        assert self.handler.result.body.next is None
+        assert mock_query.call_count == 2
+
+    @patch.object(ConceptCommentsSectionHandler, 'PREVIEW_REPLIES', 1)
+    def test_preview_of_every_level_is_read_at_once(
+            self,
+            mock_query_results,
+            mock_query
+            ):
+        thread, reply, nested, hidden, dropped = (
+                ConceptComment(comment_id=uuid.uuid4(), comment_author='testuser', comment_text=text)
+                for text in ('thread', 'reply', 'nested', 'hidden', 'dropped')
+                )
+        mock_query_results.all.side_effect = [
+                [self.thread_row(thread, has_replies=True, path='a' * 46)],
+                [
+                    self.thread_row(reply, thread.comment_id, True),
+                    self.thread_row(nested, reply.comment_id, False),
+                    self.thread_row(hidden, thread.comment_id, True),
+                    self.thread_row(dropped, hidden.comment_id, False)
+                    ]
+                ]
+        with patch.object(EngagementDataService, 'thread_previews') as mock_previews:
+            self.handler.receive(ConceptCommentsRequest(
+                author='testuser',
+                title='sample-idea',
+                simple=True,
+                depth=3
+                ))
+        assert self.handler.status == EndpointHandlerStatus.COMPLETE
+        mock_previews.assert_called_once_with('testuser/sample-idea', ['a' * 46], 3, 2)
+        assert mock_query.call_count == 2
+        shown, = self.handler.result.body.threads
+        assert shown.more_replies is not None
+        assert [c.comment_text for c in shown.responses] == ['reply']
+        assert [c.comment_text for c in shown.responses[0].responses] == ['nested']
+        assert shown.responses[0].more_replies is None
+
+    def test_avatar_of_each_author_is_signed_once(
+            self,
+            mock_query_results,
+            mock_query
+            ):
+        thread, reply, other = (
+                ConceptComment(comment_id=uuid.uuid4(), comment_author=author, comment_text=text)
+                for author, text in (('testuser', 'thread'), ('someuser', 'reply'), ('testuser', 'other'))
+                )
+        mock_query_results.all.side_effect = [
+                [self.thread_row(thread, has_replies=True), self.thread_row(other)],
+                [self.thread_row(reply, thread.comment_id)]
+                ]
+        with patch.object(
+                S3Crud,
+                'share_items',
+                side_effect=lambda keys: share_avatars(None, keys)
+                ) as mock_share:
+            self.handler.receive(ConceptCommentsRequest(
+                author='testuser',
+                title='sample-idea',
+                simple=True
+                ))
+        assert self.handler.status == EndpointHandlerStatus.COMPLETE
+        mock_share.assert_called_once_with(['avatars/testuser', 'avatars/someuser'])
+        shown, again = self.handler.result.body.threads
+        assert shown.avatar_url == again.avatar_url == 'http://example.com/avatars/testuser'
+        assert shown.responses[0].avatar_url == 'http://example.com/avatars/someuser'
+        assert shown.preferred_name is None
+
+    def test_threads_without_paths_are_not_previewed(
+            self,
+            mock_query_results,
+            mock_query,
+            test_existing_comment_thread
+            ):
+        first, _ = test_existing_comment_thread.threads
+        mock_query_results.all.return_value = [self.thread_row(first, path=None)]
+        self.handler.receive(ConceptCommentsRequest(
+            author='testuser',
+            title='sample-idea',
+            simple=True
+            ))
+        assert self.handler.status == EndpointHandlerStatus.COMPLETE
+        assert self.handler.result.body.threads[0].more_replies \
+            == FIRST_REPLY
+        assert mock_query.call_count == 1
+
+    def test_preview_depth_of_zero_only_reads_threads(
+            self,
+            mock_query_results,
+            mock_query,
+            test_existing_comment_thread
+            ):
+        first, second = test_existing_comment_thread.threads
+        mock_query_results.all.return_value = [self.thread_row(first), self.thread_row(second)]
+        self.handler.receive(ConceptCommentsRequest(
+            author='testuser',
+            title='sample-idea',
+            simple=True,
+            depth=0
+            ))
+        assert self.handler.status == EndpointHandlerStatus.COMPLETE
+        threads = self.handler.result.body.threads
+        assert [thread.more_replies for thread in threads] \
+            == [FIRST_REPLY, None]
+        assert mock_query.call_count == 1
 
     @patch.object(
             ConceptCommentsSectionHandler,
@@ -794,3 +1595,316 @@ class TestCommentSectionHandler:
         assert self.handler.result.body == EndpointErrorMessage(
                 err_msg='Really obscure error'
                 )
+
+
+class TestConnectionPoolStatisticsHandler:
+
+    def setup_method(self):
+        self.handler = ConnectionPoolStatisticsHandler()
+        self.handler.use_service(RegisteredService.RAW_DB)
+
+    def test_pool_statistics_are_reported(self):
+        self.handler.receive(None)
+        assert self.handler.status == EndpointHandlerStatus.COMPLETE
+        assert self.handler.result.code == status.HTTP_200_OK
+        assert [s.name for s in self.handler.result.body] == ['primary', 'primary-async']
+        assert all(isinstance(s, ConnectionPoolStatistics) for s in self.handler.result.body)
+
+
+class TestCacheStatisticsHandler:
+
+    def test_cache_statistics_are_reported(self):
+        handler = CacheStatisticsHandler()
+        handler.receive(None)
+        assert handler.status == EndpointHandlerStatus.COMPLETE
+        assert handler.result.code == status.HTTP_200_OK
+        assert 'signed-links' in [s.name for s in handler.result.body]
+        assert all(isinstance(s, CacheStatistics) for s in handler.result.body)
+
+
+
+@patch.object(EngagementDataService, 'COMMENT_SECTIONS', BoundedCache('test-cached-comments', 8))
+@patch.object(QueryService, 'ENGINE', create_engine('sqlite:///:memory:', echo=True))
+@patch.object(QueryService, 'exec_next')
+@patch.object(QueryService, 'results')
+@patch.object(S3Crud, 'share_items', share_avatars)
+class TestCachedCommentSectionHandler:
+
+    @staticmethod
+    def forest(thread):
+        first, second = thread.threads
+        created = datetime.datetime(2023, 6, 1)
+        return [
+                SectionRow(
+                    comment.comment_id,
+                    parent,
+                    comment.comment_author,
+                    comment.comment_text,
+                    created + datetime.timedelta(minutes=minutes),
+                    None,
+                    comment.preferred_name
+                    )
+                for comment, parent, minutes in [
+                    (first, None, 0),
+                    (first.responses[0], first.comment_id, 1),
+                    (second, None, 2),
+                    (first.responses[1], first.comment_id, 3)
+                    ]
+                ]
+
+    @staticmethod
+    def serve(**kwargs):
+        handler = ConceptCommentsSectionHandler()
+        handler.use_service(RegisteredService.ENGAGE_DS)
+        handler.receive(ConceptCommentsRequest(
+            author='testuser',
+            title='sample-idea',
+            simple=True,
+            **kwargs
+            ))
+        assert handler.status == EndpointHandlerStatus.COMPLETE
+        return handler.result.body
+
+    def test_comments_are_read_once_and_served_from_memory(
+            self,
+            mock_query_results,
+            mock_query,
+            test_existing_comment_thread
+            ):
+        EngagementDataService.COMMENT_SECTIONS.clear()
+        mock_query_results.all.return_value = self.forest(test_existing_comment_thread)
+        assert self.serve() == test_existing_comment_thread
+        assert self.serve() == test_existing_comment_thread
+        assert mock_query.call_count == 1
+        assert EngagementDataService.COMMENT_SECTIONS.statistics()['hits'] == 1
+
+    def test_cached_comments_are_paginated_and_expanded(
+            self,
+            mock_query_results,
+            mock_query,
+            test_existing_comment_thread
+            ):
+        EngagementDataService.COMMENT_SECTIONS.clear()
+        first, second = test_existing_comment_thread.threads
+        mock_query_results.all.return_value = self.forest(test_existing_comment_thread)
+        with patch.object(ConceptCommentsSectionHandler, 'PREVIEW_REPLIES', 1):
+            page = self.serve(limit=1)
+            assert [thread.comment_id for thread in page.threads] == [first.comment_id]
+            assert [reply.comment_id for reply in page.threads[0].responses] \
+                == [first.responses[0].comment_id]
+            replies = self.serve(response_to=first.comment_id, cursor=page.threads[0].more_replies)
+            assert [reply.comment_id for reply in replies.threads] \
+                == [first.responses[1].comment_id]
+            following = self.serve(limit=1, cursor=page.next)
+            assert [thread.comment_id for thread in following.threads] == [second.comment_id]
+            assert following.next is None
+        assert mock_query.call_count == 1
+
+@patch.object(QueryService, 'ENGINE', create_engine('sqlite:///:memory:', echo=True))
+@patch.object(QueryService, 'exec_next')
+@patch.object(QueryService, 'results')
+class TestLineageGraphLoadingHandler:
+
+    def setup_method(self):
+        self.handler = LineageGraphLoadingHandler()
+        self.handler.use_service(RegisteredService.CONCEPTS_DS)
+        self.graph = ConceptGraph('test-graph', refresh=0)
+
+    def test_graph_is_loaded(self, mock_query_results, mock_query):
+        mock_query_results.all.return_value = [
+                LinkRow('testuser/old-idea', 'testuser/new-idea', 1)
+                ]
+        with patch.object(ConceptsDataService, 'LINEAGE_GRAPH', self.graph), \
+                patch.object(ConceptLineageHandler, 'USE_GRAPH', True):
+            self.handler.receive(None)
+        assert self.handler.status == EndpointHandlerStatus.COMPLETE
+        assert self.handler.result.body.msg == "Lineage graph holds 1 links"
+        assert self.graph.walk('testuser/old-idea', 1, 10) == [('testuser/old-idea', 'testuser/new-idea')]
+        assert self.graph.version == 1
+
+    def test_graph_load_failure_falls_back_to_database(self, mock_query_results, mock_query):
+        mock_query.side_effect = OperationalError('SELECT', {}, Exception('connection refused'))
+        with patch.object(ConceptsDataService, 'LINEAGE_GRAPH', self.graph), \
+                patch.object(ConceptLineageHandler, 'USE_GRAPH', True):
+            self.handler.receive(None)
+        assert self.handler.status == EndpointHandlerStatus.COMPLETE
+        assert self.handler.result.body.msg == "Lineage graph not loaded"
+        assert self.graph.begin_load()
+
+    def test_disabled_graph_is_not_loaded(self, mock_query_results, mock_query):
+        with patch.object(ConceptLineageHandler, 'USE_GRAPH', False):
+            self.handler.receive(None)
+        assert self.handler.result.body.msg == "Lineage graph disabled"
+        mock_query.assert_not_called()
+
+
+@patch.object(QueryService, 'exec_next_async')
+@patch.object(QueryService, 'results')
+class TestAsyncRetrievalHandlers:
+
+    @patch('jwt.encode')
+    @patch('secrets.compare_digest', return_value=True)
+    def test_async_user_authentication(
+            self,
+            mock_digest,
+            mock_jwt,
+            mock_query_results,
+            mock_query,
+            test_auth_projection,
+            test_auth_token,
+            test_creds_set
+            ):
+        handler = AuthenticationHandler()
+        handler.use_service(RegisteredService.ACCOUNTS_DS)
+        mock_query_results.one.return_value = test_auth_projection
+        mock_jwt.return_value = test_auth_token.token
+        asyncio.run(handler.receive_async(test_creds_set))
+        mock_query.assert_awaited_once()
+        assert handler.status == EndpointHandlerStatus.COMPLETE
+        assert handler.result.body == test_auth_token
+
+    @patch.object(
+            S3Crud,
+            'share_item',
+            side_effect=(lambda key: f'http://example.com/{key}')
+        )
+    def test_async_profile_retrieval(
+            self,
+            mock_share,
+            mock_query_results,
+            mock_query,
+            test_creds_set,
+            test_profile_projection
+            ):
+        handler = ProfileRetrievalHandler()
+        handler.use_service(RegisteredService.ACCOUNTS_DS)
+        mock_query_results.one.return_value = test_profile_projection
+        asyncio.run(handler.receive_async(test_creds_set.display_name))
+        mock_query.assert_awaited_once()
+        assert handler.status == EndpointHandlerStatus.COMPLETE
+        assert handler.result.body == ProfileView(
+                preferred_name=test_profile_projection.preferred_name,
+                biography=test_profile_projection.biography,
+                avatar_url=f'http://example.com/avatars/{test_creds_set.display_name}'
+                )
+
+    def test_async_profile_not_found(
+            self,
+            mock_query_results,
+            mock_query
+            ):
+        handler = ProfileRetrievalHandler()
+        handler.use_service(RegisteredService.ACCOUNTS_DS)
+        mock_query_results.one.side_effect = NoResultFound
+        asyncio.run(handler.receive_async('notauser'))
+        assert handler.status == EndpointHandlerStatus.ERROR
+        assert handler.result.code == status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.parametrize("simple", [True, False])
+    @patch.object(
+            S3Crud,
+            'share_item',
+            side_effect=(lambda key: f'http://example.com/{key}')
+        )
+    def test_async_concept_retrieval(
+            self,
+            mock_s3_url,
+            mock_query_results,
+            mock_query,
+            test_full_concept_view,
+            test_concept_simple_view,
+            simple
+            ):
+        handler = SpecificConceptRetrievalHandler()
+        handler.use_service(RegisteredService.CONCEPTS_DS)
+        mock_query_results.one.return_value = test_full_concept_view
+        asyncio.run(handler.receive_async(ConceptRequest(
+            author=test_full_concept_view.author,
+            title=test_full_concept_view.title,
+            simple=simple
+            )))
+        mock_query.assert_awaited_once()
+        assert handler.status == EndpointHandlerStatus.COMPLETE
+        assert handler.result.body == (test_concept_simple_view if simple else test_full_concept_view)
+
+    def test_async_following_check(
+            self,
+            mock_query_results,
+            mock_query,
+            test_following_record
+            ):
+        handler = CheckFollowingStatusHandler()
+        handler.use_service(RegisteredService.ENGAGE_DS)
+        asyncio.run(handler.receive_async(test_following_record))
+        mock_query.assert_awaited_once()
+        assert handler.status == EndpointHandlerStatus.COMPLETE
+        assert handler.result.code == status.HTTP_200_OK
+
+    def test_async_liking_check(
+            self,
+            mock_query_results,
+            mock_query,
+            test_liking_record
+            ):
+        handler = CheckLikingStatusHandler()
+        handler.use_service(RegisteredService.ENGAGE_DS)
+        mock_query_results.one.side_effect = NoResultFound
+        asyncio.run(handler.receive_async(test_liking_record))
+        mock_query.assert_awaited_once()
+        assert handler.status == EndpointHandlerStatus.ERROR
+        assert handler.result.code == status.HTTP_404_NOT_FOUND
+
+
+def lagging_database():
+    primary = create_engine('sqlite://', poolclass=StaticPool)
+    with patch('ideabank_webapi.services.querydb.create_async_engine'):
+        replicas = ReplicaSet(['sqlite://'], ReplicaSet.ROUND_ROBIN, poolclass=StaticPool)
+    IdeaBankSchema.metadata.create_all(primary)
+    IdeaBankSchema.metadata.create_all(replicas.engines[0])
+    return primary, replicas
+
+
+class TestReadYourWrites:
+
+    def setup_method(self):
+        self.primary, self.replicas = lagging_database()
+
+    @staticmethod
+    def serve(handler, service, request):
+        handler.use_service(service)
+        handler.receive(request)
+        return handler.result
+
+    @patch('jwt.encode')
+    def test_login_right_after_signing_up_reads_the_primary(self, mock_jwt, fake_jwt, test_creds_set):
+        mock_jwt.return_value = fake_jwt
+        with patch.object(QueryService, 'ENGINE', self.primary), \
+                patch.object(QueryService, 'REPLICAS', self.replicas), \
+                patch.object(QueryService, 'RECENT_WRITES', WriteTracker(60)):
+            signup = self.serve(AccountCreationHandler(), RegisteredService.ACCOUNTS_DS, test_creds_set)
+            login = self.serve(AuthenticationHandler(), RegisteredService.ACCOUNTS_DS, test_creds_set)
+        assert signup.code == status.HTTP_201_CREATED
+        assert login.code == status.HTTP_200_OK
+        assert login.body.presenter == test_creds_set.display_name
+
+    @pytest.mark.parametrize('window, code', [(60, status.HTTP_200_OK), (0, status.HTTP_404_NOT_FOUND)])
+    @patch.object(AuthorizationRequired, '_check_if_authorized')
+    def test_follow_check_right_after_following_reads_the_primary(
+            self,
+            mock_auth,
+            window,
+            code,
+            test_auth_token
+            ):
+        follow = AccountFollowingRecord(follower=test_auth_token.presenter, followee='someuser')
+        with patch.object(QueryService, 'ENGINE', self.primary), \
+                patch.object(QueryService, 'REPLICAS', self.replicas), \
+                patch.object(QueryService, 'RECENT_WRITES', WriteTracker(window)):
+            followed = self.serve(
+                    StartFollowingAccountHandler(),
+                    RegisteredService.ENGAGE_DS,
+                    FollowRequest(auth_token=test_auth_token, **follow.dict())
+                    )
+            checked = self.serve(CheckFollowingStatusHandler(), RegisteredService.ENGAGE_DS, follow)
+        assert followed.code == status.HTTP_201_CREATED
+        assert checked.code == code
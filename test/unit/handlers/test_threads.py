@@ -0,0 +1,101 @@
+"""Tests for comment thread assembly"""
+
+import datetime
+import uuid
+from collections import namedtuple
+
+from ideabank_webapi.handlers.pagination import decode_cursor
+from ideabank_webapi.handlers.threads import build_threads, assemble_page, FIRST_REPLY
+
+Row = namedtuple('Row', ['comment_id', 'parent', 'comment_by', 'free_text', 'preferred_name'])
+
+
+IDS = [uuid.uuid4() for _ in range(3000)]
+
+
+def row(number, parent=None):
+    return Row(IDS[number], None if parent is None else IDS[parent], 'user', f'comment {number}', None)
+
+
+def texts(comments):
+    return [(c.comment_text, texts(c.responses)) for c in comments]
+
+
+def test_no_comments_make_no_threads():
+    assert build_threads([]) == []
+
+
+def test_responses_are_nested_in_record_order():
+    threads = build_threads([row(1), row(2, 1), row(3), row(4, 1), row(5, 2)])
+    assert texts(threads) == [
+            ('comment 1', [('comment 2', [('comment 5', [])]), ('comment 4', [])]),
+            ('comment 3', [])
+            ]
+
+
+def test_responses_may_precede_their_parent():
+    assert texts(build_threads([row(2, 1), row(1)])) == [('comment 1', [('comment 2', [])])]
+
+
+def test_unreachable_comments_are_left_out():
+    assert texts(build_threads([row(1), row(2, 9), row(3, 2)])) == [('comment 1', [])]
+
+
+def test_deep_thread_does_not_recurse():
+    threads = build_threads([row(0)] + [row(i, i - 1) for i in range(1, 3000)])
+    depth, comment = 0, threads[0]
+    while comment.responses:
+        comment = comment.responses[0]
+        depth += 1
+    assert depth == 2999
+
+
+def test_responses_to_a_comment_form_their_own_threads():
+    threads = build_threads([row(2, 1), row(3, 2), row(4, 1)], root=IDS[1])
+    assert texts(threads) == [('comment 2', [('comment 3', [])]), ('comment 4', [])]
+
+
+def test_comments_carry_their_more_replies_cursor():
+    threads = build_threads([row(1), row(2, 1)], more_replies={IDS[2]: 'cursor'})
+    assert threads[0].more_replies is None
+    assert threads[0].responses[0].more_replies == 'cursor'
+
+
+PageRow = namedtuple('PageRow', Row._fields + ('created_at', 'has_replies'))
+
+
+def page_row(number, parent=None, has_replies=False):
+    return PageRow(*row(number, parent), datetime.datetime(2023, 6, 1, 0, number), has_replies)
+
+
+def test_page_keeps_the_oldest_responses_and_marks_the_rest():
+    page = [page_row(1, has_replies=True), page_row(5)]
+    previews = [page_row(2, 1, True), page_row(3, 1), page_row(4, 3)]
+    threads = assemble_page(page, previews, None, 1)
+    assert texts(threads) == [('comment 1', [('comment 2', [])]), ('comment 5', [])]
+    assert decode_cursor(threads[0].more_replies, datetime.datetime, str) \
+        == [datetime.datetime(2023, 6, 1, 0, 2), str(IDS[2])]
+    assert threads[0].responses[0].more_replies == FIRST_REPLY
+    assert threads[1].more_replies is None
+
+
+def test_page_shares_the_avatar_of_each_author_kept_once():
+    shared = []
+
+    def share(authors):
+        shared.append(authors)
+        return [f'http://example.com/avatars/{author}' for author in authors]
+
+    page = [page_row(1, has_replies=True)._replace(comment_by='aaa', preferred_name='A')]
+    previews = [
+            page_row(2, 1)._replace(comment_by='bbb'),
+            page_row(3, 1)._replace(comment_by='aaa'),
+            page_row(4, 1)._replace(comment_by='ccc')
+            ]
+    threads = assemble_page(page, previews, None, 2, share)
+    assert shared == [['aaa', 'bbb']]
+    assert threads[0].preferred_name == 'A'
+    assert [reply.avatar_url for reply in threads[0].responses] == [
+            'http://example.com/avatars/bbb',
+            'http://example.com/avatars/aaa'
+            ]
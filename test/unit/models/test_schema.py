@@ -144,3 +144,12 @@ class TestIdeaBankSchema:
                         'descendant': end
                         })
                 session.execute(stmt)
+
+
+def test_search_vector_is_left_out_of_sqlite_tables():
+    engine = create_engine('sqlite:///:memory:')
+    IdeaBankSchema.metadata.create_all(engine)
+    with engine.connect() as conn:
+        columns = [row[1] for row in conn.exec_driver_sql('PRAGMA table_xinfo(concepts)')]
+    assert 'identifier' in columns
+    assert 'search_vector' not in columns
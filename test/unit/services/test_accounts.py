@@ -30,7 +30,8 @@ def test_authentication_query_builds(user):
     stmt = AccountsDataService.fetch_authentication_information(user)
     assert str(stmt) == 'SELECT accounts.display_name, accounts.password_hash, accounts.salt_value \n' \
                         'FROM accounts \n' \
-                        'WHERE accounts.display_name = :display_name_1'
+                        'WHERE accounts.display_name = :display_name'
+    assert stmt.params == {'display_name': user}
 
 
 @pytest.mark.parametrize("user", [
@@ -40,4 +41,11 @@ def test_profile_fetch_query_builds(user):
     stmt = AccountsDataService.fetch_account_profile(user)
     assert str(stmt) == 'SELECT accounts.preferred_name, accounts.biography \n' \
                         'FROM accounts \n' \
-                        'WHERE accounts.display_name = :display_name_1'
+                        'WHERE accounts.display_name = :display_name'
+    assert stmt.params == {'display_name': user}
+
+
+def test_profile_fetch_query_reuses_template():
+    first = AccountsDataService.fetch_account_profile('user1')
+    second = AccountsDataService.fetch_account_profile('user2')
+    assert first.statement is second.statement
@@ -0,0 +1,108 @@
+"""Tests for the in-process caches"""
+
+from freezegun import freeze_time
+
+from ideabank_webapi.services import BoundedCache, CACHES
+
+
+def test_cached_value_is_returned():
+    cache = BoundedCache('test-cache', 2)
+    cache.put('key', 'value')
+    assert cache.get('key') == 'value'
+    assert cache.get('other') is None
+    stats = cache.statistics()
+    assert (stats['hits'], stats['misses'], stats['hit_ratio']) == (1, 1, 0.5)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = BoundedCache('test-cache', 2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.statistics()['evictions'] == 1
+
+
+def test_expired_entries_are_not_returned():
+    cache = BoundedCache('test-cache', 2, ttl=10)
+    with freeze_time('2023-06-01 12:00:00') as frozen:
+        cache.put('a', 1)
+        cache.put('b', 2, ttl=30)
+        frozen.tick(11)
+        assert cache.get('a') is None
+        assert cache.get('b') == 2
+    assert len(cache) == 1
+
+
+def test_cache_without_capacity_stores_nothing():
+    cache = BoundedCache('test-cache', 0)
+    cache.put('a', 1)
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_invalidated_entry_is_dropped():
+    cache = BoundedCache('test-cache', 2)
+    cache.put('a', 1)
+    cache.invalidate('a')
+    assert cache.get('a') is None
+
+
+def test_invalidating_all_entries_keeps_counters():
+    cache = BoundedCache('test-cache', 2)
+    cache.put('a', 1)
+    cache.get('a')
+    cache.invalidate_all()
+    assert len(cache) == 0
+    assert cache.statistics()['hits'] == 1
+    assert cache.generation == 1
+
+
+def test_values_computed_before_invalidation_are_discarded():
+    cache = BoundedCache('test-cache', 2)
+    generation = cache.generation
+    cache.invalidate_all()
+    cache.put('a', 1, generation=generation)
+    assert cache.get('a') is None
+    cache.put('a', 1, generation=cache.generation)
+    assert cache.get('a') == 1
+
+
+def test_values_computed_before_a_new_generation_are_discarded():
+    cache = BoundedCache('test-cache', 2)
+    cache.put('a', 1)
+    generation = cache.generation
+    assert cache.start_generation() == generation + 1
+    cache.put('a', 0, generation=generation)
+    assert cache.get('a') == 1
+
+
+def test_tagged_entries_are_invalidated_together():
+    cache = BoundedCache('test-cache', 4)
+    cache.put('a', 1, tags=('x', 'y'))
+    cache.put('b', 2, tags=('y',))
+    cache.put('c', 3, tags=('z',))
+    generation = cache.generation
+    assert cache.invalidate_tagged('y', 'w') == 2
+    assert cache.get('a') is None
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+    assert cache.generation == generation + 1
+
+
+def test_evicted_entries_release_their_tags():
+    cache = BoundedCache('test-cache', 1)
+    cache.put('a', 1, tags=('x',))
+    cache.put('b', 2, tags=('y',))
+    cache.put('a', 3, tags=('y',))
+    assert cache.invalidate_tagged('x') == 0
+    assert cache.invalidate_tagged('y') == 1
+    assert len(cache) == 0
+
+
+def test_caches_are_registered_by_name():
+    BoundedCache('registered-cache', 1)
+    assert 'registered-cache' in [s['name'] for s in CACHES.statistics()]
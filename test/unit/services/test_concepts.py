@@ -2,8 +2,71 @@
 
 import pytest
 import datetime
+import struct
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.pool import StaticPool
 from ideabank_webapi.services import ConceptsDataService
+from ideabank_webapi.handlers.pagination import encode_cursor, decode_cursor
 from ideabank_webapi.models.artifacts import FuzzyOption
+from ideabank_webapi.models.schema import IdeaBankSchema, Concept
+
+TIED_SCORE = struct.unpack('f', struct.pack('f', 1 / 3))[0]
+UPDATED = datetime.datetime(2023, 6, 1)
+
+
+@pytest.fixture
+def search_engine():
+    engine = create_engine('sqlite://', poolclass=StaticPool)
+
+    @event.listens_for(engine, 'connect')
+    def register_search_functions(dbapi_connection, _):
+        for name, arity, function in (
+                ('similarity', 2, lambda *_: TIED_SCORE),
+                ('ts_rank', 2, lambda *_: TIED_SCORE),
+                ('ts_match', 2, lambda *_: 1),
+                ('websearch_to_tsquery', 2, lambda _, text: text),
+                ('ts_headline', 4, lambda _, description, *__: description)
+                ):
+            dbapi_connection.create_function(name, arity, function)
+
+    IdeaBankSchema.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql('ALTER TABLE concepts ADD COLUMN search_vector TEXT')
+        conn.execute(insert(Concept), [
+            {
+                'title': f'idea-{i}',
+                'author': 'anauthor',
+                'description': f'solar panels #{i}',
+                'updated_at': UPDATED + datetime.timedelta(minutes=i // 3)
+                }
+            for i in range(8)
+            ])
+    return engine
+
+
+def page_through(engine, **search):
+    found, after = [], None
+    with engine.connect() as conn:
+        while True:
+            stmt = ConceptsDataService.query_concepts(
+                    not_before=UPDATED - datetime.timedelta(days=1),
+                    not_after=UPDATED + datetime.timedelta(days=1),
+                    limit=3,
+                    after=after,
+                    **search
+                    )
+            rows = conn.execute(stmt).all()
+            found.extend(row.identifier for row in rows)
+            if len(rows) < 3:
+                return stmt, found
+            last = rows[-1]
+            after = decode_cursor(
+                    encode_cursor(last.score, last.updated_at, last.identifier),
+                    float,
+                    datetime.datetime,
+                    str
+                    )
 
 
 def test_account_has_all_parent_class_attributes():
@@ -29,7 +92,8 @@ def test_concept_find_query_builds():
     stmt = ConceptsDataService.find_exact_concept('atitle', 'anauthor')
     assert str(stmt) == 'SELECT concepts.author, concepts.title, concepts.description,' \
                         ' concepts.diagram \n' \
-                        'FROM concepts \nWHERE concepts.title = :title_1 AND concepts.author = :author_1'
+                        'FROM concepts \nWHERE concepts.title = :title AND concepts.author = :author'
+    assert stmt.params == {'title': 'atitle', 'author': 'anauthor'}
 
 
 def test_concept_linking_query_builds():
@@ -39,6 +103,27 @@ def test_concept_linking_query_builds():
                         'RETURNING concept_links.ancestor, concept_links.descendant'
 
 
+def test_concept_lineage_closure_lock_builds():
+    stmt = ConceptsDataService.lock_lineage_closure()
+    assert str(stmt).startswith('SELECT pg_advisory_xact_lock(')
+
+
+def test_concept_lineage_closure_extension_builds():
+    stmt = ConceptsDataService.extend_lineage_closure('parentid', 'childid')
+    compiled = str(stmt.compile(dialect=postgresql.dialect()))
+    assert compiled.startswith(
+            'INSERT INTO concept_closure (ancestor, descendant, depth) '
+            'SELECT above.node, below.node AS node_1, above.depth + below.depth + %(param_1)s AS anon_1 \n'
+            )
+    assert 'WHERE concept_closure.descendant = %(descendant_1)s UNION ALL' in compiled
+    assert 'WHERE concept_closure.ancestor = %(ancestor_1)s UNION ALL' in compiled
+    assert compiled.endswith(
+            'WHERE above.node != below.node '
+            'ON CONFLICT (ancestor, descendant) DO UPDATE SET depth = excluded.depth '
+            'WHERE excluded.depth < concept_closure.depth'
+            )
+
+
 @pytest.mark.parametrize("fuzzy", FuzzyOption)
 def test_concept_query_result_builds(fuzzy):
     stmt = ConceptsDataService.query_concepts(
@@ -48,61 +133,214 @@ def test_concept_query_result_builds(fuzzy):
             datetime.datetime.utcnow(),
             fuzzy
             )
+    order = ' ORDER BY concepts.updated_at DESC, concepts.identifier DESC'
     if fuzzy == FuzzyOption.ALL:
-        assert str(stmt) == 'SELECT concepts.identifier \n' \
+        score = 'CAST(similarity(concepts.author, :similarity_1) + similarity(concepts.title, :similarity_2) AS FLOAT)'
+        assert str(stmt) == f'SELECT concepts.identifier, concepts.updated_at, {score} AS score \n' \
                             'FROM concepts \n' \
                             'WHERE concepts.author LIKE :author_1 AND ' \
                             'concepts.title LIKE :title_1 AND ' \
                             'concepts.updated_at > :updated_at_1 AND ' \
-                            'concepts.updated_at < :updated_at_2'
+                            f'concepts.updated_at < :updated_at_2 ORDER BY {score} DESC,' + order[9:]
     elif fuzzy == FuzzyOption.TITLE:
-        assert str(stmt) == 'SELECT concepts.identifier \n' \
+        score = 'CAST(similarity(concepts.title, :similarity_1) AS FLOAT)'
+        assert str(stmt) == f'SELECT concepts.identifier, concepts.updated_at, {score} AS score \n' \
                             'FROM concepts \n' \
                             'WHERE concepts.author = :author_1 AND ' \
                             'concepts.title LIKE :title_1 AND ' \
                             'concepts.updated_at > :updated_at_1 AND ' \
-                            'concepts.updated_at < :updated_at_2'
+                            f'concepts.updated_at < :updated_at_2 ORDER BY {score} DESC,' + order[9:]
     elif fuzzy == FuzzyOption.AUTHOR:
-        assert str(stmt) == 'SELECT concepts.identifier \n' \
+        score = 'CAST(similarity(concepts.author, :similarity_1) AS FLOAT)'
+        assert str(stmt) == f'SELECT concepts.identifier, concepts.updated_at, {score} AS score \n' \
                             'FROM concepts \n' \
                             'WHERE concepts.author LIKE :author_1 AND ' \
                             'concepts.title = :title_1 AND ' \
                             'concepts.updated_at > :updated_at_1 AND ' \
-                            'concepts.updated_at < :updated_at_2'
+                            f'concepts.updated_at < :updated_at_2 ORDER BY {score} DESC,' + order[9:]
     else:
-        assert str(stmt) == 'SELECT concepts.identifier \n' \
+        assert str(stmt) == 'SELECT concepts.identifier, concepts.updated_at \n' \
                             'FROM concepts \n' \
                             'WHERE concepts.author = :author_1 AND ' \
                             'concepts.title = :title_1 AND ' \
                             'concepts.updated_at > :updated_at_1 AND ' \
-                            'concepts.updated_at < :updated_at_2'
+                            'concepts.updated_at < :updated_at_2' + order
+
+
+def test_fuzzy_query_applies_similarity_threshold():
+    stmt = ConceptsDataService.query_concepts(
+            'anauthor',
+            'atitle',
+            datetime.datetime.utcnow(),
+            datetime.datetime.utcnow(),
+            FuzzyOption.TITLE,
+            similarity=0.5
+            )
+    assert 'concepts.title LIKE :title_1 AND ' \
+           'similarity(concepts.title, :similarity_1) >= :similarity_2' in str(stmt)
+    params = stmt.compile().params
+    assert (params['title_1'], params['similarity_2']) == ('%atitle%', 0.5)
+
+
+def test_fuzzy_query_finds_short_terms_inside_longer_titles(search_engine):
+    with search_engine.begin() as conn:
+        conn.execute(insert(Concept).values(
+            title='using-ai-for-farming',
+            author='anauthor',
+            updated_at=UPDATED
+            ))
+    _, found = page_through(search_engine, author='anauthor', title='ai', fuzzy=FuzzyOption.TITLE)
+    assert found == ['anauthor/using-ai-for-farming']
+
+
+def test_fuzzy_query_applies_low_similarity_thresholds_on_their_own():
+    stmt = ConceptsDataService.query_concepts(
+            'anauthor',
+            'atitle',
+            datetime.datetime.utcnow(),
+            datetime.datetime.utcnow(),
+            FuzzyOption.TITLE,
+            similarity=0.1
+            )
+    assert 'WHERE concepts.author = :author_1 AND concepts.title LIKE :title_1 AND ' \
+           'similarity(concepts.title, :similarity_1) >= :similarity_2 AND' in str(stmt)
+    assert stmt.compile().params['similarity_2'] == 0.1
+
+
+def test_fuzzy_query_skips_empty_terms():
+    stmt = ConceptsDataService.query_concepts(
+            '',
+            '',
+            datetime.datetime.utcnow(),
+            datetime.datetime.utcnow(),
+            FuzzyOption.ALL
+            )
+    assert 'similarity' not in str(stmt)
+    assert '%' not in str(stmt)
+    assert str(stmt).startswith('SELECT concepts.identifier, concepts.updated_at, :param_1 AS score')
 
 
 def test_concept_find_children_query_build():
     stmt = ConceptsDataService.find_child_ideas('testuser/sample-idea', 5)
-    assert str(stmt) == 'WITH RECURSIVE anon_1(descendant, ancestor, depth) AS \n' \
-                        '(SELECT concept_links.descendant AS descendant, concept_links.ancestor AS ancestor, :param_1 AS depth \n' \
-                        'FROM concept_links \n' \
-                        'WHERE concept_links.ancestor = :ancestor_1 ' \
-                        'UNION ALL ' \
-                        'SELECT concept_links.descendant AS descendant, concept_links.ancestor AS ancestor, anon_1.depth + :depth_1 AS anon_2 \n' \
-                        'FROM concept_links, anon_1 \n' \
-                        'WHERE concept_links.ancestor = anon_1.descendant)\n ' \
-                        'SELECT anon_1.ancestor, anon_1.descendant \n' \
-                        'FROM anon_1 \n' \
-                        'WHERE anon_1.depth <= :depth_2 ORDER BY anon_1.depth'
+    assert str(stmt) == 'SELECT concept_links.ancestor, concept_links.descendant \n' \
+                        'FROM concept_links JOIN (SELECT :param_1 AS node, :param_2 AS depth ' \
+                        'UNION ALL SELECT concept_closure.descendant AS node, concept_closure.depth AS depth \n' \
+                        'FROM concept_closure \n' \
+                        'WHERE concept_closure.ancestor = :ancestor_1 AND concept_closure.depth < :depth_1) AS reachable ' \
+                        'ON concept_links.ancestor = reachable.node ORDER BY reachable.depth'
 
 
 def test_concept_find_parents_query_build():
     stmt = ConceptsDataService.find_parent_ideas('testuser/sample-idea', 5)
-    assert str(stmt) == 'WITH RECURSIVE anon_1(descendant, ancestor, depth) AS \n' \
-                        '(SELECT concept_links.descendant AS descendant, concept_links.ancestor AS ancestor, :param_1 AS depth \n' \
-                        'FROM concept_links \n' \
-                        'WHERE concept_links.descendant = :descendant_1 ' \
-                        'UNION ALL ' \
-                        'SELECT concept_links.descendant AS descendant, concept_links.ancestor AS ancestor, anon_1.depth + :depth_1 AS anon_2 \n' \
-                        'FROM concept_links, anon_1 \n' \
-                        'WHERE concept_links.descendant = anon_1.ancestor)\n ' \
-                        'SELECT anon_1.ancestor, anon_1.descendant \n' \
-                        'FROM anon_1 \n' \
-                        'WHERE anon_1.depth <= :depth_2 ORDER BY anon_1.depth'
+    assert str(stmt) == 'SELECT concept_links.ancestor, concept_links.descendant \n' \
+                        'FROM concept_links JOIN (SELECT :param_1 AS node, :param_2 AS depth ' \
+                        'UNION ALL SELECT concept_closure.ancestor AS node, concept_closure.depth AS depth \n' \
+                        'FROM concept_closure \n' \
+                        'WHERE concept_closure.descendant = :descendant_1 AND concept_closure.depth < :depth_1) AS reachable ' \
+                        'ON concept_links.descendant = reachable.node ORDER BY reachable.depth'
+
+
+def test_concept_find_linked_ideas_capped():
+    stmt = ConceptsDataService.find_child_ideas('testuser/sample-idea', 5, max_nodes=20)
+    assert str(stmt).endswith('ORDER BY reachable.depth\n LIMIT :param_3')
+    assert stmt.compile().params['param_3'] == 20
+    assert stmt.compile().params['depth_1'] == 5
+
+
+def test_concept_query_page_builds():
+    stmt = ConceptsDataService.query_concepts(
+            'atitle',
+            'anauthor',
+            datetime.datetime.utcnow(),
+            datetime.datetime.utcnow(),
+            FuzzyOption.NONE,
+            limit=26,
+            after=(datetime.datetime.utcnow(), 'anauthor/atitle')
+            )
+    assert str(stmt).endswith(
+            'AND (concepts.updated_at, concepts.identifier) < (:param_1, :param_2) '
+            'ORDER BY concepts.updated_at DESC, concepts.identifier DESC\n'
+            ' LIMIT :param_3'
+            )
+
+
+def test_fuzzy_query_page_builds():
+    stmt = ConceptsDataService.query_concepts(
+            'anauthor',
+            'atitle',
+            datetime.datetime.utcnow(),
+            datetime.datetime.utcnow(),
+            FuzzyOption.AUTHOR,
+            limit=26,
+            after=(0.5, datetime.datetime.utcnow(), 'anauthor/atitle')
+            )
+    assert str(stmt).endswith(
+            'AND (CAST(similarity(concepts.author, :similarity_1) AS FLOAT), '
+            'concepts.updated_at, concepts.identifier) < (:param_1, :param_2, :param_3) '
+            'ORDER BY CAST(similarity(concepts.author, :similarity_1) AS FLOAT) DESC, '
+            'concepts.updated_at DESC, concepts.identifier DESC\n'
+            ' LIMIT :param_4'
+            )
+
+
+def test_text_query_ranks_and_highlights_descriptions():
+    stmt = ConceptsDataService.query_concepts(
+            '',
+            '',
+            datetime.datetime.utcnow(),
+            datetime.datetime.utcnow(),
+            FuzzyOption.NONE,
+            text='solar panels'
+            )
+    query = 'websearch_to_tsquery(:websearch_to_tsquery_1, :websearch_to_tsquery_2)'
+    assert str(stmt) == 'SELECT concepts.identifier, concepts.updated_at, ' \
+                        f'ts_headline(:ts_headline_1, concepts.description, {query}, :ts_headline_2) AS snippet, ' \
+                        f'CAST(ts_rank(concepts.search_vector, {query}) AS FLOAT) AS score \n' \
+                        'FROM concepts \n' \
+                        'WHERE concepts.updated_at > :updated_at_1 AND ' \
+                        'concepts.updated_at < :updated_at_2 AND ' \
+                        f'(concepts.search_vector @@ {query}) ' \
+                        f'ORDER BY CAST(ts_rank(concepts.search_vector, {query}) AS FLOAT) DESC, ' \
+                        'concepts.updated_at DESC, concepts.identifier DESC'
+    assert stmt.compile().params['websearch_to_tsquery_2'] == 'solar panels'
+
+
+def test_text_query_is_narrowed_by_given_author():
+    stmt = ConceptsDataService.query_concepts(
+            'anauthor',
+            '',
+            datetime.datetime.utcnow(),
+            datetime.datetime.utcnow(),
+            FuzzyOption.NONE,
+            text='solar panels'
+            )
+    assert 'WHERE concepts.author = :author_1 AND concepts.updated_at' in str(stmt)
+    assert 'concepts.title' not in str(stmt)
+
+
+def test_fuzzy_pages_lose_no_results_tied_on_score(search_engine):
+    stmt, found = page_through(
+            search_engine,
+            author='anauthor',
+            title='idea',
+            fuzzy=FuzzyOption.TITLE
+            )
+    assert sorted(found) == [f'anauthor/idea-{i}' for i in range(8)]
+    assert len(set(found)) == len(found)
+    assert 'CAST(similarity(concepts.title, %(similarity_1)s) AS FLOAT(53))' \
+        in str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_text_pages_lose_no_results_tied_on_rank(search_engine):
+    stmt, found = page_through(
+            search_engine,
+            author='',
+            title='',
+            fuzzy=FuzzyOption.NONE,
+            text='solar panels'
+            )
+    assert sorted(found) == [f'anauthor/idea-{i}' for i in range(8)]
+    assert len(set(found)) == len(found)
+    assert 'CAST(ts_rank(concepts.search_vector, ' \
+        in str(stmt.compile(dialect=postgresql.dialect()))
+    assert 'AS FLOAT(53)) AS score' in str(stmt.compile(dialect=postgresql.dialect()))
@@ -1,7 +1,13 @@
 """Tests for engagement queries"""
 
+import uuid
 from datetime import datetime
+from unittest.mock import patch
+from freezegun import freeze_time
 from ideabank_webapi.services import EngagementDataService
+from ideabank_webapi.services.cache import BoundedCache
+from ideabank_webapi.services.engage import PATH_SEGMENT_LENGTH
+from ideabank_webapi.services.sections import CommentSection, CommentRecord
 
 
 def test_create_liking_query_builds():
@@ -22,8 +28,9 @@ def test_check_liking_query_builds():
     stmt = EngagementDataService.check_liking("user", "user/concept")
     assert str(stmt) == 'SELECT likes.display_name, likes.concept_id \n' \
                         'FROM likes \n' \
-                        'WHERE likes.display_name = :display_name_1 ' \
-                        'AND likes.concept_id = :concept_id_1'
+                        'WHERE likes.display_name = :account ' \
+                        'AND likes.concept_id = :concept'
+    assert stmt.params == {'account': 'user', 'concept': 'user/concept'}
 
 
 def test_create_following_query_builds():
@@ -44,21 +51,58 @@ def test_check_following_query_builds():
     stmt = EngagementDataService.check_following("user-a", "user-b")
     assert str(stmt) == 'SELECT follows.follower, follows.followee \n' \
                         'FROM follows \n' \
-                        'WHERE follows.follower = :follower_1 ' \
-                        'AND follows.followee = :followee_1'
+                        'WHERE follows.follower = :follower ' \
+                        'AND follows.followee = :followee'
+    assert stmt.params == {'follower': 'user-a', 'followee': 'user-b'}
 
 
 def test_create_comment_query_builds():
+    stmt = EngagementDataService.create_comment(
+            "user",
+            "concept",
+            "something to say"
+            )
+    assert str(stmt) == 'INSERT INTO comments ' \
+                        '(comment_id, comment_on, comment_by, free_text, parent, created_at, path) ' \
+                        'VALUES (:comment_id, :comment_on, :comment_by, :free_text, :parent, ' \
+                        ':created_at, :path) ' \
+                        'RETURNING comments.comment_id, comments.parent, comments.comment_by, ' \
+                        'comments.free_text, comments.created_at, comments.path, ' \
+                        '(SELECT accounts.preferred_name \n' \
+                        'FROM accounts \n' \
+                        'WHERE accounts.display_name = :display_name_1) AS preferred_name'
+
+
+def test_create_response_query_extends_thread_path():
     stmt = EngagementDataService.create_comment(
             "user",
             "concept",
             "something to say",
-            datetime.utcnow()
+            uuid.uuid4()
             )
     assert str(stmt) == 'INSERT INTO comments ' \
-                        '(comment_id, comment_on, comment_by, free_text, parent, created_at) ' \
-                        'VALUES (:comment_id, :comment_on, :comment_by, :free_text, :parent, :created_at) ' \
-                        'RETURNING comments.comment_id'
+                        '(comment_id, comment_on, comment_by, free_text, parent, created_at, path) ' \
+                        'SELECT :param_1 AS anon_1, thread.comment_on, :param_2 AS anon_2, ' \
+                        ':param_3 AS anon_3, thread.comment_id, :param_4 AS anon_4, ' \
+                        'thread.path || :path_1 AS anon_5 \n' \
+                        'FROM comments AS thread \n' \
+                        'WHERE thread.comment_id = :comment_id_1 ' \
+                        'AND thread.comment_on = :comment_on_1 ' \
+                        'RETURNING comments.comment_id, comments.parent, comments.comment_by, ' \
+                        'comments.free_text, comments.created_at, comments.path, ' \
+                        '(SELECT accounts.preferred_name \n' \
+                        'FROM accounts \n' \
+                        'WHERE accounts.display_name = :display_name_1) AS preferred_name'
+
+
+def test_comment_paths_order_comments_oldest_first():
+    with freeze_time('2023-06-01 12:00:00') as frozen:
+        first = EngagementDataService.create_comment("user", "concept", "first").compile().params
+        frozen.tick(0.000001)
+        second = EngagementDataService.create_comment("user", "concept", "second").compile().params
+    assert len(first['path']) == PATH_SEGMENT_LENGTH
+    assert first['path'] == f"{1685620800000000:014x}{first['comment_id'].hex}"
+    assert first['path'] < second['path']
 
 
 def test_find_threads():
@@ -77,3 +121,88 @@ def test_find_thread_members():
                         'WHERE comments.comment_on = :comment_on_1 ' \
                         'AND comments.parent = :parent_1 ' \
                         'ORDER BY comments.created_at'
+
+
+def test_find_comment_forest():
+    stmt = EngagementDataService.comment_forest("user/concept")
+    assert str(stmt) == 'SELECT comments.comment_id, comments.parent, comments.comment_by, ' \
+                        'comments.free_text, comments.created_at, comments.path, ' \
+                        'accounts.preferred_name \n' \
+                        'FROM comments LEFT OUTER JOIN accounts ' \
+                        'ON accounts.display_name = comments.comment_by \n' \
+                        'WHERE comments.comment_on = :comment_on_1 ' \
+                        'ORDER BY comments.path'
+
+
+def test_find_first_page_of_threads():
+    stmt = EngagementDataService.thread_page("user/concept", limit=21)
+    assert str(stmt) == 'SELECT comments.comment_id, comments.parent, comments.comment_by, ' \
+                        'comments.free_text, comments.created_at, comments.path, ' \
+                        'accounts.preferred_name, EXISTS (SELECT * \n' \
+                        'FROM comments AS comments_1 \n' \
+                        'WHERE comments_1.parent = comments.comment_id) AS has_replies \n' \
+                        'FROM comments LEFT OUTER JOIN accounts ' \
+                        'ON accounts.display_name = comments.comment_by \n' \
+                        'WHERE comments.comment_on = :comment_on_1 ' \
+                        'AND comments.parent IS NULL ' \
+                        'ORDER BY comments.created_at, comments.comment_id\n' \
+                        ' LIMIT :param_1'
+
+
+def test_find_following_page_of_responses():
+    stmt = EngagementDataService.thread_page(
+            "user/concept",
+            response_to=uuid.uuid4(),
+            after=(datetime(2023, 6, 1), uuid.uuid4()),
+            limit=21
+            )
+    assert str(stmt).endswith(
+            'WHERE comments.comment_on = :comment_on_1 '
+            'AND comments.parent = :parent_1 '
+            'AND (comments.created_at, comments.comment_id) > (:param_1, :param_2) '
+            'ORDER BY comments.created_at, comments.comment_id\n'
+            ' LIMIT :param_3'
+            )
+
+
+def test_preview_responses_under_a_page_of_threads():
+    stmt = EngagementDataService.thread_previews("user/concept", ['a' * 46, 'b' * 46], 2, 4)
+    sql = str(stmt)
+    assert sql.startswith('WITH RECURSIVE previewed(comment_id, parent, comment_by, '
+                          'free_text, created_at, path, level) AS')
+    assert 'WHERE comments.comment_on = :comment_on_1 ' \
+           'AND comments.path IN (__[POSTCOMPILE_path_1]) UNION ALL' in sql
+    assert 'FROM previewed JOIN LATERAL (SELECT replies.comment_id AS comment_id' in sql
+    assert 'FROM comments AS replies \n' \
+           'WHERE replies.comment_on = :comment_on_2 ' \
+           'AND replies.parent = previewed.comment_id ' \
+           'ORDER BY replies.created_at, replies.comment_id\n' \
+           ' LIMIT :param_1) AS responses ON true \n' \
+           'WHERE previewed.level < :level_2)' in sql
+    assert sql.endswith('FROM previewed LEFT OUTER JOIN accounts '
+                        'ON accounts.display_name = previewed.comment_by \n'
+                        'WHERE previewed.level > :level_3 ORDER BY previewed.path')
+    params = stmt.compile().params
+    assert params['path_1'] == ['a' * 46, 'b' * 46]
+    assert (params['param_1'], params['level_2'], params['level_3']) == (4, 2, 0)
+
+
+@patch.object(EngagementDataService, 'COMMENT_SECTIONS', BoundedCache('test-comment-sections', 4))
+def test_comments_recorded_while_a_section_loads_are_kept():
+    concept = 'user/concept'
+    thread = CommentRecord(uuid.uuid4(), None, 'user', 'thread', datetime(2023, 6, 1), 'a')
+    reply = (uuid.uuid4(), thread.comment_id, 'user', 'reply', datetime(2023, 6, 2), 'ab', None)
+
+    def load_and_comment_elsewhere():
+        other = CommentSection(concept, [thread])
+        EngagementDataService.COMMENT_SECTIONS.put(concept, other, tags=(concept,))
+        EngagementDataService().record_comment(concept, reply)
+
+    with patch.object(EngagementDataService, 'exec_next', side_effect=load_and_comment_elsewhere), \
+            patch.object(EngagementDataService, 'results') as mock_results:
+        mock_results.all.return_value = [thread]
+        stale = EngagementDataService().comment_section(concept)
+    assert [row.free_text for row in stale.page(thread.comment_id, None, 10)] == []
+    cached = EngagementDataService.COMMENT_SECTIONS.get(concept)
+    assert cached is not stale
+    assert [row.free_text for row in cached.page(thread.comment_id, None, 10)] == ['reply']
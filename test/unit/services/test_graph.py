@@ -0,0 +1,95 @@
+"""Tests for the in-memory concept graph"""
+
+import pytest
+from freezegun import freeze_time
+
+from ideabank_webapi.services import ConceptGraph
+
+LINKS = [('a', 'b'), ('b', 'c'), ('c', 'd'), ('a', 'e'), ('x', 'b')]
+
+
+@pytest.fixture
+def graph():
+    graph = ConceptGraph('test-graph', refresh=0)
+    assert graph.begin_load()
+    graph.finish_load(LINKS)
+    return graph
+
+
+def test_unloaded_graph_cannot_walk():
+    graph = ConceptGraph('test-graph', refresh=0)
+    assert not graph.loaded
+    assert graph.walk('a', 10, 100) is None
+
+
+def test_unknown_concept_cannot_be_walked(graph):
+    assert graph.loaded
+    assert len(graph) == len(LINKS)
+    assert graph.walk('z', 10, 100) is None
+
+
+def test_walk_down_is_breadth_first(graph):
+    assert graph.walk('a', 10, 100) == [('a', 'b'), ('a', 'e'), ('b', 'c'), ('c', 'd')]
+
+
+def test_walk_up_reports_links_as_ancestor_descendant(graph):
+    assert graph.walk('c', 10, 100, upward=True) == [('b', 'c'), ('a', 'b'), ('x', 'b')]
+
+
+def test_walk_is_bounded_by_depth_and_limit(graph):
+    assert graph.walk('a', 2, 100) == [('a', 'b'), ('a', 'e'), ('b', 'c')]
+    assert graph.walk('a', 10, 2) == [('a', 'b'), ('a', 'e')]
+
+
+def test_walk_terminates_on_cycles():
+    graph = ConceptGraph('test-graph', refresh=0)
+    graph.begin_load()
+    graph.finish_load([('a', 'b'), ('b', 'c'), ('c', 'a')])
+    assert graph.walk('a', 100, 100) == [('a', 'b'), ('b', 'c'), ('c', 'a')]
+
+
+def test_added_links_are_walked_and_compacted(graph):
+    graph.add_link('d', 'f')
+    graph.add_link('d', 'f')
+    assert graph.walk('f', 10, 100, upward=True)[0] == ('d', 'f')
+    for i in range(100):
+        graph.add_link('f', f'g{i}')
+    assert len(graph) == len(LINKS) + 101
+    assert len(graph.walk('a', 10, 1000)) == 4 + 101
+
+
+def test_links_added_during_a_load_survive_it():
+    graph = ConceptGraph('test-graph', refresh=0)
+    assert graph.begin_load()
+    assert not graph.begin_load()
+    graph.add_link('y', 'a')
+    graph.finish_load(LINKS)
+    assert graph.walk('a', 1, 100, upward=True) == [('y', 'a')]
+
+
+def test_graph_is_reloaded_once_out_of_date():
+    graph = ConceptGraph('test-graph', refresh=60)
+    with freeze_time('2023-06-01 12:00:00') as frozen:
+        assert graph.begin_load()
+        graph.finish_load(LINKS)
+        assert not graph.begin_load()
+        frozen.tick(61)
+        assert graph.begin_load()
+        graph.abort_load()
+        assert graph.walk('a', 1, 100) == [('a', 'b'), ('a', 'e')]
+
+
+def test_graph_catches_up_on_links_created_elsewhere(graph):
+    assert graph.version == 0
+    assert graph.catch_up([('a', 'b'), ('d', 'f')], 7) == [('d', 'f')]
+    assert graph.version == 7
+    assert graph.walk('f', 1, 100, upward=True) == [('d', 'f')]
+
+
+def test_links_caught_up_on_during_a_load_survive_it():
+    graph = ConceptGraph('test-graph', refresh=0)
+    assert graph.begin_load()
+    assert graph.catch_up([('y', 'a')], 6) == []
+    graph.finish_load(LINKS, 5)
+    assert graph.walk('a', 1, 100, upward=True) == [('y', 'a')]
+    assert graph.version == 6
@@ -0,0 +1,53 @@
+"""Tests for the service provider pool"""
+
+import pytest
+
+from ideabank_webapi.services import (
+        ServiceProviderPool,
+        RegisteredService,
+        QueryService
+        )
+
+
+class TestServiceProviderPool:
+    def setup_method(self):
+        self.pool = ServiceProviderPool()
+
+    @pytest.mark.parametrize("service", RegisteredService)
+    def test_acquire_yields_provider_of_requested_service(self, service):
+        assert isinstance(self.pool.acquire(service), service.value)
+
+    @pytest.mark.parametrize("service", RegisteredService)
+    def test_released_provider_is_reused(self, service):
+        provider = self.pool.acquire(service)
+        self.pool.release(service, provider)
+        assert self.pool.idle_count(service) == 1
+        assert self.pool.acquire(service) is provider
+        assert self.pool.idle_count(service) == 0
+
+    def test_released_provider_has_no_request_state(self):
+        provider = self.pool.acquire(RegisteredService.RAW_DB)
+        provider.add_query('SELECT 1')
+        provider._query_results = 'stale'
+        self.pool.release(RegisteredService.RAW_DB, provider)
+        reused = self.pool.acquire(RegisteredService.RAW_DB)
+        assert len(reused._query_buffer) == 0
+        assert reused.results is None
+
+    def test_provider_with_open_session_is_not_pooled(self):
+        provider = self.pool.acquire(RegisteredService.RAW_DB)
+        provider._active = True
+        self.pool.release(RegisteredService.RAW_DB, provider)
+        assert self.pool.idle_count(RegisteredService.RAW_DB) == 0
+
+    def test_idle_providers_are_bounded(self):
+        providers = [QueryService() for _ in range(self.pool.MAX_IDLE + 5)]
+        for provider in providers:
+            self.pool.release(RegisteredService.RAW_DB, provider)
+        assert self.pool.idle_count(RegisteredService.RAW_DB) == self.pool.MAX_IDLE
+
+    def test_pooled_providers_share_s3_client(self):
+        first = self.pool.acquire(RegisteredService.CONCEPTS_DS)
+        second = self.pool.acquire(RegisteredService.ACCOUNTS_DS)
+        assert first is not second
+        assert first._s3_client is second._s3_client
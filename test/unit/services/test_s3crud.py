@@ -2,14 +2,20 @@
 
 from unittest.mock import patch
 import pytest
+from freezegun import freeze_time
+
+import boto3
+from botocore.config import Config
 
 from ideabank_webapi.services import S3Crud
+from ideabank_webapi.services.presign import SigV4Presigner
 from ideabank_webapi.config import ServiceConfig
 
 
 class TestS3CrudService:
     def setup_method(self):
         self.s3 = S3Crud()
+        S3Crud.SIGNED_LINKS.clear()
 
     @pytest.mark.parametrize("key", [
         ('path/to/key',),
@@ -39,3 +45,84 @@ class TestS3CrudService:
                         },
                     ExpiresIn=self.s3.LINK_TLL
             )
+
+    def test_shared_links_are_reused_while_fresh(self):
+        with freeze_time('2023-06-01 12:00:00') as frozen:
+            with patch.object(self.s3, '_s3_client') as mock_s3:
+                mock_s3.generate_presigned_url.side_effect = ['first-link', 'second-link']
+                assert self.s3.share_item('path/to/key') == 'first-link'
+                frozen.tick(self.s3.LINK_TLL - self.s3.LINK_MIN_TTL - 1)
+                assert self.s3.share_item('path/to/key') == 'first-link'
+                frozen.tick(2)
+                assert self.s3.share_item('path/to/key') == 'second-link'
+        stats = S3Crud.SIGNED_LINKS.statistics()
+        assert (stats['hits'], stats['misses']) == (1, 2)
+
+    def test_links_are_cached_per_method(self):
+        with patch.object(self.s3, '_s3_client') as mock_s3:
+            self.s3.share_item('path/to/key')
+            self.s3.put_item('path/to/key')
+            assert mock_s3.generate_presigned_url.call_count == 2
+
+    def test_batch_share_links_reuse_cached_links(self):
+        S3Crud.SIGNED_LINKS.put(('get_object', 'cached/key'), 'cached-link')
+        with patch.object(S3Crud, '_PRESIGNER') as mock_presigner:
+            mock_presigner.presign.side_effect = lambda keys, expires: [f'signed-{k}' for k in keys]
+            links = self.s3.share_items(['a', 'cached/key', 'b', 'a'])
+            mock_presigner.presign.assert_called_once_with(['a', 'b'], self.s3.LINK_TLL)
+        assert links == ['signed-a', 'cached-link', 'signed-b', 'signed-a']
+        assert self.s3.share_item('b') == 'signed-b'
+
+    def test_batch_share_links_fall_back_to_boto3(self):
+        with patch.object(S3Crud, '_PRESIGNER', None), \
+                patch.object(self.s3, '_s3_client') as mock_s3:
+            mock_s3.generate_presigned_url.side_effect = ['link-a', 'link-b']
+            assert self.s3.share_items(['a', 'b']) == ['link-a', 'link-b']
+
+
+@pytest.mark.parametrize("endpoint, region", [
+    ('http://localhost:9000', 'us-west-2'),
+    ('https://s3.example.com/prefix', 'eu-central-1'),
+    (None, 'us-west-2'),
+    (None, 'us-east-1')
+    ])
+def test_presigner_matches_boto3(endpoint, region):
+    session = boto3.session.Session(
+            region_name=region,
+            aws_access_key_id='AKIDEXAMPLE',
+            aws_secret_access_key='wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY'
+            )
+    client = session.client('s3', endpoint_url=endpoint, config=Config(signature_version='s3v4'))
+    keys = ['thumbnails/someuser/new-idea', 'avatars/some user+1', 'odd/k~ey?&=#%', 'ünïcode/キー']
+    with freeze_time('2023-06-01 23:59:59'):
+        presigner = SigV4Presigner.for_client(client, session.get_credentials(), 'my-bucket')
+        expected = [
+                client.generate_presigned_url(
+                    ClientMethod='get_object',
+                    Params={'Bucket': 'my-bucket', 'Key': key},
+                    ExpiresIn=300
+                    )
+                for key in keys
+                ]
+        assert presigner.presign(keys, 300) == expected
+
+
+def test_presigner_requires_sigv4_client():
+    session = boto3.session.Session(
+            region_name='us-west-2',
+            aws_access_key_id='AKIDEXAMPLE',
+            aws_secret_access_key='secret'
+            )
+    client = session.client('s3', config=Config(signature_version='s3'))
+    assert SigV4Presigner.for_client(client, session.get_credentials(), 'my-bucket') is None
+
+
+def test_presigner_skips_temporary_credentials():
+    session = boto3.session.Session(
+            region_name='us-west-2',
+            aws_access_key_id='AKIDEXAMPLE',
+            aws_secret_access_key='secret',
+            aws_session_token='token'
+            )
+    client = session.client('s3', config=Config(signature_version='s3v4'))
+    assert SigV4Presigner.for_client(client, session.get_credentials(), 'my-bucket') is None
@@ -0,0 +1,72 @@
+"""Tests for the in-memory comment sections"""
+
+import datetime
+import uuid
+
+import pytest
+
+from ideabank_webapi.services import CommentSection, CommentRecord
+
+CREATED = datetime.datetime(2023, 6, 1)
+
+
+def record(name, parent=None, minutes=0):
+    return CommentRecord(
+            uuid.uuid5(uuid.NAMESPACE_OID, name),
+            None if parent is None else uuid.uuid5(uuid.NAMESPACE_OID, parent),
+            'testuser',
+            name,
+            CREATED + datetime.timedelta(minutes=minutes),
+            None
+            )
+
+
+@pytest.fixture
+def section():
+    return CommentSection('user/concept', [
+        record('b', minutes=5),
+        record('a', minutes=1),
+        record('a.2', 'a', minutes=7),
+        record('a.1', 'a', minutes=3),
+        record('a.1.1', 'a.1', minutes=4),
+        record('c', minutes=9),
+        ])
+
+
+def names(records):
+    return [r.free_text for r in records]
+
+
+def test_threads_are_listed_oldest_first(section):
+    assert len(section) == 6
+    assert names(section.page(None, None, 10)) == ['a', 'b', 'c']
+    assert [r.has_replies for r in section.page(None, None, 10)] == [True, False, False]
+
+
+def test_pages_resume_after_the_cursor(section):
+    first = section.page(None, None, 2)
+    assert names(first) == ['a', 'b']
+    last = first[-1]
+    assert names(section.page(None, (last.created_at, last.comment_id), 2)) == ['c']
+    assert names(section.page(record('a').comment_id, None, 10)) == ['a.1', 'a.2']
+
+
+def test_previews_are_in_display_order_and_bounded(section):
+    page = section.page(None, None, 10)
+    assert names(section.previews(page, 2, 10)) == ['a.1', 'a.1.1', 'a.2']
+    assert names(section.previews(page, 1, 1)) == ['a.1']
+    assert section.previews(page, 0, 10) == []
+
+
+def test_new_comments_are_spliced_under_their_parent(section):
+    assert section.add(record('b.1', 'b', minutes=10))
+    assert section.add(record('a.0', 'a', minutes=2))
+    assert section.add(record('a.0', 'a', minutes=2))
+    assert len(section) == 8
+    assert names(section.page(record('a').comment_id, None, 10)) == ['a.0', 'a.1', 'a.2']
+    assert section.page(None, None, 10)[1].has_replies
+
+
+def test_comment_with_unknown_parent_is_refused(section):
+    assert not section.add(record('x.1', 'x', minutes=10))
+    assert len(section) == 6
@@ -0,0 +1,46 @@
+"""Tests for the statement template registry"""
+
+from sqlalchemy import select, bindparam
+
+from ideabank_webapi.services import StatementRegistry, BoundStatement
+from ideabank_webapi.models.schema import Accounts
+
+
+def account_template():
+    return select(Accounts.display_name).where(Accounts.display_name == bindparam('name'))
+
+
+def test_template_is_built_once():
+    registry = StatementRegistry()
+    assert registry.template(account_template) is registry.template(account_template)
+    assert len(registry) == 1
+
+
+def test_bind_pairs_template_with_parameters():
+    registry = StatementRegistry()
+    bound = registry.bind(account_template, name='someuser')
+    assert isinstance(bound, BoundStatement)
+    assert bound.statement is registry.template(account_template)
+    assert bound.params == {'name': 'someuser'}
+    assert str(bound) == str(bound.statement)
+
+
+def test_clear_drops_templates():
+    registry = StatementRegistry()
+    registry.template(account_template)
+    registry.clear()
+    assert len(registry) == 0
+
+
+def test_driver_default_preparation_is_kept_by_default():
+    assert StatementRegistry().connect_args() == {}
+
+
+def test_prepare_threshold_is_passed_to_driver():
+    assert StatementRegistry(prepare_threshold=2).connect_args() == {'prepare_threshold': 2}
+
+
+def test_pgbouncer_switch_turns_preparation_off():
+    registry = StatementRegistry(prepare_threshold=2, pgbouncer=True)
+    assert registry.prepare_threshold is None
+    assert registry.connect_args() == {'prepare_threshold': None}
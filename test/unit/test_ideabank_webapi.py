@@ -10,7 +10,8 @@ from ideabank_webapi.handlers import BaseEndpointHandler, EndpointHandlerStatus
 from ideabank_webapi.handlers.preprocessors import AuthorizationRequired
 from ideabank_webapi.models import (
         EndpointResponse,
-        EndpointInformationalMessage
+        EndpointInformationalMessage,
+        ConceptSearchStream
         )
 
 
@@ -26,7 +27,7 @@ test_response = EndpointResponse(
 
 
 @pytest.mark.parametrize("endpoint", ['/accounts/create', '/accounts/authenticate'])
-@patch.object(BaseEndpointHandler, 'receive')
+@patch.object(BaseEndpointHandler, 'receive_async')
 @patch.object(BaseEndpointHandler, 'result', new_callable=PropertyMock, return_value=test_response)
 @patch.object(BaseEndpointHandler, 'status', new_callable=PropertyMock, return_value=EndpointHandlerStatus.COMPLETE)
 def test_post_accounts_endpoints(
@@ -45,7 +46,7 @@ def test_post_accounts_endpoints(
             )
 
 
-@patch.object(BaseEndpointHandler, 'receive')
+@patch.object(BaseEndpointHandler, 'receive_async')
 @patch.object(BaseEndpointHandler, 'result', new_callable=PropertyMock, return_value=test_response)
 @patch.object(BaseEndpointHandler, 'status', new_callable=PropertyMock, return_value=EndpointHandlerStatus.COMPLETE)
 def test_get_accounts_endpoint(
@@ -59,7 +60,7 @@ def test_get_accounts_endpoint(
             )
 
 
-@patch.object(AuthorizationRequired, 'receive')
+@patch.object(AuthorizationRequired, 'receive_async')
 @patch.object(BaseEndpointHandler, 'result', new_callable=PropertyMock, return_value=test_response)
 @patch.object(BaseEndpointHandler, 'status', new_callable=PropertyMock, return_value=EndpointHandlerStatus.COMPLETE)
 def test_new_concept_endpoint(
@@ -81,7 +82,7 @@ def test_new_concept_endpoint(
         )
 
 
-@patch.object(AuthorizationRequired, 'receive')
+@patch.object(AuthorizationRequired, 'receive_async')
 @patch.object(BaseEndpointHandler, 'result', new_callable=PropertyMock, return_value=test_response)
 @patch.object(BaseEndpointHandler, 'status', new_callable=PropertyMock, return_value=EndpointHandlerStatus.COMPLETE)
 def test_new_link_endpoint(
@@ -105,9 +106,10 @@ def test_new_link_endpoint(
     '/concepts/testuser/sample-idea',
     '/concepts?author=testuser&fuzzy=title-only',
     '/concepts/testuser/sample-idea/lineage',
+    '/concepts/testuser/sample-idea/lineage?format=graph',
     '/concepts/testuser/sample-idea/comments'
     ])
-@patch.object(BaseEndpointHandler, 'receive')
+@patch.object(BaseEndpointHandler, 'receive_async')
 @patch.object(BaseEndpointHandler, 'result', new_callable=PropertyMock, return_value=test_response)
 @patch.object(BaseEndpointHandler, 'status', new_callable=PropertyMock, return_value=EndpointHandlerStatus.COMPLETE)
 def test_get_concepts_endpoints(
@@ -120,7 +122,7 @@ def test_get_concepts_endpoints(
     test_client.get(endpoint)
 
 
-@patch.object(AuthorizationRequired, 'receive')
+@patch.object(AuthorizationRequired, 'receive_async')
 @patch.object(BaseEndpointHandler, 'result', new_callable=PropertyMock, return_value=test_response)
 @patch.object(BaseEndpointHandler, 'status', new_callable=PropertyMock, return_value=EndpointHandlerStatus.COMPLETE)
 def test_follow_cycle_endpoints(
@@ -149,7 +151,7 @@ def test_follow_cycle_endpoints(
             )
 
 
-@patch.object(BaseEndpointHandler, 'receive')
+@patch.object(BaseEndpointHandler, 'receive_async')
 @patch.object(BaseEndpointHandler, 'result', new_callable=PropertyMock, return_value=test_response)
 @patch.object(BaseEndpointHandler, 'status', new_callable=PropertyMock, return_value=EndpointHandlerStatus.COMPLETE)
 def test_check_follow_status_endpoint(
@@ -161,7 +163,7 @@ def test_check_follow_status_endpoint(
     test_client.get('accounts/testuser/follows/someuser')
 
 
-@patch.object(AuthorizationRequired, 'receive')
+@patch.object(AuthorizationRequired, 'receive_async')
 @patch.object(BaseEndpointHandler, 'result', new_callable=PropertyMock, return_value=test_response)
 @patch.object(BaseEndpointHandler, 'status', new_callable=PropertyMock, return_value=EndpointHandlerStatus.COMPLETE)
 def test_like_cycle_endpoints(
@@ -190,7 +192,7 @@ def test_like_cycle_endpoints(
             )
 
 
-@patch.object(BaseEndpointHandler, 'receive')
+@patch.object(BaseEndpointHandler, 'receive_async')
 @patch.object(BaseEndpointHandler, 'result', new_callable=PropertyMock, return_value=test_response)
 @patch.object(BaseEndpointHandler, 'status', new_callable=PropertyMock, return_value=EndpointHandlerStatus.COMPLETE)
 def test_check_like_status_endpoint(
@@ -202,7 +204,7 @@ def test_check_like_status_endpoint(
     test_client.get('accounts/testuser/likes/someuser/cool-idea')
 
 
-@patch.object(AuthorizationRequired, 'receive')
+@patch.object(AuthorizationRequired, 'receive_async')
 @patch.object(BaseEndpointHandler, 'result', new_callable=PropertyMock, return_value=test_response)
 @patch.object(BaseEndpointHandler, 'status', new_callable=PropertyMock, return_value=EndpointHandlerStatus.COMPLETE)
 def test_new_comment_endpoint(
@@ -222,7 +224,7 @@ def test_new_comment_endpoint(
         )
 
 
-@patch.object(BaseEndpointHandler, 'receive')
+@patch.object(BaseEndpointHandler, 'receive_async')
 @patch.object(BaseEndpointHandler, 'result', new_callable=PropertyMock, return_value=test_response)
 @patch.object(BaseEndpointHandler, 'status', new_callable=PropertyMock, return_value=EndpointHandlerStatus.COMPLETE)
 def test_get_comment_endpoint(
@@ -232,3 +234,52 @@ def test_get_comment_endpoint(
         test_client
         ):
     test_client.get('/concepts/someuser/cool-idea/comment')
+    test_client.get('/concepts/someuser/cool-idea/comment?limit=5&depth=0&cursor=abc')
+    test_client.get(
+            '/concepts/someuser/cool-idea/comment/7c4e4b5e-6f4c-4c8e-9f0a-2b6d3e8f1a2c/replies'
+            '?cursor=abc'
+            )
+    assert mock_receive.call_count == 3
+    assert mock_receive.call_args.args[0].response_to is not None
+
+
+@patch.object(BaseEndpointHandler, 'receive_async')
+@patch.object(BaseEndpointHandler, 'result', new_callable=PropertyMock, return_value=test_response)
+@patch.object(BaseEndpointHandler, 'status', new_callable=PropertyMock, return_value=EndpointHandlerStatus.COMPLETE)
+def test_get_pool_statistics_endpoint(
+        mock_status,
+        mock_result,
+        mock_receive,
+        test_client
+        ):
+    test_client.get('/metrics/db-pool')
+
+
+@patch.object(BaseEndpointHandler, 'receive_async')
+@patch.object(BaseEndpointHandler, 'result', new_callable=PropertyMock, return_value=test_response)
+@patch.object(BaseEndpointHandler, 'status', new_callable=PropertyMock, return_value=EndpointHandlerStatus.COMPLETE)
+def test_get_cache_statistics_endpoint(
+        mock_status,
+        mock_result,
+        mock_receive,
+        test_client
+        ):
+    test_client.get('/metrics/caches')
+
+
+@patch.object(BaseEndpointHandler, 'receive_async')
+@patch.object(BaseEndpointHandler, 'status', new_callable=PropertyMock, return_value=EndpointHandlerStatus.COMPLETE)
+def test_search_concepts_streams_ndjson(
+        mock_status,
+        mock_receive,
+        test_client
+        ):
+    stream = EndpointResponse(
+            code=status.HTTP_200_OK,
+            body=ConceptSearchStream(lines=iter(['{"a": 1}\n', '{"b": 2}\n']))
+            )
+    with patch.object(BaseEndpointHandler, 'result', new_callable=PropertyMock, return_value=stream):
+        response = test_client.get('/concepts?fuzzy=all', headers={'Accept': 'application/x-ndjson'})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert response.text == '{"a": 1}\n{"b": 2}\n'